@@ -11,25 +11,22 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.urls import path
-from courses.consumers import WhiteboardConsumer
-from django.contrib.auth.middleware import AuthenticationMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django_asgi_app = get_asgi_application()
 
+# Imported after setup: consumers and auth middleware need the app registry
+from courses.consumers import WhiteboardConsumer, ChatConsumer, PresenceConsumer, VoiceTutorConsumer
+from courses.ws_auth import JWTAuthMiddleware
+
 websocket_urlpatterns = [
     path('ws/whiteboard/<int:session_id>/', WhiteboardConsumer.as_asgi()),
+    path('ws/chat/<int:session_id>/', ChatConsumer.as_asgi()),
+    path('ws/presence/<int:session_id>/', PresenceConsumer.as_asgi()),
+    path('ws/ai/voice/<int:conversation_id>/', VoiceTutorConsumer.as_asgi()),
 ]
 
 application = ProtocolTypeRouter({
   "http": django_asgi_app,
-  "websocket": URLRouter(websocket_urlpatterns),
+  "websocket": JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
 })
-
-from courses.consumers import WhiteboardConsumer, ChatConsumer
-
-websocket_urlpatterns = [
-    path('ws/whiteboard/<int:session_id>/', WhiteboardConsumer.as_asgi()),
-    path('ws/chat/<int:session_id>/', ChatConsumer.as_asgi()),
-]
-
@@ -186,15 +186,66 @@ VIDEOSDK_API_KEY = config('VIDEOSDK_API_KEY', default='')
 VIDEOSDK_SECRET_KEY = config('VIDEOSDK_SECRET_KEY', default='')
 VIDEOSDK_REGION = config('VIDEOSDK_REGION', default='sg001')  # example region
 VIDEOSDK_WEBHOOK_SECRET = config('VIDEOSDK_WEBHOOK_SECRET', default='')
+VIDEOSDK_API_URL = config('VIDEOSDK_API_URL', default='https://api.videosdk.live')  # Point at `manage.py run_videosdk_stub` for local tests
+ROOM_PREWARM_MINUTES = config('ROOM_PREWARM_MINUTES', default=30, cast=int)  # Create rooms for sessions starting this soon
+ROOM_PREWARM_WORKERS = config('ROOM_PREWARM_WORKERS', default=8, cast=int)  # Concurrent room creation calls
+RECORDING_EVENT_MAX_ATTEMPTS = config('RECORDING_EVENT_MAX_ATTEMPTS', default=5, cast=int)
+RECORDING_EVENT_TIMEOUT_MINUTES = config('RECORDING_EVENT_TIMEOUT_MINUTES', default=5, cast=int)  # Requeue events claimed by a dead worker
+RECORDING_METADATA_WORKERS = config('RECORDING_METADATA_WORKERS', default=8, cast=int)  # Concurrent recording metadata lookups
+
+# Outbound provider HTTP (courses/http_client.py)
+HTTP_CONNECT_TIMEOUT = config('HTTP_CONNECT_TIMEOUT', default=3.05, cast=float)  # Seconds to open a connection
+HTTP_READ_TIMEOUT = config('HTTP_READ_TIMEOUT', default=30, cast=float)  # Seconds to wait for response bytes
+HTTP_RETRIES = config('HTTP_RETRIES', default=2, cast=int)  # Retries for connection failures and idempotent 502/503/504s
+HTTP_RETRY_BACKOFF = config('HTTP_RETRY_BACKOFF', default=0.3, cast=float)
+HTTP_POOL_HOSTS = config('HTTP_POOL_HOSTS', default=10, cast=int)  # Hosts with a cached keep-alive pool
+HTTP_POOL_MAXSIZE = config('HTTP_POOL_MAXSIZE', default=16, cast=int)  # Kept-alive connections per host
+HTTP_BREAKER_FAILURES = config('HTTP_BREAKER_FAILURES', default=5, cast=int)  # Consecutive failures that open a host's circuit
+HTTP_BREAKER_RESET_SECONDS = config('HTTP_BREAKER_RESET_SECONDS', default=30, cast=float)  # Fail fast this long before probing again
 
 
 ASGI_APPLICATION = 'config.asgi.application'
-CHANNEL_LAYERS = {
-  "default": {
-    "BACKEND": "channels_redis.core.RedisChannelLayer",
-    "CONFIG": {"hosts": [("127.0.0.1", 6379)]},
-  },
-}
+
+# Channel layer: 'memory' for a single node and tests, 'redis' when several nodes share rooms
+CHANNEL_LAYER = config('CHANNEL_LAYER', default='memory' if DEBUG else 'redis')
+CHANNEL_REDIS_URL = config('CHANNEL_REDIS_URL', default='redis://127.0.0.1:6379/0')
+CHANNEL_LAYER_CAPACITY = config('CHANNEL_LAYER_CAPACITY', default=1000, cast=int)  # Queued messages per socket before drops
+
+if CHANNEL_LAYER == 'memory':
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "courses.channel_layer.LocalChannelLayer",
+            "CONFIG": {"capacity": CHANNEL_LAYER_CAPACITY},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_REDIS_URL], "capacity": CHANNEL_LAYER_CAPACITY},
+        },
+    }
+
+# Whiteboard op log (courses/whiteboard.py)
+WHITEBOARD_SNAPSHOT_INTERVAL = config('WHITEBOARD_SNAPSHOT_INTERVAL', default=200, cast=int)  # Ops between compacted snapshots
+WHITEBOARD_FRAME_INTERVAL_MS = config('WHITEBOARD_FRAME_INTERVAL_MS', default=25, cast=int)  # Coalescing window before group_send
+WHITEBOARD_FRAME_MAX_BYTES = config('WHITEBOARD_FRAME_MAX_BYTES', default=65536, cast=int)  # Flush early once a frame gets this big
+
+# Session chat (courses/chat.py)
+CHAT_WRITE_BATCH_SIZE = config('CHAT_WRITE_BATCH_SIZE', default=50, cast=int)  # Messages per bulk_create
+CHAT_WRITE_INTERVAL_MS = config('CHAT_WRITE_INTERVAL_MS', default=250, cast=int)  # Max delay before buffered messages are written
+CHAT_HISTORY_BACKFILL = config('CHAT_HISTORY_BACKFILL', default=50, cast=int)  # Messages replayed on connect
+
+# Websocket rate limits (token bucket per connection: frames/second, burst size)
+WS_CHAT_RATE_LIMIT = config('WS_CHAT_RATE_LIMIT', default=5, cast=float)
+WS_CHAT_RATE_BURST = config('WS_CHAT_RATE_BURST', default=20, cast=int)
+WS_WHITEBOARD_RATE_LIMIT = config('WS_WHITEBOARD_RATE_LIMIT', default=60, cast=float)  # Pointer-move rate
+WS_WHITEBOARD_RATE_BURST = config('WS_WHITEBOARD_RATE_BURST', default=120, cast=int)
+
+# Presence and cursor/typing updates (courses/presence.py)
+PRESENCE_HEARTBEAT_SECONDS = config('PRESENCE_HEARTBEAT_SECONDS', default=20, cast=int)  # Client heartbeat and server refresh interval
+PRESENCE_TIMEOUT_SECONDS = config('PRESENCE_TIMEOUT_SECONDS', default=60, cast=int)  # Silence after which a socket counts as gone
+PRESENCE_UPDATE_INTERVAL_MS = config('PRESENCE_UPDATE_INTERVAL_MS', default=50, cast=int)  # Max cursor/typing broadcast rate per socket
 
 from decouple import config
 
@@ -208,11 +259,20 @@ GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
 # Voice Services
 ELEVENLABS_API_KEY = config('ELEVENLABS_API_KEY', default='')
 ELEVENLABS_VOICE_ID = config('ELEVENLABS_VOICE_ID', default='21m00Tcm4TlvDq8ikWAM')
+ELEVENLABS_API_URL = config('ELEVENLABS_API_URL', default='https://api.elevenlabs.io')
 
 # AI Assistant Settings
 AI_MAX_CONTEXT_MESSAGES = config('AI_MAX_CONTEXT_MESSAGES', default=20, cast=int)
 AI_RESPONSE_MAX_TOKENS = config('AI_RESPONSE_MAX_TOKENS', default=500, cast=int)
 AI_TEMPERATURE = config('AI_TEMPERATURE', default=0.7, cast=float)
+AI_GRADING_MAX_WORKERS = config('AI_GRADING_MAX_WORKERS', default=8, cast=int)  # Parallel grading calls per submission
+AI_GRADING_BATCH_TOKEN_BUDGET = config('AI_GRADING_BATCH_TOKEN_BUDGET', default=3000, cast=int)  # Prompt tokens per batch
+AI_GRADING_BATCH_MAX_ITEMS = config('AI_GRADING_BATCH_MAX_ITEMS', default=20, cast=int)
+
+# Pipelined voice tutor (courses/voice.py)
+VOICE_TTS_CONCURRENCY = config('VOICE_TTS_CONCURRENCY', default=3, cast=int)  # Sentences synthesized at once per turn
+VOICE_MIN_SENTENCE_CHARS = config('VOICE_MIN_SENTENCE_CHARS', default=20, cast=int)  # Shorter sentences are sent to TTS with the next one
+VOICE_MAX_AUDIO_BYTES = config('VOICE_MAX_AUDIO_BYTES', default=5 * 1024 * 1024, cast=int)  # Largest utterance accepted per frame
 
 
 from decouple import config
@@ -227,3 +287,26 @@ RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default='')
 PLATFORM_COMMISSION_PERCENTAGE = config('PLATFORM_COMMISSION_PERCENTAGE', default=15, cast=int)
 PAYMENT_CURRENCY = config('PAYMENT_CURRENCY', default='INR')
 ESCROW_HOLD_HOURS = config('ESCROW_HOLD_HOURS', default=24, cast=int)
+ESCROW_RELEASE_BATCH_SIZE = config('ESCROW_RELEASE_BATCH_SIZE', default=100, cast=int)  # Payments claimed per release batch
+ESCROW_PAYOUT_WORKERS = config('ESCROW_PAYOUT_WORKERS', default=8, cast=int)  # Concurrent transfer calls
+ESCROW_PAYOUT_TIMEOUT_MINUTES = config('ESCROW_PAYOUT_TIMEOUT_MINUTES', default=10, cast=int)  # PROCESSING payouts older than this are reconciled
+ESCROW_PAYOUT_MAX_ATTEMPTS = config('ESCROW_PAYOUT_MAX_ATTEMPTS', default=5, cast=int)  # Transfer attempts before a FAILED payout is left to an operator
+ESCROW_PAYOUT_RETRY_MINUTES = config('ESCROW_PAYOUT_RETRY_MINUTES', default=15, cast=int)  # Wait before retrying a FAILED payout, doubled after each attempt
+NUMBER_BLOCK_SIZE = config('NUMBER_BLOCK_SIZE', default=20, cast=int)  # Invoice/ticket numbers reserved per worker at a time
+
+
+# Background Jobs (DB-backed queues, see courses/management/commands)
+TEST_GENERATION_MAX_ATTEMPTS = config('TEST_GENERATION_MAX_ATTEMPTS', default=3, cast=int)
+TEST_GENERATION_JOB_TIMEOUT_MINUTES = config('TEST_GENERATION_JOB_TIMEOUT_MINUTES', default=15, cast=int)
+MOCK_TEST_MAX_QUESTIONS = config('MOCK_TEST_MAX_QUESTIONS', default=50, cast=int)  # Upper bound for num_questions per generated test
+SCORECARD_RENDER_WORKERS = config('SCORECARD_RENDER_WORKERS', default=2, cast=int)  # Processes for PDF rendering
+SCORECARD_RENDER_TIMEOUT_MINUTES = config('SCORECARD_RENDER_TIMEOUT_MINUTES', default=10, cast=int)
+STATEMENT_RENDER_WORKERS = config('STATEMENT_RENDER_WORKERS', default=4, cast=int)  # Processes for month-end statements
+STATEMENT_MAX_DETAIL_LINES = config('STATEMENT_MAX_DETAIL_LINES', default=500, cast=int)  # Itemised lines per statement PDF
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = config('PAYMENT_WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)
+PAYMENT_WEBHOOK_TIMEOUT_MINUTES = config('PAYMENT_WEBHOOK_TIMEOUT_MINUTES', default=5, cast=int)
+
+
+# Worker startup budget (checked by `manage.py benchmark_startup`)
+STARTUP_MAX_SECONDS = config('STARTUP_MAX_SECONDS', default=2.0, cast=float)
+STARTUP_MAX_RSS_MB = config('STARTUP_MAX_RSS_MB', default=150, cast=int)
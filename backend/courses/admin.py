@@ -203,7 +203,8 @@ class AIFeedbackAdmin(admin.ModelAdmin):
 from django.contrib import admin
 from .models import (
     MockTest, MockTestQuestion, MockTestAttempt, MockTestAnswer,
-    SessionSummary, StudentProgressAnalytics, RecommendedCourse
+    MockTestGenerationJob, GradingCacheEntry, SessionSummary, StudentProgressAnalytics,
+    RecommendedCourse
 )
 
 # ... existing admin classes
@@ -217,11 +218,27 @@ class MockTestAdmin(admin.ModelAdmin):
 
 @admin.register(MockTestAttempt)
 class MockTestAttemptAdmin(admin.ModelAdmin):
-    list_display = ('student', 'mock_test', 'percentage', 'passed', 'status', 'started_at')
-    list_filter = ('status', 'passed', 'started_at')
+    list_display = ('student', 'mock_test', 'percentage', 'passed', 'status', 'scorecard_status', 'started_at')
+    list_filter = ('status', 'passed', 'scorecard_status', 'started_at')
     search_fields = ('student__email', 'mock_test__title')
 
 
+@admin.register(GradingCacheEntry)
+class GradingCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('question', 'normalized_answer', 'score', 'is_correct', 'hit_count', 'last_used_at')
+    list_filter = ('is_correct', 'created_at')
+    search_fields = ('normalized_answer', 'question__question_text')
+    readonly_fields = ('answer_hash', 'expected_answer_hash', 'hit_count', 'created_at', 'last_used_at')
+
+
+@admin.register(MockTestGenerationJob)
+class MockTestGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'session', 'student', 'status', 'stage', 'progress', 'attempts', 'created_at')
+    list_filter = ('status', 'difficulty', 'created_at')
+    search_fields = ('session__title', 'student__email', 'idempotency_key')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'completed_at')
+
+
 @admin.register(SessionSummary)
 class SessionSummaryAdmin(admin.ModelAdmin):
     list_display = ('session', 'generated_at', 'is_visible_to_student')
@@ -314,7 +331,7 @@ class PaymentAdmin(admin.ModelAdmin):
 class PayoutAdmin(admin.ModelAdmin):
     list_display = ('id', 'teacher', 'amount', 'status', 'created_at', 'completed_at')
     list_filter = ('status', 'created_at')
-    search_fields = ('teacher__email', 'razorpay_transfer_id')
+    search_fields = ('teacher__email', 'razorpay_transfer_id', 'idempotency_key')
 
 
 @admin.register(Refund)
@@ -349,3 +366,111 @@ class TeacherBankAccountAdmin(admin.ModelAdmin):
     @admin.action(description="Verify selected bank accounts")
     def verify_accounts(self, request, queryset):
         queryset.update(is_verified=True, verified_at=timezone.now())
+
+
+from .models import StatementRun, Statement
+
+
+@admin.register(StatementRun)
+class StatementRunAdmin(admin.ModelAdmin):
+    list_display = ('period', 'status', 'statements_count', 'failed_count', 'invoices_count', 'started_at', 'completed_at')
+    list_filter = ('status',)
+    readonly_fields = ('student_checkpoint', 'teacher_checkpoint', 'started_at', 'completed_at')
+
+
+@admin.register(Statement)
+class StatementAdmin(admin.ModelAdmin):
+    list_display = ('id', 'run', 'user', 'role', 'line_count', 'total_debits', 'total_credits', 'created_at')
+    list_filter = ('role', 'run')
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+
+
+from .models import NumberSequence
+
+
+@admin.register(NumberSequence)
+class NumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_value')
+
+
+from .models import PaymentWebhookEvent
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event', 'razorpay_order_id', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event')
+    search_fields = ('event_id', 'razorpay_order_id')
+    readonly_fields = ('received_at', 'started_at', 'processed_at')
+
+
+from .models import TeacherBalance, EarningsLedgerEntry
+
+
+@admin.register(TeacherBalance)
+class TeacherBalanceAdmin(admin.ModelAdmin):
+    list_display = ('teacher', 'captured', 'in_escrow', 'paid_out', 'pending_payouts', 'updated_at')
+    search_fields = ('teacher__email',)
+    raw_id_fields = ('teacher',)
+    # Changed only through the ledger (see manage.py reconcile_earnings)
+    readonly_fields = ('captured', 'in_escrow', 'paid_out', 'pending_payouts', 'updated_at')
+
+
+@admin.register(EarningsLedgerEntry)
+class EarningsLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'teacher', 'entry_type', 'captured', 'in_escrow', 'paid_out', 'pending_payouts', 'created_at')
+    list_filter = ('entry_type', 'created_at')
+    search_fields = ('teacher__email',)
+    raw_id_fields = ('teacher', 'payment', 'payout')
+
+
+from .models import RevenueRollup, RevenueRollupDirtyDay
+
+
+@admin.register(RevenueRollup)
+class RevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ('period', 'bucket', 'teacher', 'gross_revenue', 'platform_commission', 'refunds', 'payouts', 'payments_count')
+    list_filter = ('period', 'bucket')
+    search_fields = ('teacher__email',)
+    raw_id_fields = ('teacher',)
+
+
+@admin.register(RevenueRollupDirtyDay)
+class RevenueRollupDirtyDayAdmin(admin.ModelAdmin):
+    list_display = ('day', 'marked_at')
+
+
+from .models import WhiteboardOp, WhiteboardSnapshot
+
+
+@admin.register(WhiteboardOp)
+class WhiteboardOpAdmin(admin.ModelAdmin):
+    list_display = ('id', 'session', 'created_at')
+    raw_id_fields = ('session',)
+
+
+@admin.register(WhiteboardSnapshot)
+class WhiteboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('session', 'last_seq', 'updated_at')
+    raw_id_fields = ('session',)
+
+
+from .models import SessionPresence
+
+
+@admin.register(SessionPresence)
+class SessionPresenceAdmin(admin.ModelAdmin):
+    list_display = ('session', 'user', 'connected_at', 'last_seen')
+    raw_id_fields = ('session', 'user')
+
+
+from .models import RecordingEvent
+
+
+@admin.register(RecordingEvent)
+class RecordingEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event', 'room_id', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event')
+    search_fields = ('event_id', 'room_id')
+    readonly_fields = ('received_at', 'started_at', 'processed_at')
@@ -4,23 +4,42 @@ Handles LLM, STT, and TTS integration
 """
 
 import time
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Iterator, List, Dict, Optional
 from django.conf import settings
-import openai
-import google.generativeai as genai
-from elevenlabs import generate, set_api_key, Voice, VoiceSettings
 import io
 import base64
+from .http_client import OutboundHTTP
 
-# Initialize APIs
-if settings.OPENAI_API_KEY:
-    openai.api_key = settings.OPENAI_API_KEY
+OPENAI_HOST = 'api.openai.com'
+GEMINI_HOST = 'generativelanguage.googleapis.com'
 
-if settings.GEMINI_API_KEY:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
 
-if settings.ELEVENLABS_API_KEY:
-    set_api_key(settings.ELEVENLABS_API_KEY)
+# Provider SDKs are imported and keyed on first use rather than at import
+# time, so workers that never call an LLM don't load them at all
+
+@lru_cache(maxsize=None)
+def get_openai():
+    """OpenAI SDK module, configured with OPENAI_API_KEY"""
+    import openai
+    
+    if settings.OPENAI_API_KEY:
+        openai.api_key = settings.OPENAI_API_KEY
+    # The module-level client keeps its own keep-alive pool; give it the
+    # same timeout and retry budget as the shared session (courses/http_client.py)
+    openai.timeout = settings.HTTP_READ_TIMEOUT
+    openai.max_retries = settings.HTTP_RETRIES
+    return openai
+
+
+@lru_cache(maxsize=None)
+def get_genai():
+    """Google Generative AI SDK module, configured with GEMINI_API_KEY"""
+    import google.generativeai as genai
+    
+    if settings.GEMINI_API_KEY:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai
 
 
 class LLMService:
@@ -54,18 +73,68 @@ class LLMService:
         else:
             raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
     
+    @staticmethod
+    def stream_response(
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 500
+    ) -> Iterator[str]:
+        """
+        Generate AI response as text deltas while the provider produces it
+        
+        Args:
+            messages: List of {"role": "user/assistant/system", "content": "..."}
+            temperature: Creativity level (0.0-1.0)
+            max_tokens: Max response length
+        
+        Yields:
+            Text fragments, in order
+        """
+        # The guard stays open while chunks are read, so a stream that dies
+        # halfway counts against the host just like a failed request
+        if settings.LLM_PROVIDER == 'openai':
+            with OutboundHTTP.guard(OPENAI_HOST):
+                stream = get_openai().chat.completions.create(
+                    model="gpt-4-turbo-preview",
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        elif settings.LLM_PROVIDER == 'gemini':
+            genai, chat, user_msg = LLMService._gemini_chat(messages)
+            with OutboundHTTP.guard(GEMINI_HOST):
+                response = chat.send_message(
+                    user_msg,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_tokens,
+                    ),
+                    request_options={'timeout': settings.HTTP_READ_TIMEOUT},
+                    stream=True
+                )
+                for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+        else:
+            raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
+    
     @staticmethod
     def _openai_generate(messages, temperature, max_tokens, stream):
         """Generate with OpenAI GPT-4"""
         start = time.time()
         
-        response = openai.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=stream
-        )
+        with OutboundHTTP.guard(OPENAI_HOST):
+            response = get_openai().chat.completions.create(
+                model="gpt-4-turbo-preview",
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream
+            )
         
         if stream:
             return response  # Return stream object
@@ -81,9 +150,9 @@ class LLMService:
         }
     
     @staticmethod
-    def _gemini_generate(messages, temperature, max_tokens):
-        """Generate with Google Gemini"""
-        start = time.time()
+    def _gemini_chat(messages):
+        """Gemini chat session for `messages`; returns (genai, chat, last user message)"""
+        genai = get_genai()
         
         # Convert messages to Gemini format
         model = genai.GenerativeModel('gemini-pro')
@@ -114,13 +183,23 @@ class LLMService:
             user_msg = f"{system_prompt}\n\n{user_msg}"
         
         chat = model.start_chat(history=history[:-1] if history else [])
-        response = chat.send_message(
-            user_msg,
-            generation_config=genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
+        return genai, chat, user_msg
+    
+    @staticmethod
+    def _gemini_generate(messages, temperature, max_tokens):
+        """Generate with Google Gemini"""
+        start = time.time()
+        
+        genai, chat, user_msg = LLMService._gemini_chat(messages)
+        with OutboundHTTP.guard(GEMINI_HOST):
+            response = chat.send_message(
+                user_msg,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_tokens,
+                ),
+                request_options={'timeout': settings.HTTP_READ_TIMEOUT}
             )
-        )
         
         return {
             "content": response.text,
@@ -175,11 +254,12 @@ class SpeechService:
         start = time.time()
         
         # OpenAI Whisper API
-        transcript = openai.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="verbose_json"
-        )
+        with OutboundHTTP.guard(OPENAI_HOST):
+            transcript = get_openai().audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                response_format="verbose_json"
+            )
         
         return {
             "text": transcript.text,
@@ -193,6 +273,9 @@ class SpeechService:
         """
         Convert text to speech using ElevenLabs
         
+        Calls the REST endpoint on the shared outbound session; the SDK
+        opens a fresh connection for every request.
+        
         Args:
             text: Text to synthesize
             voice_id: ElevenLabs voice ID
@@ -203,21 +286,23 @@ class SpeechService:
         if not voice_id:
             voice_id = settings.ELEVENLABS_VOICE_ID
         
-        audio = generate(
-            text=text,
-            voice=Voice(
-                voice_id=voice_id,
-                settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75,
-                    style=0.0,
-                    use_speaker_boost=True
-                )
-            ),
-            model="eleven_monolingual_v1"
+        response = OutboundHTTP.session().post(
+            f"{settings.ELEVENLABS_API_URL.rstrip('/')}/v1/text-to-speech/{voice_id}",
+            headers={"xi-api-key": settings.ELEVENLABS_API_KEY, "Accept": "audio/mpeg"},
+            json={
+                "text": text,
+                "model_id": "eleven_monolingual_v1",
+                "voice_settings": {
+                    "stability": 0.5,
+                    "similarity_boost": 0.75,
+                    "style": 0.0,
+                    "use_speaker_boost": True
+                }
+            }
         )
+        response.raise_for_status()
         
-        return audio
+        return response.content
 
 
 class ConversationManager:
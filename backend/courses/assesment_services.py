@@ -3,9 +3,12 @@ AI-powered assessment generation and scoring
 """
 
 from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 from django.conf import settings
 import json
 from .ai_service import LLMService
+from .grading_cache import GradingCache
 
 
 class AssessmentGenerator:
@@ -114,7 +117,55 @@ Return ONLY valid JSON in this exact format:
             print(f"JSON parse error: {e}")
             print(f"Response: {response.get('content') if isinstance(response, dict) else response}")
             raise ValueError("Failed to generate valid test format")
-    
+
+    @staticmethod
+    def save_generated_test(session, student, test_data: Dict, difficulty: str, num_questions: int, content: str):
+        """
+        Persist an LLM-generated test and its questions
+
+        Questions are written with a single bulk_create instead of one
+        INSERT per question.
+
+        Returns:
+            MockTest instance
+        """
+        from django.db import transaction
+        from .models import MockTest, MockTestQuestion
+
+        subject = session.course.title if session.course else "General"
+        questions_data = test_data.get('questions', [])
+
+        with transaction.atomic():
+            mock_test = MockTest.objects.create(
+                session=session,
+                course=session.course,
+                student=student,
+                title=test_data.get('title', f"Test for {session.title}"),
+                description=test_data.get('description', ''),
+                subject=subject,
+                difficulty=difficulty,
+                total_questions=len(questions_data) or num_questions,
+                generated_from_content=content[:500],
+                ai_prompt="Generated from session content"
+            )
+
+            MockTestQuestion.objects.bulk_create([
+                MockTestQuestion(
+                    mock_test=mock_test,
+                    order=idx,
+                    question_type=q_data.get('question_type', 'MCQ'),
+                    question_text=q_data.get('question_text', ''),
+                    options=q_data.get('options', []),
+                    correct_answer=q_data.get('correct_answer', ''),
+                    explanation=q_data.get('explanation', ''),
+                    bloom_level=q_data.get('bloom_level', ''),
+                    points=q_data.get('points', 1.0)
+                )
+                for idx, q_data in enumerate(questions_data)
+            ])
+
+        return mock_test
+
     @staticmethod
     def evaluate_short_answer(
         question: str,
@@ -177,7 +228,284 @@ Return JSON:
             result = json.loads(content.strip())
             return result
         except Exception:
-            return {"score": 0.5, "is_correct": False, "feedback": "Unable to evaluate"}
+            return {"score": 0.5, "is_correct": False, "feedback": "Unable to evaluate", "evaluated": False}
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (~4 characters per token) used for batch packing"""
+        return len(text) // 4 + 1
+    
+    @staticmethod
+    def split_grading_batches(items: List[Dict], token_budget: int = None, max_items: int = None) -> List[List[int]]:
+        """
+        Pack short-answer items into batches that fit one grading prompt
+        
+        Args:
+            items: [{"question": str, "correct_answer": str, "student_answer": str}, ...]
+            token_budget: Max estimated prompt tokens per batch
+            max_items: Max answers per batch
+        
+        Returns:
+            List of batches, each a list of indices into items
+        """
+        if token_budget is None:
+            token_budget = settings.AI_GRADING_BATCH_TOKEN_BUDGET
+        if max_items is None:
+            max_items = settings.AI_GRADING_BATCH_MAX_ITEMS
+        
+        batches = []
+        current = []
+        current_tokens = 0
+        
+        for idx, item in enumerate(items):
+            item_tokens = AssessmentGenerator.estimate_tokens(
+                f"{item['question']}{item['correct_answer']}{item['student_answer']}"
+            ) + 20  # Per-item labels and separators
+            
+            if current and (current_tokens + item_tokens > token_budget or len(current) >= max_items):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            
+            current.append(idx)
+            current_tokens += item_tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    @staticmethod
+    def evaluate_short_answer_batch(items: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Grade several short answers with a single LLM call
+        
+        Args:
+            items: [{"question": str, "correct_answer": str, "student_answer": str}, ...]
+        
+        Returns:
+            One {"score", "is_correct", "feedback"} dict per item, in order.
+            Entries are None where the response could not be parsed so the
+            caller can fall back to evaluate_short_answer for just those.
+        """
+        if not items:
+            return []
+        
+        if len(items) == 1:
+            return [AssessmentGenerator.evaluate_short_answer(**items[0])]
+        
+        answers_block = "\n\n".join(
+            f"[{idx}]\n"
+            f"Question: {item['question']}\n"
+            f"Expected Answer: {item['correct_answer']}\n"
+            f"Student Answer: {item['student_answer']}"
+            for idx, item in enumerate(items, start=1)
+        )
+        
+        prompt = f"""Evaluate each of these {len(items)} student answers independently:
+
+{answers_block}
+
+For every answer provide:
+1. Score (0.0 to 1.0)
+2. Whether essentially correct (yes/no)
+3. Brief feedback
+
+Return a JSON array with exactly one object per answer, using its number as "id":
+[
+  {{"id": 1, "score": 0.85, "is_correct": true, "feedback": "Good answer, but could mention..."}}
+]
+"""
+        
+        messages = [
+            {"role": "system", "content": "You are an expert grader. Return only valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        results = [None] * len(items)
+        
+        try:
+            response = LLMService.generate_response(
+                messages=messages,
+                temperature=0.2,
+                max_tokens=min(120 * len(items), 4000)
+            )
+            content = response.get('content', '') if isinstance(response, dict) else str(response)
+            
+            if '```json' in content:
+                content = content.split('```json', 1)[1].split('```', 1)[0]
+            elif '```' in content:
+                content = content.split('```', 1)[1].split('```', 1)[0]
+            
+            parsed = json.loads(content.strip())
+        except Exception as e:
+            print(f"Batch grading failed, falling back per item: {e}")
+            return results
+        
+        if isinstance(parsed, dict):
+            parsed = parsed.get('results', [])
+        if not isinstance(parsed, list):
+            return results
+        
+        for entry in parsed:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                idx = int(entry.get('id')) - 1
+                score = float(entry.get('score'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < len(items) and results[idx] is None:
+                results[idx] = {
+                    "score": score,
+                    "is_correct": bool(entry.get('is_correct', False)),
+                    "feedback": entry.get('feedback', '')
+                }
+        
+        return results
+
+
+class AnswerGrader:
+    """Grade a full mock test submission"""
+    
+    OBJECTIVE_TYPES = ('MCQ', 'TRUE_FALSE')
+    
+    @staticmethod
+    def grade_objective(question, selected: str) -> Dict:
+        """Exact-match grading for MCQ and True/False, no network calls"""
+        is_correct = selected.strip().upper() == question.correct_answer.strip().upper()
+        return {
+            "is_correct": is_correct,
+            "score": 1.0 if is_correct else 0.0,
+            "feedback": None
+        }
+    
+    @staticmethod
+    def evaluate_short_answers(items: List[Dict]) -> List[Dict]:
+        """
+        Grade short answers with as few LLM calls as possible
+        
+        Answers are packed into token-budgeted batches that are graded
+        concurrently on a bounded thread pool. Any answer missing from a
+        batch response is re-graded on its own.
+        
+        Args:
+            items: [{"question": str, "correct_answer": str, "student_answer": str}, ...]
+        
+        Returns:
+            Evaluation dicts in the same order as items
+        """
+        if not items:
+            return []
+        
+        def evaluate(item):
+            try:
+                return AssessmentGenerator.evaluate_short_answer(**item)
+            except Exception:
+                return {"score": 0.5, "is_correct": False, "feedback": "Unable to evaluate", "evaluated": False}
+        
+        def evaluate_batch(indices):
+            try:
+                return AssessmentGenerator.evaluate_short_answer_batch([items[i] for i in indices])
+            except Exception:
+                return [None] * len(indices)
+        
+        results = [None] * len(items)
+        batches = AssessmentGenerator.split_grading_batches(items)
+        
+        with ThreadPoolExecutor(max_workers=min(settings.AI_GRADING_MAX_WORKERS, len(items))) as executor:
+            for indices, batch_results in zip(batches, executor.map(evaluate_batch, batches)):
+                for idx, result in zip(indices, batch_results):
+                    results[idx] = result
+            
+            missing = [idx for idx, result in enumerate(results) if result is None]
+            for idx, result in zip(missing, executor.map(evaluate, [items[i] for i in missing])):
+                results[idx] = result
+        
+        return results
+    
+    @staticmethod
+    def grade_submission(mock_test, answers_data: List[Dict]) -> List[Dict]:
+        """
+        Grade all answers for an attempt
+        
+        Questions are loaded in one query, objective questions are graded in
+        memory, short answers already graded for the same question come from
+        GradingCache and the rest fan out to the LLM in parallel batches.
+        
+        Args:
+            mock_test: MockTest instance
+            answers_data: [{"question_id": 1, "selected_answer": "A"}, ...]
+        
+        Returns:
+            [{"question": MockTestQuestion, "selected_answer": str,
+              "is_correct": bool, "points_earned": Decimal, "ai_feedback": str}, ...]
+        """
+        # Last answer wins if a question is submitted twice
+        selected_by_id = {}
+        for ans_data in answers_data:
+            try:
+                question_id = int(ans_data.get('question_id'))
+            except (TypeError, ValueError):
+                continue
+            selected_by_id[question_id] = str(ans_data.get('selected_answer') or '')
+        
+        questions = mock_test.questions.filter(id__in=selected_by_id.keys())
+        
+        results = []
+        short_answers = []
+        
+        for question in questions:
+            selected = selected_by_id[question.id]
+            
+            if question.question_type == 'SHORT_ANSWER':
+                short_answers.append((question, selected))
+                continue
+            
+            if question.question_type in AnswerGrader.OBJECTIVE_TYPES:
+                evaluation = AnswerGrader.grade_objective(question, selected)
+            else:
+                evaluation = {"is_correct": False, "score": 0.0, "feedback": None}
+            results.append(AnswerGrader._build_result(question, selected, evaluation))
+        
+        # Identical answers to the same question are served from the cache
+        evaluations = GradingCache.get_many(short_answers)
+        misses = [idx for idx, evaluation in enumerate(evaluations) if evaluation is None]
+        
+        fresh = AnswerGrader.evaluate_short_answers([
+            {
+                "question": short_answers[idx][0].question_text,
+                "correct_answer": short_answers[idx][0].correct_answer,
+                "student_answer": short_answers[idx][1]
+            }
+            for idx in misses
+        ])
+        for idx, evaluation in zip(misses, fresh):
+            evaluations[idx] = evaluation
+        GradingCache.set_many([short_answers[idx] for idx in misses], fresh)
+        
+        for (question, selected), evaluation in zip(short_answers, evaluations):
+            results.append(AnswerGrader._build_result(question, selected, evaluation))
+        
+        results.sort(key=lambda r: r['question'].order)
+        return results
+    
+    @staticmethod
+    def _build_result(question, selected: str, evaluation: Dict) -> Dict:
+        try:
+            score = min(max(float(evaluation.get('score', 0.0)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            score = 0.0
+        
+        points_earned = (Decimal(question.points) * Decimal(str(score))).quantize(Decimal('0.01'))
+        
+        return {
+            "question": question,
+            "selected_answer": selected,
+            "is_correct": bool(evaluation.get('is_correct', False)),
+            "points_earned": points_earned,
+            "ai_feedback": evaluation.get('feedback')
+        }
 
 
 class SessionSummarizer:
@@ -265,3 +593,133 @@ Return JSON:
             return transcript
         except:
             return ""
+
+
+class NoSessionContent(ValueError):
+    """The session has no transcript or notes; retrying the job can't help"""
+
+
+class TestGenerationJobProcessor:
+    """Run queued MockTestGenerationJob rows off the request thread"""
+    
+    # Stage -> progress percentage reported to polling clients
+    STAGES = {
+        'extracting': 10,
+        'generating': 25,
+        'saving': 85,
+        'done': 100,
+    }
+    
+    @staticmethod
+    def claim_batch(batch_size: int = 5) -> list:
+        """Claim queued jobs for this worker"""
+        from django.utils import timezone
+        from .models import MockTestGenerationJob
+        from .job_queue import claim_jobs, requeue_stale_jobs
+        
+        # A run bumps attempts when it starts, so a job whose worker died
+        # has already been charged for that run; give up once the budget is spent
+        stale = MockTestGenerationJob.objects.filter(status='RUNNING')
+        now = timezone.now()
+        requeue_stale_jobs(
+            stale.filter(attempts__gte=settings.TEST_GENERATION_MAX_ATTEMPTS),
+            timeout_minutes=settings.TEST_GENERATION_JOB_TIMEOUT_MINUTES,
+            status='FAILED',
+            error_message='Worker stopped responding',
+            completed_at=now,
+            updated_at=now
+        )
+        requeue_stale_jobs(
+            stale,
+            timeout_minutes=settings.TEST_GENERATION_JOB_TIMEOUT_MINUTES,
+            status='QUEUED',
+            stage=None,
+            progress=0,
+            updated_at=now
+        )
+        
+        return claim_jobs(
+            MockTestGenerationJob.objects.filter(status='QUEUED').order_by('created_at'),
+            batch_size=batch_size,
+            status='RUNNING',
+            started_at=timezone.now()
+        )
+    
+    @staticmethod
+    def process_batch(batch_size: int = 5) -> int:
+        """Claim and run one batch of jobs; returns number of jobs handled"""
+        jobs = TestGenerationJobProcessor.claim_batch(batch_size)
+        for job in jobs:
+            TestGenerationJobProcessor.process_job(job)
+        return len(jobs)
+    
+    @staticmethod
+    def process_job(job) -> bool:
+        """
+        Generate and save the mock test for one job
+        
+        Returns:
+            Boolean indicating success
+        """
+        from django.utils import timezone
+        from .models import MockTestGenerationJob
+        
+        def report(stage, **extra):
+            job.stage = stage
+            MockTestGenerationJob.objects.filter(id=job.id).update(
+                stage=stage,
+                progress=TestGenerationJobProcessor.STAGES[stage],
+                updated_at=timezone.now(),
+                **extra
+            )
+        
+        session = job.session
+        
+        try:
+            report('extracting', attempts=job.attempts + 1)
+            content = SessionSummarizer.extract_transcript_from_session(session.id)
+            if not content:
+                raise NoSessionContent("No content available to generate test from")
+            
+            report('generating')
+            test_data = AssessmentGenerator.generate_test_from_content(
+                content=content,
+                subject=session.course.title if session.course else "General",
+                difficulty=job.difficulty,
+                num_questions=job.num_questions
+            )
+            
+            report('saving')
+            mock_test = AssessmentGenerator.save_generated_test(
+                session=session,
+                student=job.student,
+                test_data=test_data,
+                difficulty=job.difficulty,
+                num_questions=job.num_questions,
+                content=content
+            )
+            
+            report(
+                'done',
+                status='COMPLETED',
+                mock_test=mock_test,
+                error_message=None,
+                completed_at=timezone.now()
+            )
+            return True
+            
+        except Exception as e:
+            # Retry transient LLM failures until the attempt budget is spent
+            retry = (
+                not isinstance(e, NoSessionContent)
+                and job.attempts + 1 < settings.TEST_GENERATION_MAX_ATTEMPTS
+            )
+            MockTestGenerationJob.objects.filter(id=job.id).update(
+                status='QUEUED' if retry else 'FAILED',
+                stage=None if retry else job.stage,
+                progress=0,
+                error_message=str(e),
+                completed_at=None if retry else timezone.now(),
+                updated_at=timezone.now()
+            )
+            return False
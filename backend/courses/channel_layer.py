@@ -0,0 +1,54 @@
+"""
+In-process channel layer for single-node deployments and tests
+
+Channels' InMemoryChannelLayer sweeps every channel and group membership
+for expired entries on each receive and group_send, and deep-copies a
+group message once per member through a task per member. With a few
+thousand sockets on one node that makes every broadcast O(all sockets).
+
+LocalChannelLayer sweeps at most once per `cleanup_interval` seconds and
+fans a group message out with a single copy shared by all members, put
+straight onto their queues. Consumers must treat received events as
+read-only (ours do). For several nodes use the Redis layer instead (see
+CHANNEL_LAYER in settings).
+"""
+
+import asyncio
+import time
+from copy import deepcopy
+from channels.layers import InMemoryChannelLayer
+
+
+class LocalChannelLayer(InMemoryChannelLayer):
+
+    def __init__(self, cleanup_interval: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.cleanup_interval = cleanup_interval
+        self._cleaned_at = 0.0
+
+    def _clean_expired(self):
+        now = time.monotonic()
+        if now - self._cleaned_at < self.cleanup_interval:
+            return
+        self._cleaned_at = now
+        super()._clean_expired()
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        self._clean_expired()
+
+        members = self.groups.get(group)
+        if not members:
+            return
+
+        entry = (time.time() + self.expiry, deepcopy(message))
+        for channel in list(members):
+            queue = self.channels.get(channel)
+            if queue is None:
+                queue = self.channels[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+            try:
+                queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                # Same as the stock layer: a full member misses this message
+                pass
@@ -1,39 +1,440 @@
+from channels.db import database_sync_to_async
+from channels.consumer import get_handler_name
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from urllib.parse import parse_qs
+import asyncio
 import json
+import threading
+import time
+
+from .chat import ChatWriteBuffer, message_payload
+from .ai_service import SpeechService
+from .presence import PresenceRegistry
+from .voice import AUDIO_FORMATS, VoiceTutor
+from .whiteboard import WhiteboardLog, pack_frame, unpack_frame
+from .ws_auth import TokenBucket, session_participants
+
+
+class SessionRoomMixin:
+    """Connect-time access check and inbound rate limit for session rooms"""
+
+    # (rate, burst) settings names, overridden per consumer
+    rate_limit_settings = ('WS_CHAT_RATE_LIMIT', 'WS_CHAT_RATE_BURST')
+
+    async def dispatch(self, message):
+        # Channels closes stale DB connections through a thread hop before every
+        # handler, which costs more than relaying a broadcast. These consumers only
+        # reach the database via database_sync_to_async, which does that itself.
+        handler = getattr(self, get_handler_name(message), None)
+        if handler is None:
+            raise ValueError("No handler for message type %s" % message['type'])
+        await handler(message)
+
+    async def authorize(self) -> bool:
+        """
+        Reject the handshake unless the user is the session's student or teacher
+
+        Checked once per connection; the result is kept on the consumer.
+        """
+        self.user = self.scope.get('user')
+        participants = None
+        if self.user and self.user.is_authenticated:
+            participants = await session_participants(self.session_id)
+        if not participants or self.user.id not in participants:
+            await self.close()
+            return False
+
+        if self.rate_limit_settings:
+            rate, burst = (getattr(settings, name) for name in self.rate_limit_settings)
+            self.bucket = TokenBucket(rate, burst)
+        return True
+
+
+class WhiteboardConsumer(SessionRoomMixin, AsyncWebsocketConsumer):
+    rate_limit_settings = ('WS_WHITEBOARD_RATE_LIMIT', 'WS_WHITEBOARD_RATE_BURST')
 
-class WhiteboardConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.session_id = self.scope['url_route']['kwargs']['session_id']
         self.room_group_name = f'whiteboard_{self.session_id}'
+        self.appended = 0
+        # Coalescing buffers, flushed as one group_send every WHITEBOARD_FRAME_INTERVAL_MS
+        self.pending_ops = []
+        self.pending_bytes = 0
+        self.pending_elements = {}
+        self.flush_task = None
+        if not await self.authorize():
+            return
+        # Join the group before reading the log so no op falls between the two;
+        # broadcasts already covered by the catch-up are skipped in board_message
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
+        since = parse_qs(self.scope.get('query_string', b'').decode()).get('since', [''])[0]
+        sync, ops = await database_sync_to_async(WhiteboardLog.catch_up)(
+            self.session_id, int(since) if since.isdigit() else None
+        )
+        if sync:
+            await self.send(text_data=json.dumps(sync))
+        for op in ops:
+            await self.send(text_data=json.dumps(op))
+        self.caught_up_seq = ops[-1]['seq'] if ops else (sync['seq'] if sync else int(since))
+
     async def disconnect(self, close_code):
+        if self.flush_task:
+            self.flush_task.cancel()
+        await self.flush()
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if self.appended:
+            await database_sync_to_async(WhiteboardLog.compact)(self.session_id)
 
     async def receive(self, text_data=None, bytes_data=None):
-        # Expect messages: {"type": "draw_ops", "ops": [...]} or "clear"
+        allowed = self.bucket.consume()
+
+        # Binary frames carry live stroke ops (see courses/whiteboard.py)
+        if bytes_data is not None:
+            if not allowed:
+                return
+            try:
+                ops = unpack_frame(bytes_data)
+            except ValueError:
+                return
+            self.pending_ops.extend(ops)
+            self.pending_bytes += len(bytes_data)
+            await self.schedule_flush()
+            return
+
+        # Expect messages: {"type": "draw_ops", "elements": [...]} or {"type": "clear"}
+        try:
+            message = json.loads(text_data)
+        except (TypeError, ValueError):
+            message = None
+        message_type = message.get('type') if isinstance(message, dict) else None
+
+        if message_type == 'draw_ops':
+            # Only the latest version of each element within a window is sent and logged,
+            # so frames over the rate limit are still folded in rather than dropped
+            WhiteboardLog.fold(self.pending_elements, message)
+            await self.schedule_flush()
+        elif not allowed:
+            return
+        elif message_type == 'clear':
+            # Clearing supersedes whatever was still waiting to be sent
+            self.pending_elements = {}
+            await self.flush()
+            await self.broadcast_durable(message)
+        else:
+            await self.channel_layer.group_send(self.room_group_name, {
+                'type': 'board.message',
+                'message': text_data
+            })
+
+    async def schedule_flush(self):
+        if self.pending_bytes >= settings.WHITEBOARD_FRAME_MAX_BYTES:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.WHITEBOARD_FRAME_INTERVAL_MS / 1000)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Send everything buffered since the last flush"""
+        ops, self.pending_ops, self.pending_bytes = self.pending_ops, [], 0
+        elements, self.pending_elements = self.pending_elements, {}
+
+        if elements:
+            await self.broadcast_durable({'type': 'draw_ops', 'elements': list(elements.values())})
+        if ops:
+            await self.channel_layer.group_send(self.room_group_name, {
+                'type': 'board.frame',
+                'frame': pack_frame(ops),
+                'sender': self.channel_name,
+            })
+
+    async def broadcast_durable(self, message):
+        seq = await database_sync_to_async(WhiteboardLog.append)(self.session_id, message)
+        self.appended += 1
+        if self.appended % settings.WHITEBOARD_SNAPSHOT_INTERVAL == 0:
+            await database_sync_to_async(WhiteboardLog.compact)(self.session_id)
+
         await self.channel_layer.group_send(self.room_group_name, {
             'type': 'board.message',
-            'message': text_data
+            'message': json.dumps({**message, 'seq': seq}),
+            'seq': seq,
         })
 
     async def board_message(self, event):
+        # Ops at or below the catch-up point were already sent from the log
+        if event.get('seq') is not None and event['seq'] <= self.caught_up_seq:
+            return
         await self.send(text_data=event['message'])
 
+    async def board_frame(self, event):
+        # The sender already drew its own strokes
+        if event['sender'] != self.channel_name:
+            await self.send(bytes_data=event['frame'])
+
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(SessionRoomMixin, AsyncWebsocketConsumer):
     async def connect(self):
         self.session_id = self.scope['url_route']['kwargs']['session_id']
         self.group = f'chat_{self.session_id}'
+        if not await self.authorize():
+            return
         await self.channel_layer.group_add(self.group, self.channel_name)
         await self.accept()
 
+        for message in await ChatWriteBuffer.recent(self.session_id, settings.CHAT_HISTORY_BACKFILL):
+            await self.send(text_data=json.dumps(message))
+
     async def disconnect(self, code):
         await self.channel_layer.group_discard(self.group, self.channel_name)
 
     async def receive(self, text_data=None, bytes_data=None):
-        await self.channel_layer.group_send(self.group, {'type': 'chat.message', 'message': text_data})
+        from .models import SessionMessage
+
+        if not self.bucket.consume():
+            return
+
+        # Expect messages: {"text": "..."}; the server stamps sender and time
+        try:
+            text = json.loads(text_data).get('text')
+        except (AttributeError, TypeError, ValueError):
+            text = text_data
+        if not isinstance(text, str) or not text.strip():
+            return
+
+        message = SessionMessage(session_id=self.session_id, sender=self.user, text=text)
+        await ChatWriteBuffer.add(message)
+        await self.channel_layer.group_send(self.group, {
+            'type': 'chat.message',
+            'message': json.dumps(message_payload(message)),
+        })
 
     async def chat_message(self, event):
         await self.send(text_data=event['message'])
+
+
+class PresenceConsumer(SessionRoomMixin, AsyncWebsocketConsumer):
+    """
+    Presence roster plus a lossy, latest-value-wins channel for cursors and typing
+
+    Kept off the chat and whiteboard sockets so high-frequency ephemeral
+    updates never queue behind (or delay) durable, ordered messages.
+    Clients send {"type": "heartbeat"} every PRESENCE_HEARTBEAT_SECONDS;
+    sockets silent for PRESENCE_TIMEOUT_SECONDS are closed.
+    """
+
+    # Not rate-limited: frames only overwrite the pending value, and broadcasts
+    # are capped at one per PRESENCE_UPDATE_INTERVAL_MS anyway
+    rate_limit_settings = None
+    EPHEMERAL_TYPES = ('cursor', 'typing')
+    MAX_MESSAGE_BYTES = 1024
+
+    async def connect(self):
+        self.session_id = self.scope['url_route']['kwargs']['session_id']
+        self.group = f'presence_{self.session_id}'
+        self.joined = False
+        # Latest value per ephemeral type since the last flush
+        self.pending = {}
+        self.flush_task = None
+        self.heartbeat_task = None
+        if not await self.authorize():
+            return
+
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        roster = await database_sync_to_async(PresenceRegistry.join)(self.session_id, self.user.id, self.channel_name)
+        self.joined = True
+        self.last_seen = time.monotonic()
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+        await self.channel_layer.group_send(self.group, {'type': 'presence.roster', 'participants': roster})
+
+    async def disconnect(self, code):
+        for task in (self.flush_task, self.heartbeat_task):
+            if task:
+                task.cancel()
+        await self.leave()
+
+    async def leave(self):
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+        if self.joined:
+            self.joined = False
+            roster = await database_sync_to_async(PresenceRegistry.leave)(self.session_id, self.channel_name)
+            await self.channel_layer.group_send(self.group, {'type': 'presence.roster', 'participants': roster})
+
+    async def heartbeat(self):
+        """Refresh this socket's row once per interval, or drop it if the client went quiet"""
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_SECONDS)
+            if time.monotonic() - self.last_seen > settings.PRESENCE_TIMEOUT_SECONDS:
+                await self.leave()
+                await self.close()
+                return
+            await database_sync_to_async(PresenceRegistry.touch)(self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # Expect {"type": "heartbeat"}, {"type": "cursor", "x": .., "y": ..} or {"type": "typing", "active": true}
+        self.last_seen = time.monotonic()
+        if not text_data or len(text_data) > self.MAX_MESSAGE_BYTES:
+            return
+        try:
+            message = json.loads(text_data)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get('type') not in self.EPHEMERAL_TYPES:
+            return
+
+        # Intermediate positions are dropped; only the newest reaches the room
+        self.pending[message.pop('type')] = message
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.PRESENCE_UPDATE_INTERVAL_MS / 1000)
+        self.flush_task = None
+        updates, self.pending = self.pending, {}
+        await self.channel_layer.group_send(self.group, {
+            'type': 'presence.update',
+            'sender': self.channel_name,
+            'user_id': self.user.id,
+            'updates': updates,
+        })
+
+    async def presence_roster(self, event):
+        await self.send(text_data=json.dumps({'type': 'roster', 'participants': event['participants']}))
+
+    async def presence_update(self, event):
+        if event['sender'] != self.channel_name:
+            await self.send(text_data=json.dumps({'type': 'update', 'user_id': event['user_id'], **event['updates']}))
+
+
+class VoiceTutorConsumer(AsyncWebsocketConsumer):
+    """
+    Pipelined voice turns in an AI tutoring conversation (see courses/voice.py)
+
+    The client sends each utterance as one binary frame (webm unless
+    {"format": "..."} was sent before). The reply arrives as
+    {"type": "transcript"}, then for every sentence {"type": "sentence"}
+    followed by its MP3 as a binary frame, then {"type": "done"}.
+    """
+
+    async def connect(self):
+        self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        self.audio_format = 'webm'
+        self.turn = None
+        self.turn_stop = threading.Event()
+        user = self.scope.get('user')
+        if not (user and user.is_authenticated and await database_sync_to_async(VoiceTutor.owns_conversation)(
+            user.id, self.conversation_id
+        )):
+            await self.close()
+            return
+        await self.accept()
+
+    async def disconnect(self, code):
+        # Also ends the LLM stream still being read in its thread
+        self.turn_stop.set()
+        if self.turn:
+            self.turn.cancel()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if bytes_data is None:
+            try:
+                audio_format = json.loads(text_data).get('format')
+            except (AttributeError, TypeError, ValueError):
+                return
+            if audio_format in AUDIO_FORMATS:
+                self.audio_format = audio_format
+            return
+
+        if self.turn and not self.turn.done():
+            await self.send(text_data=json.dumps({'type': 'error', 'error': 'Still answering the previous question'}))
+            return
+        if len(bytes_data) > settings.VOICE_MAX_AUDIO_BYTES:
+            await self.send(text_data=json.dumps({'type': 'error', 'error': 'Recording too long'}))
+            return
+        self.turn = asyncio.create_task(self.run_turn(bytes_data, self.audio_format))
+
+    async def run_turn(self, audio, audio_format):
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        self.turn_stop = stop = threading.Event()
+        # Provider calls run in the default executor, not the single thread
+        # database_sync_to_async uses, so a slow API never holds up the ORM
+        try:
+            transcript = await loop.run_in_executor(
+                None, SpeechService.transcribe_audio, VoiceTutor.audio_file(audio, audio_format)
+            )
+            context = await database_sync_to_async(VoiceTutor.context_for)(self.conversation_id, transcript['text'])
+            await self.send(text_data=json.dumps({'type': 'transcript', 'text': transcript['text']}))
+
+            sentences = asyncio.Queue()
+            synthesized = asyncio.Queue()
+            tts_slots = asyncio.Semaphore(settings.VOICE_TTS_CONCURRENCY)
+
+            def read_reply():
+                try:
+                    for sentence in VoiceTutor.reply_sentences(context):
+                        if stop.is_set():
+                            return
+                        loop.call_soon_threadsafe(sentences.put_nowait, sentence)
+                finally:
+                    loop.call_soon_threadsafe(sentences.put_nowait, None)
+
+            async def synthesize(sentence):
+                async with tts_slots:
+                    return await loop.run_in_executor(None, SpeechService.synthesize_speech, sentence)
+
+            async def send_in_order():
+                # Sentences are synthesized concurrently but spoken in order
+                spoken, audio_chunks, first_audio_ms = [], [], None
+                while (item := await synthesized.get()) is not None:
+                    sentence, task = item
+                    chunk = await task
+                    await self.send(text_data=json.dumps({'type': 'sentence', 'index': len(spoken), 'text': sentence}))
+                    await self.send(bytes_data=chunk)
+                    if first_audio_ms is None:
+                        first_audio_ms = int((time.monotonic() - started) * 1000)
+                    spoken.append(sentence)
+                    audio_chunks.append(chunk)
+                return spoken, audio_chunks, first_audio_ms
+
+            reader = loop.run_in_executor(None, read_reply)
+            sender = asyncio.create_task(send_in_order())
+            tasks = []
+            try:
+                while (sentence := await sentences.get()) is not None and not sender.done():
+                    tasks.append(asyncio.create_task(synthesize(sentence)))
+                    synthesized.put_nowait((sentence, tasks[-1]))
+                synthesized.put_nowait(None)
+                spoken, audio_chunks, first_audio_ms = await sender
+                await reader  # Re-raises a failed LLM stream
+            finally:
+                # The reader thread exits at its next sentence; cancelling its
+                # future means an LLM error after a TTS failure isn't left unretrieved
+                stop.set()
+                for task in tasks + [sender, reader]:
+                    task.cancel()
+
+            response_text = ' '.join(spoken)
+            total_ms = int((time.monotonic() - started) * 1000)
+            user_message_id, assistant_message_id = await database_sync_to_async(VoiceTutor.save_turn)(
+                self.conversation_id, audio, audio_format, transcript,
+                response_text, b''.join(audio_chunks), total_ms
+            )
+            await self.send(text_data=json.dumps({
+                'type': 'done',
+                'response_text': response_text,
+                'user_message_id': user_message_id,
+                'assistant_message_id': assistant_message_id,
+                'first_audio_ms': first_audio_ms,
+                'total_ms': total_ms,
+            }))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.send(text_data=json.dumps({'type': 'error', 'error': f"Voice processing failed: {str(e)}"}))
@@ -0,0 +1,197 @@
+"""
+Streaming finance exports (payments, payouts, refunds, invoices)
+
+Rows are read with values_list().iterator() and encoded as they arrive,
+so memory stays flat no matter how many rows match. Both formats are
+produced as byte generators, usable as a StreamingHttpResponse body or
+written straight to a file by the export_finance command.
+"""
+
+import csv
+import importlib.util
+from datetime import date, datetime, time
+from typing import Iterable, Iterator, List, Optional, Tuple
+from django.db import models
+from django.utils import timezone
+
+# dataset -> (model name, date filter field, status field or None, columns)
+DATASETS = {
+    'payments': ('Payment', 'created_at', 'status', [
+        'id', 'created_at', 'captured_at', 'status', 'payment_type',
+        'student_id', 'student__email', 'session_id', 'course_id',
+        'amount', 'platform_fee', 'teacher_amount', 'currency',
+        'razorpay_order_id', 'razorpay_payment_id', 'payment_method',
+        'is_held_in_escrow', 'released_from_escrow',
+    ]),
+    'payouts': ('Payout', 'created_at', 'status', [
+        'id', 'created_at', 'processed_at', 'completed_at', 'status',
+        'teacher_id', 'teacher__email', 'payment_id', 'amount', 'currency',
+        'razorpay_transfer_id', 'failure_reason',
+    ]),
+    'refunds': ('Refund', 'requested_at', 'status', [
+        'id', 'requested_at', 'completed_at', 'status', 'reason',
+        'student_id', 'student__email', 'payment_id', 'refund_amount',
+        'razorpay_refund_id',
+    ]),
+    'invoices': ('Invoice', 'invoice_date', None, [
+        'id', 'invoice_date', 'invoice_number', 'payment_id',
+        'student_name', 'student_email', 'subtotal', 'tax_amount', 'total_amount',
+    ]),
+}
+
+FORMATS = ('csv', 'parquet')
+
+
+class _Echo:
+    """File-like object whose write() returns the data (for csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """Write-only file that buffers bytes until drained (for pyarrow)"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class FinanceExporter:
+    """Build filtered row streams and encode them"""
+
+    @staticmethod
+    def get_model(dataset: str):
+        from django.apps import apps
+        return apps.get_model('courses', DATASETS[dataset][0])
+
+    @staticmethod
+    def rows(dataset: str, since: Optional[date] = None, until: Optional[date] = None,
+             status: Optional[str] = None, chunk_size: int = 2000) -> Tuple[List[str], Iterator[tuple]]:
+        """
+        Column names and a row iterator for one dataset
+
+        Args:
+            dataset: Key of DATASETS
+            since: Inclusive start date
+            until: Inclusive end date
+            status: Status filter (ignored for datasets without status)
+            chunk_size: Rows fetched per database round trip
+
+        Returns:
+            (columns, iterator of value tuples)
+        """
+        model_name, date_field, status_field, columns = DATASETS[dataset]
+        queryset = FinanceExporter.get_model(dataset).objects.all()
+
+        is_datetime = isinstance(queryset.model._meta.get_field(date_field), models.DateTimeField)
+        if since:
+            value = timezone.make_aware(datetime.combine(since, time.min)) if is_datetime else since
+            queryset = queryset.filter(**{f'{date_field}__gte': value})
+        if until:
+            value = timezone.make_aware(datetime.combine(until, time.max)) if is_datetime else until
+            queryset = queryset.filter(**{f'{date_field}__lte': value})
+        if status and status_field:
+            queryset = queryset.filter(**{status_field: status})
+
+        # Primary key order keeps the scan index-friendly and the output stable
+        rows = queryset.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+        return columns, rows
+
+    @staticmethod
+    def iter_csv(columns: List[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+        """Encode rows as CSV, one line per yield"""
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns).encode('utf-8')
+        for row in rows:
+            yield writer.writerow(row).encode('utf-8')
+
+    @staticmethod
+    def _arrow_type(model, lookup: str):
+        import pyarrow as pa
+
+        field = model._meta.get_field(lookup.split('__')[0])
+        for part in lookup.split('__')[1:]:
+            field = field.related_model._meta.get_field(part)
+        if field.is_relation:  # '<fk>_id' resolves to the foreign key
+            return pa.int64()
+        if isinstance(field, models.DecimalField):
+            return pa.decimal128(field.max_digits, field.decimal_places)
+        if isinstance(field, models.DateTimeField):
+            return pa.timestamp('us', tz='UTC')
+        if isinstance(field, models.DateField):
+            return pa.date32()
+        if isinstance(field, models.BooleanField):
+            return pa.bool_()
+        if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+            return pa.int64()
+        return pa.string()
+
+    @staticmethod
+    def iter_parquet(dataset: str, columns: List[str], rows: Iterable[tuple], row_group_size: int = 10000) -> Iterator[bytes]:
+        """
+        Encode rows as Parquet, one row group at a time
+
+        Requires pyarrow (optional dependency, only imported here).
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        model = FinanceExporter.get_model(dataset)
+        schema = pa.schema([(column, FinanceExporter._arrow_type(model, column)) for column in columns])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema=schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema=schema))
+        writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def stream(dataset: str, export_format: str = 'csv', **filters) -> Iterator[bytes]:
+        """
+        Filtered dataset encoded in export_format, as a byte generator
+
+        Raises ValueError for an unknown dataset/format and RuntimeError when
+        Parquet is requested without pyarrow, before any bytes are produced.
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset '{dataset}' (choose from {', '.join(DATASETS)})")
+        if export_format not in FORMATS:
+            raise ValueError(f"Unknown format '{export_format}' (choose from {', '.join(FORMATS)})")
+        if export_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        columns, rows = FinanceExporter.rows(dataset, **filters)
+        if export_format == 'parquet':
+            return FinanceExporter.iter_parquet(dataset, columns, rows)
+        return FinanceExporter.iter_csv(columns, rows)
@@ -0,0 +1,139 @@
+"""
+Persistent cache of LLM short-answer grades
+
+Entries are keyed by question and a hash of the normalized student answer,
+and remember the expected answer they were graded against so a changed
+correct_answer never serves a stale grade.
+"""
+
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from django.db.models import F
+from django.utils import timezone
+
+
+class GradingCache:
+    """Lookup and store short-answer grades"""
+    
+    @staticmethod
+    def normalize_answer(text: str) -> str:
+        """
+        Collapse trivial differences between answers
+        
+        Case, repeated whitespace and surrounding punctuation are ignored;
+        inner punctuation is kept so "3.14" and "314" stay distinct.
+        """
+        text = unicodedata.normalize('NFKC', text or '').casefold()
+        text = re.sub(r'\s+', ' ', text)
+        return text.strip(' .,;:!?"\'`')
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def key_for(question, student_answer: str) -> Tuple[int, str]:
+        normalized = GradingCache.normalize_answer(student_answer)
+        return question.id, GradingCache.hash_text(normalized)
+    
+    @staticmethod
+    def get_many(pairs: List[Tuple]) -> List[Optional[Dict]]:
+        """
+        Fetch cached grades for many answers in one query
+        
+        Args:
+            pairs: [(MockTestQuestion, student_answer), ...]
+        
+        Returns:
+            Evaluation dict or None per pair, in order
+        """
+        from .models import GradingCacheEntry
+        
+        if not pairs:
+            return []
+        
+        keys = [GradingCache.key_for(question, answer) for question, answer in pairs]
+        expected = {
+            question.id: GradingCache.hash_text(question.correct_answer)
+            for question, _ in pairs
+        }
+        
+        entries = GradingCacheEntry.objects.filter(
+            question_id__in={qid for qid, _ in keys},
+            answer_hash__in={answer_hash for _, answer_hash in keys}
+        )
+        by_key = {
+            (entry.question_id, entry.answer_hash): entry
+            for entry in entries
+            if entry.expected_answer_hash == expected.get(entry.question_id)
+        }
+        
+        results = []
+        hit_ids = []
+        for key in keys:
+            entry = by_key.get(key)
+            if entry is None:
+                results.append(None)
+                continue
+            hit_ids.append(entry.id)
+            results.append({
+                "score": float(entry.score),
+                "is_correct": entry.is_correct,
+                "feedback": entry.feedback,
+                "cached": True
+            })
+        
+        if hit_ids:
+            GradingCacheEntry.objects.filter(id__in=hit_ids).update(
+                hit_count=F('hit_count') + 1,
+                last_used_at=timezone.now()
+            )
+        
+        return results
+    
+    @staticmethod
+    def set_many(pairs: List[Tuple], evaluations: List[Dict]):
+        """
+        Store fresh LLM grades; fallback results are never cached
+        
+        Args:
+            pairs: [(MockTestQuestion, student_answer), ...]
+            evaluations: Evaluation dicts aligned with pairs
+        """
+        from .models import GradingCacheEntry
+        
+        entries = {}
+        for (question, answer), evaluation in zip(pairs, evaluations):
+            if not evaluation or evaluation.get('evaluated') is False:
+                continue
+            try:
+                score = min(max(float(evaluation.get('score', 0.0)), 0.0), 1.0)
+            except (TypeError, ValueError):
+                continue
+            
+            normalized = GradingCache.normalize_answer(answer)
+            key = (question.id, GradingCache.hash_text(normalized))
+            entries[key] = GradingCacheEntry(
+                question=question,
+                answer_hash=key[1],
+                expected_answer_hash=GradingCache.hash_text(question.correct_answer),
+                normalized_answer=normalized,
+                score=Decimal(str(score)).quantize(Decimal('0.001')),
+                is_correct=bool(evaluation.get('is_correct', False)),
+                feedback=evaluation.get('feedback')
+            )
+        
+        if entries:
+            # Drop rows graded against an older expected answer (e.g. after a
+            # queryset.update() that bypassed MockTestQuestion.save)
+            questions = {entry.question_id: entry.expected_answer_hash for entry in entries.values()}
+            for question_id, expected_hash in questions.items():
+                GradingCacheEntry.objects.filter(
+                    question_id=question_id,
+                    answer_hash__in=[h for qid, h in entries if qid == question_id]
+                ).exclude(expected_answer_hash=expected_hash).delete()
+            
+            GradingCacheEntry.objects.bulk_create(entries.values(), ignore_conflicts=True)
@@ -0,0 +1,233 @@
+"""
+Shared outbound HTTP client for provider APIs (VideoSDK, Razorpay,
+ElevenLabs, OpenAI, Gemini)
+
+One requests.Session per process keeps a keep-alive pool per host, so
+repeat calls reuse warm TLS connections instead of handshaking each time.
+Every call gets a default (connect, read) timeout and urllib3 retries for
+connection failures and 502/503/504s.
+
+Each host also has a CircuitBreaker: after HTTP_BREAKER_FAILURES
+consecutive failures calls fail fast with CircuitOpenError for
+HTTP_BREAKER_RESET_SECONDS, then a single probe decides whether to close
+it again. A degraded provider therefore costs one quick error per call
+rather than tying up workers until their timeouts. SDKs that bring their
+own transport (OpenAI, Gemini) go through OutboundHTTP.guard() to share
+the breaker and metrics.
+
+OutboundHTTP.metrics() reports per-host calls, errors, short-circuited
+calls and latency percentiles since process start.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per host for percentiles
+LATENCY_WINDOW = 500
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Call refused without trying because the host's breaker is open"""
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open after `reset_seconds`"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, host: str, threshold: int, reset_seconds: float):
+        self.host = host
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                # Let exactly one probe through; everyone else keeps failing fast
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit for %s closed", self.host)
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                if self.state == self.CLOSED:
+                    logger.warning("Circuit for %s opened after %s consecutive failures", self.host, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class HostStats:
+    """Call counts and recent latencies for one host"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.short_circuited = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.last_error = ''
+
+
+class OutboundCall:
+    """Handed out by OutboundHTTP.guard(); call fail() for failures that didn't raise"""
+
+    def __init__(self):
+        self.failed = False
+        self.error = ''
+
+    def fail(self, error: str):
+        self.failed = True
+        self.error = error
+
+
+class ProviderSession(requests.Session):
+    """requests.Session with default timeouts, retries, breakers and metrics"""
+
+    def __init__(self):
+        super().__init__()
+        retry = Retry(
+            total=settings.HTTP_RETRIES,
+            backoff_factor=settings.HTTP_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            # POSTs (room creation, orders, transfers) are only retried when
+            # the connection failed before the request was sent
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_HOSTS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT))
+        with OutboundHTTP.guard(urlsplit(url).netloc) as call:
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code >= 500:
+                call.fail(f"HTTP {response.status_code}")
+        return response
+
+
+class OutboundHTTP:
+    """Per-process shared session, breakers and metrics"""
+
+    _lock = threading.Lock()
+    _session = None
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _stats: Dict[str, HostStats] = {}
+
+    @staticmethod
+    def session() -> ProviderSession:
+        """The process-wide session; safe to share between threads"""
+        if OutboundHTTP._session is None:
+            with OutboundHTTP._lock:
+                if OutboundHTTP._session is None:
+                    OutboundHTTP._session = ProviderSession()
+        return OutboundHTTP._session
+
+    @staticmethod
+    def _host(host: str):
+        with OutboundHTTP._lock:
+            if host not in OutboundHTTP._breakers:
+                OutboundHTTP._breakers[host] = CircuitBreaker(
+                    host, settings.HTTP_BREAKER_FAILURES, settings.HTTP_BREAKER_RESET_SECONDS
+                )
+                OutboundHTTP._stats[host] = HostStats()
+            return OutboundHTTP._breakers[host], OutboundHTTP._stats[host]
+
+    @staticmethod
+    @contextmanager
+    def guard(host: str):
+        """
+        Run one outbound call to `host` through its breaker and metrics
+
+        Exceptions raised inside propagate and count as failures, except
+        SDK errors carrying a 4xx status_code (our request was bad, the
+        host is fine).
+
+        Raises:
+            CircuitOpenError: The host's breaker is open
+        """
+        breaker, stats = OutboundHTTP._host(host)
+        if not breaker.allow():
+            with OutboundHTTP._lock:
+                stats.short_circuited += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        call = OutboundCall()
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception as exc:
+            if not 400 <= (getattr(exc, 'status_code', None) or 500) < 500:
+                call.fail(repr(exc))
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with OutboundHTTP._lock:
+                stats.calls += 1
+                stats.latencies.append(elapsed_ms)
+                if call.failed:
+                    stats.errors += 1
+                    stats.last_error = call.error
+            if call.failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    @staticmethod
+    def metrics() -> Dict[str, Dict]:
+        """
+        Per-host counters since process start
+
+        Returns:
+            {host: {'calls', 'errors', 'short_circuited', 'error_rate',
+                    'latency_ms': {'p50', 'p90', 'p99'}, 'circuit', 'last_error'}}
+        """
+        with OutboundHTTP._lock:
+            snapshot = {
+                host: (stats.calls, stats.errors, stats.short_circuited, sorted(stats.latencies), stats.last_error)
+                for host, stats in OutboundHTTP._stats.items()
+            }
+        report = {}
+        for host, (calls, errors, short_circuited, latencies, last_error) in snapshot.items():
+            def pct(p):
+                return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 1) if latencies else 0.0
+
+            report[host] = {
+                'calls': calls,
+                'errors': errors,
+                'short_circuited': short_circuited,
+                'error_rate': round(errors / calls, 3) if calls else 0.0,
+                'latency_ms': {'p50': pct(50), 'p90': pct(90), 'p99': pct(99)},
+                'circuit': OutboundHTTP._breakers[host].state,
+                'last_error': last_error,
+            }
+        return report
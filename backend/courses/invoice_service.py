@@ -2,15 +2,14 @@
 Automated invoice generation
 """
 
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, Paragraph, Spacer
 from io import BytesIO
 from datetime import datetime
+from typing import Tuple
+from xml.sax.saxutils import escape
 from django.core.files.base import ContentFile
+from .pdf_engine import PDFTemplates, build_pdf, render_batch
 
 
 class InvoiceGenerator:
@@ -28,11 +27,13 @@ class InvoiceGenerator:
             BytesIO buffer with PDF data
         """
         from .models import Invoice
+        from .numbering import NumberAllocator
         
-        # Create or get invoice
+        # Create or get invoice (number is only allocated when created)
         invoice, created = Invoice.objects.get_or_create(
             payment=payment,
             defaults={
+                'invoice_number': lambda: NumberAllocator.next_number('invoice'),
                 'student_name': payment.student.full_name,
                 'student_email': payment.student.email,
                 'subtotal': payment.amount,
@@ -42,10 +43,6 @@ class InvoiceGenerator:
             }
         )
         
-        if created:
-            invoice.generate_invoice_number()
-            invoice.save()
-        
         # Generate PDF
         buffer = InvoiceGenerator._create_pdf(invoice)
         
@@ -81,56 +78,56 @@ class InvoiceGenerator:
         return items
     
     @staticmethod
-    def _create_pdf(invoice):
-        """Create PDF invoice"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
+    def build_invoice_data(invoice) -> dict:
+        """Collect invoice fields into a plain, picklable dict for render_invoice()"""
+        return {
+            'invoice_id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'invoice_date': invoice.invoice_date.strftime('%B %d, %Y'),
+            'payment_status': invoice.payment.status,
+            'student_name': invoice.student_name,
+            'student_email': invoice.student_email,
+            'items': invoice.items,
+            'subtotal': invoice.subtotal,
+            'platform_fee': invoice.payment.platform_fee,
+            'total_amount': invoice.total_amount,
+        }
+    
+    @staticmethod
+    def render_invoice(data: dict) -> bytes:
+        """Render invoice PDF bytes from build_invoice_data() output (no DB access)"""
+        styles = PDFTemplates.styles()
+        table_styles = PDFTemplates.table_styles()
         story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=20,
-            alignment=TA_CENTER
-        )
         
         # Header
-        story.append(Paragraph("ELITE CLASSROOM", title_style))
-        story.append(Paragraph("Invoice", styles['Heading1']))
+        story.append(PDFTemplates.static('invoice_brand'))
+        story.append(PDFTemplates.static('invoice_heading'))
         story.append(Spacer(1, 0.3*inch))
         
         # Invoice details
         invoice_data = [
-            ['Invoice Number:', invoice.invoice_number],
-            ['Invoice Date:', invoice.invoice_date.strftime('%B %d, %Y')],
-            ['Payment Status:', invoice.payment.status],
+            ['Invoice Number:', data['invoice_number']],
+            ['Invoice Date:', data['invoice_date']],
+            ['Payment Status:', data['payment_status']],
         ]
         
         invoice_table = Table(invoice_data, colWidths=[2*inch, 4*inch])
-        invoice_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        invoice_table.setStyle(table_styles['invoice_details'])
         story.append(invoice_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Bill to
-        story.append(Paragraph("Bill To:", styles['Heading3']))
-        story.append(Paragraph(invoice.student_name, styles['Normal']))
-        story.append(Paragraph(invoice.student_email, styles['Normal']))
+        story.append(PDFTemplates.static('invoice_bill_to'))
+        story.append(Paragraph(escape(data['student_name']), styles['normal']))
+        story.append(Paragraph(escape(data['student_email']), styles['normal']))
         story.append(Spacer(1, 0.3*inch))
         
         # Items
-        story.append(Paragraph("Items:", styles['Heading3']))
+        story.append(PDFTemplates.static('invoice_items'))
         
         items_data = [['Description', 'Teacher', 'Date', 'Amount']]
-        for item in invoice.items:
+        for item in data['items']:
             items_data.append([
                 item['description'],
                 item.get('teacher', 'N/A'),
@@ -139,41 +136,59 @@ class InvoiceGenerator:
             ])
         
         items_table = Table(items_data, colWidths=[2.5*inch, 1.5*inch, 1*inch, 1*inch])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
+        items_table.setStyle(table_styles['invoice_items'])
         story.append(items_table)
         story.append(Spacer(1, 0.2*inch))
         
         # Totals
         totals_data = [
-            ['Subtotal:', f"₹{invoice.subtotal:.2f}"],
-            ['Platform Fee (included):', f"₹{invoice.payment.platform_fee:.2f}"],
-            ['Total:', f"₹{invoice.total_amount:.2f}"],
+            ['Subtotal:', f"₹{data['subtotal']:.2f}"],
+            ['Platform Fee (included):', f"₹{data['platform_fee']:.2f}"],
+            ['Total:', f"₹{data['total_amount']:.2f}"],
         ]
         
         totals_table = Table(totals_data, colWidths=[4.5*inch, 1.5*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-        ]))
+        totals_table.setStyle(table_styles['invoice_totals'])
         story.append(totals_table)
         story.append(Spacer(1, 0.5*inch))
         
         # Footer
-        footer_text = "Thank you for your business!<br/>Elite Classroom - Empowering Education"
-        story.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER)))
+        story.append(PDFTemplates.static('invoice_footer'))
         
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return build_pdf(story)
+    
+    @staticmethod
+    def _create_pdf(invoice):
+        """Create PDF invoice"""
+        data = InvoiceGenerator.build_invoice_data(invoice)
+        return BytesIO(InvoiceGenerator.render_invoice(data))
+    
+    @staticmethod
+    def render_invoices(invoices, executor=None) -> Tuple[int, int]:
+        """
+        Re-render and store PDFs for many invoices in one pass
+        
+        Args:
+            invoices: Invoice queryset/iterable (select_related('payment') avoids N+1)
+            executor: Optional pool from pdf_engine.create_render_pool()
+        
+        Returns:
+            (rendered, failed) counts
+        """
+        by_id = {}
+        jobs = []
+        for invoice in invoices:
+            by_id[invoice.id] = invoice
+            jobs.append((invoice.id, InvoiceGenerator.build_invoice_data(invoice)))
+        
+        rendered = failed = 0
+        for invoice_id, pdf_bytes, error in render_batch(InvoiceGenerator.render_invoice, jobs, executor):
+            if error is not None:
+                failed += 1
+                continue
+            invoice = by_id[invoice_id]
+            invoice.pdf_file.save(f"{invoice.invoice_number}.pdf", ContentFile(pdf_bytes), save=False)
+            invoice.save(update_fields=['pdf_file'])
+            rendered += 1
+        
+        return rendered, failed
@@ -0,0 +1,83 @@
+"""
+Lightweight DB-backed job queue helpers
+
+Jobs are plain model rows with a status column. Workers claim rows with
+SELECT ... FOR UPDATE SKIP LOCKED so several workers can poll the same
+table without handing out a job twice.
+"""
+
+import time
+from datetime import timedelta
+from typing import Callable, List
+from django.db import transaction
+from django.utils import timezone
+
+
+def claim_jobs(queryset, batch_size: int = 10, **updates) -> List:
+    """
+    Atomically claim up to batch_size rows from queryset
+
+    Args:
+        queryset: Filtered queryset of claimable jobs (e.g. status='QUEUED')
+        batch_size: Max rows to claim
+        **updates: Field values written to the claimed rows (e.g. status='RUNNING')
+
+    Returns:
+        List of claimed model instances with updates applied in memory
+    """
+    with transaction.atomic():
+        jobs = list(queryset.select_for_update(skip_locked=True)[:batch_size])
+        if jobs and updates:
+            queryset.model.objects.filter(id__in=[job.id for job in jobs]).update(**updates)
+            for job in jobs:
+                for field, value in updates.items():
+                    setattr(job, field, value)
+    return jobs
+
+
+def requeue_stale_jobs(queryset, timeout_minutes: int, timestamp_field: str = 'started_at', **updates) -> int:
+    """
+    Hand back jobs whose worker died mid-run
+
+    Args:
+        queryset: Running jobs (e.g. status='RUNNING')
+        timeout_minutes: Age after which a running job is considered abandoned
+        timestamp_field: Field holding the claim time
+        **updates: Field values that put the job back in the queue
+
+    Returns:
+        Number of jobs requeued
+    """
+    cutoff = timezone.now() - timedelta(minutes=timeout_minutes)
+    return queryset.filter(**{f'{timestamp_field}__lt': cutoff}).update(**updates)
+
+
+def run_worker(process_batch: Callable[[], int], once: bool = False, poll_interval: float = 2.0, log=print):
+    """
+    Poll loop shared by the queue worker management commands
+
+    Args:
+        process_batch: Callable that processes one batch and returns jobs handled
+        once: Drain the queue once and exit instead of polling forever
+        poll_interval: Seconds to sleep when the queue is empty
+        log: Output function
+    """
+    while True:
+        try:
+            handled = process_batch()
+        except KeyboardInterrupt:
+            log("Worker stopped")
+            return
+
+        if handled:
+            log(f"Processed {handled} job(s)")
+            continue
+
+        if once:
+            return
+
+        try:
+            time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            log("Worker stopped")
+            return
@@ -0,0 +1,309 @@
+"""
+Teacher earnings ledger
+
+Each TeacherBalance row holds a teacher's running totals (captured, in
+escrow, paid out, pending payouts), so earnings pages read one row
+instead of aggregating payments and payouts on every request.
+
+Balances only change through EarningsLedgerEntry rows written in the same
+transaction. Callers don't describe what happened: after changing a
+payment or payout they call sync_payments / sync_payouts, which post the
+difference between what the row contributes now and what the ledger has
+already recorded for it. Posting is idempotent and works the same for a
+single save() and a bulk_update().
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .rollup_service import RevenueRollups
+
+BUCKETS = ('captured', 'in_escrow', 'paid_out', 'pending_payouts')
+ZERO = Decimal('0.00')
+
+
+def payment_contribution(status, is_held_in_escrow, released_from_escrow, teacher_amount) -> Dict[str, Decimal]:
+    """Balance buckets a payment in this state adds to its teacher"""
+    captured = teacher_amount if status == 'CAPTURED' else ZERO
+    held = captured if is_held_in_escrow and not released_from_escrow else ZERO
+    return {'captured': captured, 'in_escrow': held, 'paid_out': ZERO, 'pending_payouts': ZERO}
+
+
+def payout_contribution(status, amount) -> Dict[str, Decimal]:
+    """Balance buckets a payout in this state adds to its teacher"""
+    return {
+        'captured': ZERO,
+        'in_escrow': ZERO,
+        'paid_out': amount if status == 'COMPLETED' else ZERO,
+        'pending_payouts': amount if status in ('PENDING', 'PROCESSING') else ZERO,
+    }
+
+
+class EarningsLedger:
+    """Post ledger entries and keep TeacherBalance rows in step"""
+
+    @staticmethod
+    def _entry_type(source: str, delta: Dict[str, Decimal]) -> str:
+        if source == 'payment':
+            if delta['captured'] > 0:
+                return 'CAPTURE'
+            if delta['captured'] < 0:
+                return 'REVERSAL'
+            return 'ESCROW_RELEASE' if delta['in_escrow'] < 0 else 'ADJUSTMENT'
+
+        if delta['paid_out'] > 0:
+            return 'PAYOUT_COMPLETED'
+        if delta['paid_out'] < 0:
+            return 'REVERSAL'
+        return 'PAYOUT_QUEUED' if delta['pending_payouts'] > 0 else 'PAYOUT_FAILED'
+
+    @staticmethod
+    def _apply(entries: List) -> None:
+        """Add entry deltas to balances with one UPDATE per teacher"""
+        from .models import TeacherBalance
+
+        totals = defaultdict(lambda: dict.fromkeys(BUCKETS, ZERO))
+        for entry in entries:
+            for bucket in BUCKETS:
+                totals[entry.teacher_id][bucket] += getattr(entry, bucket)
+
+        TeacherBalance.objects.bulk_create(
+            [TeacherBalance(teacher_id=teacher_id) for teacher_id in totals],
+            ignore_conflicts=True
+        )
+        now = timezone.now()
+        for teacher_id, delta in totals.items():
+            TeacherBalance.objects.filter(teacher_id=teacher_id).update(
+                updated_at=now,
+                **{bucket: F(bucket) + amount for bucket, amount in delta.items() if amount}
+            )
+
+    @staticmethod
+    def _post(source: str, targets: Dict[int, tuple]) -> int:
+        """
+        Post the missing deltas for payments or payouts
+
+        Args:
+            source: 'payment' or 'payout'
+            targets: {source id: (teacher id, contribution)}
+
+        Returns:
+            Number of entries written
+        """
+        from .models import EarningsLedgerEntry
+
+        posted = {
+            row[f'{source}_id']: row
+            for row in EarningsLedgerEntry.objects
+            .filter(**{f'{source}_id__in': list(targets)})
+            .values(f'{source}_id')
+            .annotate(**{bucket: Sum(bucket) for bucket in BUCKETS})
+        }
+
+        entries = []
+        for source_id, (teacher_id, contribution) in targets.items():
+            done = posted.get(source_id, {})
+            delta = {bucket: contribution[bucket] - (done.get(bucket) or ZERO) for bucket in BUCKETS}
+            if not any(delta.values()):
+                continue
+            entries.append(EarningsLedgerEntry(
+                teacher_id=teacher_id,
+                entry_type=EarningsLedger._entry_type(source, delta),
+                **{f'{source}_id': source_id},
+                **delta
+            ))
+
+        if entries:
+            EarningsLedgerEntry.objects.bulk_create(entries)
+            EarningsLedger._apply(entries)
+        return len(entries)
+
+    @staticmethod
+    def sync_payments(payment_ids: Iterable[int]) -> int:
+        """
+        Bring the ledger up to date with the current state of these payments
+
+        Call after saving status/escrow changes, ideally in the same
+        transaction. The payment rows are locked so concurrent syncs of the
+        same payment cannot post twice. Their capture days are also queued
+        for the revenue rollups.
+
+        Returns:
+            Number of entries written
+        """
+        from .models import Payment
+
+        payment_ids = list(payment_ids)
+        if not payment_ids:
+            return 0
+
+        with transaction.atomic():
+            rows = list(
+                Payment.objects.select_for_update(of=('self',))
+                .filter(id__in=payment_ids)
+                .values_list(
+                    'id', 'status', 'is_held_in_escrow', 'released_from_escrow', 'teacher_amount',
+                    'session__teacher_id', 'course__teacher_id', 'captured_at'
+                )
+            )
+            targets = {
+                payment_id: (session_teacher or course_teacher, payment_contribution(status, held, released, amount))
+                for payment_id, status, held, released, amount, session_teacher, course_teacher, _ in rows
+                if session_teacher or course_teacher
+            }
+            RevenueRollups.mark_dirty(row[-1] for row in rows)
+            return EarningsLedger._post('payment', targets)
+
+    @staticmethod
+    def sync_payouts(payout_ids: Iterable[int]) -> int:
+        """Bring the ledger up to date with these payouts (and queue their completion days)"""
+        from .models import Payout
+
+        payout_ids = list(payout_ids)
+        if not payout_ids:
+            return 0
+
+        with transaction.atomic():
+            rows = list(
+                Payout.objects.select_for_update()
+                .filter(id__in=payout_ids)
+                .values_list('id', 'teacher_id', 'status', 'amount', 'completed_at')
+            )
+            targets = {
+                payout_id: (teacher_id, payout_contribution(status, amount))
+                for payout_id, teacher_id, status, amount, _ in rows
+            }
+            RevenueRollups.mark_dirty(row[-1] for row in rows)
+            return EarningsLedger._post('payout', targets)
+
+    @staticmethod
+    def balance_for(teacher) -> 'TeacherBalance':
+        """Balance row for a teacher (unsaved zero balance if none yet)"""
+        from .models import TeacherBalance
+
+        return TeacherBalance.objects.filter(teacher=teacher).first() or TeacherBalance(teacher=teacher)
+
+    @staticmethod
+    def expected_balances(teacher_ids: Iterable[int] = None) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Balances recomputed from payments and payouts with two grouped queries
+
+        Args:
+            teacher_ids: Limit to these teachers (default: everyone)
+        """
+        from .models import Payment, Payout
+
+        expected = defaultdict(lambda: dict.fromkeys(BUCKETS, ZERO))
+
+        payments = Payment.objects.filter(status='CAPTURED').annotate(
+            teacher_id=Coalesce('session__teacher_id', 'course__teacher_id')
+        )
+        payouts = Payout.objects.all()
+        if teacher_ids is not None:
+            payments = payments.filter(teacher_id__in=teacher_ids)
+            payouts = payouts.filter(teacher_id__in=teacher_ids)
+
+        for row in payments.exclude(teacher_id=None).values('teacher_id').annotate(
+            captured=Sum('teacher_amount'),
+            in_escrow=Sum('teacher_amount', filter=Q(is_held_in_escrow=True, released_from_escrow=False))
+        ):
+            expected[row['teacher_id']]['captured'] = row['captured'] or ZERO
+            expected[row['teacher_id']]['in_escrow'] = row['in_escrow'] or ZERO
+
+        for row in payouts.values('teacher_id').annotate(
+            paid_out=Sum('amount', filter=Q(status='COMPLETED')),
+            pending_payouts=Sum('amount', filter=Q(status__in=['PENDING', 'PROCESSING']))
+        ):
+            expected[row['teacher_id']]['paid_out'] = row['paid_out'] or ZERO
+            expected[row['teacher_id']]['pending_payouts'] = row['pending_payouts'] or ZERO
+
+        return expected
+
+    @staticmethod
+    def find_drift() -> List[Dict]:
+        """
+        Compare every TeacherBalance with the source tables
+
+        Returns:
+            [{'teacher_id', 'bucket', 'expected', 'actual'}] for each mismatch
+        """
+        from .models import TeacherBalance
+
+        expected = EarningsLedger.expected_balances()
+        actual = {
+            row['teacher_id']: row
+            for row in TeacherBalance.objects.values('teacher_id', *BUCKETS)
+        }
+
+        drift = []
+        for teacher_id in sorted(set(expected) | set(actual)):
+            want = expected.get(teacher_id, dict.fromkeys(BUCKETS, ZERO))
+            have = actual.get(teacher_id, {})
+            for bucket in BUCKETS:
+                if want[bucket] != have.get(bucket, ZERO):
+                    drift.append({
+                        'teacher_id': teacher_id,
+                        'bucket': bucket,
+                        'expected': want[bucket],
+                        'actual': have.get(bucket, ZERO),
+                    })
+        return drift
+
+    @staticmethod
+    def repair(teacher_ids: Iterable[int], chunk_size: int = 1000) -> Dict[str, int]:
+        """
+        Re-sync all payments and payouts of these teachers, then adjust
+        whatever still differs (e.g. a balance edited by hand)
+
+        Also used to backfill balances for existing data.
+
+        Returns:
+            {'entries': source entries posted, 'adjustments': adjustment entries}
+        """
+        from .models import EarningsLedgerEntry, Payment, Payout, TeacherBalance
+
+        teacher_ids = list(teacher_ids)
+        posted = 0
+
+        payment_ids = (
+            Payment.objects
+            .filter(Q(session__teacher_id__in=teacher_ids) | Q(session__isnull=True, course__teacher_id__in=teacher_ids))
+            .values_list('id', flat=True)
+            .order_by('id')
+        )
+        payout_ids = Payout.objects.filter(teacher_id__in=teacher_ids).values_list('id', flat=True).order_by('id')
+
+        for ids, sync in ((payment_ids, EarningsLedger.sync_payments), (payout_ids, EarningsLedger.sync_payouts)):
+            chunk = []
+            for source_id in ids.iterator(chunk_size=chunk_size):
+                chunk.append(source_id)
+                if len(chunk) >= chunk_size:
+                    posted += sync(chunk)
+                    chunk = []
+            posted += sync(chunk)
+
+        with transaction.atomic():
+            expected = EarningsLedger.expected_balances(teacher_ids)
+            actual = {
+                balance.teacher_id: balance
+                for balance in TeacherBalance.objects.select_for_update().filter(teacher_id__in=teacher_ids)
+            }
+            adjustments = []
+            for teacher_id in teacher_ids:
+                want = expected.get(teacher_id, dict.fromkeys(BUCKETS, ZERO))
+                balance = actual.get(teacher_id)
+                delta = {bucket: want[bucket] - (getattr(balance, bucket) if balance else ZERO) for bucket in BUCKETS}
+                if any(delta.values()):
+                    adjustments.append(EarningsLedgerEntry(
+                        teacher_id=teacher_id, entry_type='ADJUSTMENT', note='Reconciliation', **delta
+                    ))
+            if adjustments:
+                EarningsLedgerEntry.objects.bulk_create(adjustments)
+                EarningsLedger._apply(adjustments)
+
+        return {'entries': posted, 'adjustments': len(adjustments)}
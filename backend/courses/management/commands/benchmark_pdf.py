@@ -0,0 +1,113 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from courses.invoice_service import InvoiceGenerator
+from courses.pdf_engine import PDFTemplates, create_render_pool, render_batch
+from courses.pdf_service import ScorecardGenerator
+
+
+def sample_scorecard(n: int) -> dict:
+    answers = [
+        {
+            'order': i,
+            'is_correct': (i + n) % 3 != 0,
+            'points_earned': Decimal('1.00') if (i + n) % 3 else Decimal('0.00'),
+            'points': Decimal('1.00'),
+            'bloom_level': ('REMEMBER', 'UNDERSTAND', 'APPLY', 'ANALYZE', None)[i % 5],
+        }
+        for i in range(20)
+    ]
+    correct = sum(1 for a in answers if a['is_correct'])
+    return {
+        'attempt_id': n,
+        'student_id': n,
+        'student_name': f"Student {n}",
+        'test_title': "Algebra Mock Test",
+        'subject': "Mathematics",
+        'date': "January 15, 2025",
+        'time_taken_minutes': 42,
+        'total_score': Decimal(correct),
+        'max_score': Decimal(len(answers)),
+        'percentage': Decimal(correct * 100 / len(answers)).quantize(Decimal('0.01')),
+        'passed': correct * 100 / len(answers) >= 60,
+        'passing_score': 60,
+        'answers': answers,
+    }
+
+
+def sample_invoice(n: int) -> dict:
+    return {
+        'invoice_id': n,
+        'invoice_number': f"INV-2025-{n:06d}",
+        'invoice_date': "January 15, 2025",
+        'payment_status': 'CAPTURED',
+        'student_name': f"Student {n}",
+        'student_email': f"student{n}@example.com",
+        'items': [{
+            'description': "Tutoring Session - Quadratic equations",
+            'teacher': "Teacher Name",
+            'date': "2025-01-15",
+            'duration': "60 minutes",
+            'amount': 1200.0,
+        }],
+        'subtotal': Decimal('1200.00'),
+        'platform_fee': Decimal('180.00'),
+        'total_amount': Decimal('1200.00'),
+    }
+
+
+DOCUMENTS = {
+    'scorecard': (ScorecardGenerator.render_scorecard, sample_scorecard),
+    'invoice': (InvoiceGenerator.render_invoice, sample_invoice),
+}
+
+
+class Command(BaseCommand):
+    help = "Measure PDF render throughput (PDFs/sec per core) with and without template caching"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help="Documents rendered per measurement")
+        parser.add_argument('--kind', choices=['scorecard', 'invoice', 'all'], default='all')
+        parser.add_argument('--workers', type=int, default=0, help="Also measure a process pool of this size")
+
+    def _rate(self, fn, count):
+        start = time.perf_counter()
+        fn()
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        kinds = list(DOCUMENTS) if options['kind'] == 'all' else [options['kind']]
+
+        for kind in kinds:
+            render, sample = DOCUMENTS[kind]
+            jobs = [(n, sample(n)) for n in range(count)]
+
+            # Rebuilding styles for every document (pre-cache behaviour)
+            def cold():
+                for _, data in jobs:
+                    PDFTemplates.reset()
+                    render(data)
+
+            def warm():
+                list(render_batch(render, jobs))
+
+            render(jobs[0][1])  # import/first-use costs out of the way
+            cold_rate = self._rate(cold, count)
+            PDFTemplates.warm()
+            warm_rate = self._rate(warm, count)
+
+            self.stdout.write(f"{kind}:")
+            self.stdout.write(f"  uncached templates  {cold_rate:8.1f} PDFs/sec/core")
+            self.stdout.write(f"  cached templates    {warm_rate:8.1f} PDFs/sec/core ({warm_rate / cold_rate:.2f}x)")
+
+            if options['workers'] > 1:
+                workers = options['workers']
+                with create_render_pool(workers) as executor:
+                    list(render_batch(render, jobs[:workers], executor, chunksize=1))  # spin up workers
+                    pool_rate = self._rate(lambda: list(render_batch(render, jobs, executor)), count)
+                self.stdout.write(
+                    f"  pool of {workers:<3}         {pool_rate:8.1f} PDFs/sec ({pool_rate / workers:.1f}/core)"
+                )
@@ -0,0 +1,134 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that must only be imported inside the code paths that use them
+LAZY_MODULES = (
+    'numpy', 'scipy', 'sklearn', 'matplotlib', 'reportlab',
+    'openai', 'google.generativeai', 'elevenlabs',
+)
+
+# Boots a worker the way gunicorn/daphne would: settings, app registry, URLconf
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot_seconds = time.perf_counter() - start
+rss_kb = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'boot_seconds': boot_seconds,
+    'rss_kb': rss_kb,
+    'loaded': [name for name in sys.argv[1:] if name in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold start time and baseline RSS of a freshly booted worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Fresh interpreters to boot (median is reported)")
+        parser.add_argument('--top', type=int, default=10, help="Packages listed in the import time breakdown")
+        parser.add_argument('--max-seconds', type=float, default=None, help="Fail above this cold start (default STARTUP_MAX_SECONDS)")
+        parser.add_argument('--max-rss-mb', type=float, default=None, help="Fail above this RSS (default STARTUP_MAX_RSS_MB)")
+        parser.add_argument('--baseline', type=str, help="JSON from a previous --output run to compare against")
+        parser.add_argument('--tolerance', type=float, default=20.0, help="Allowed % regression against --baseline")
+        parser.add_argument('--output', type=str, help="Write results as JSON to this path")
+
+    def _boot(self, importtime=False):
+        args = [sys.executable]
+        if importtime:
+            args += ['-X', 'importtime']
+        args += ['-c', BOOT_SCRIPT, *LAZY_MODULES]
+
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+        start = time.perf_counter()
+        result = subprocess.run(args, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        wall_seconds = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise CommandError(f"Worker failed to boot:\n{result.stderr[-2000:]}")
+
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        data['wall_seconds'] = wall_seconds
+        return data, result.stderr
+
+    @staticmethod
+    def _import_breakdown(stderr, top):
+        """Sum -X importtime self time (ms) per top-level package"""
+        totals = Counter()
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _cumulative, name = line[len('import time:'):].split('|')
+            totals[name.strip().split('.')[0]] += int(self_us)
+        return [(package, round(us / 1000, 1)) for package, us in totals.most_common(top)]
+
+    def handle(self, *args, **options):
+        runs = [self._boot()[0] for _ in range(max(options['runs'], 1))]
+        _, importtime_stderr = self._boot(importtime=True)
+
+        results = {
+            'runs': len(runs),
+            'cold_start_seconds': round(statistics.median(r['wall_seconds'] for r in runs), 3),
+            'django_boot_seconds': round(statistics.median(r['boot_seconds'] for r in runs), 3),
+            'rss_mb': round(statistics.median(r['rss_kb'] for r in runs) / 1024, 1),
+            'eager_heavy_modules': sorted({name for r in runs for name in r['loaded']}),
+            'top_imports_ms': self._import_breakdown(importtime_stderr, options['top']),
+        }
+
+        self.stdout.write(f"Cold start:  {results['cold_start_seconds']:.3f}s (Django boot {results['django_boot_seconds']:.3f}s)")
+        self.stdout.write(f"RSS:         {results['rss_mb']:.1f} MB")
+        self.stdout.write("Import time by package:")
+        for package, ms in results['top_imports_ms']:
+            self.stdout.write(f"  {package:<24} {ms:>8.1f} ms")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        # Regression checks
+        max_seconds = options['max_seconds'] or settings.STARTUP_MAX_SECONDS
+        max_rss_mb = options['max_rss_mb'] or settings.STARTUP_MAX_RSS_MB
+        failures = []
+
+        if results['eager_heavy_modules']:
+            failures.append(f"imported at startup: {', '.join(results['eager_heavy_modules'])}")
+        if results['cold_start_seconds'] > max_seconds:
+            failures.append(f"cold start {results['cold_start_seconds']:.3f}s > {max_seconds}s")
+        if results['rss_mb'] > max_rss_mb:
+            failures.append(f"RSS {results['rss_mb']:.1f} MB > {max_rss_mb} MB")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            allowed = 1 + options['tolerance'] / 100
+            for metric in ('cold_start_seconds', 'rss_mb'):
+                if results[metric] > baseline[metric] * allowed:
+                    failures.append(f"{metric} {results[metric]} vs baseline {baseline[metric]} (+{options['tolerance']}% allowed)")
+
+        if failures:
+            raise CommandError("Startup regression: " + "; ".join(failures))
+
+        self.stdout.write(self.style.SUCCESS("Startup within limits"))
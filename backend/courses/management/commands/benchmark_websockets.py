@@ -0,0 +1,205 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import date, time as clock_time
+
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.whiteboard import decode_op, encode_stroke, pack_frame, unpack_frame
+
+CONSUMERS = ('chat', 'whiteboard')
+
+# Messages per second each simulated client sends, by consumer
+DEFAULT_RATES = {'chat': 1.0, 'whiteboard': 30.0}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive N simulated websocket clients across M session rooms through the full ASGI "
+        "stack (JWT middleware, consumers, configured channel layer) and report delivered "
+        "messages/sec and broadcast latency percentiles. Clients run in this process, so "
+        "results exclude network time. Raise WS_*_RATE_LIMIT for saturation runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', choices=CONSUMERS + ('all',), default='all')
+        parser.add_argument('--clients', type=int, default=100, help="Simulated sockets in total")
+        parser.add_argument('--rooms', type=int, default=10, help="Sessions the clients are spread over")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds of sending per consumer")
+        parser.add_argument('--rate', type=float, help="Messages/sec per client (default: chat 1, whiteboard 30)")
+        parser.add_argument('--output', type=str, help="Write results as JSON to this path")
+        parser.add_argument('--keep', action='store_true', help="Keep the benchmark users and sessions")
+
+    def _create_rooms(self, count):
+        """One throwaway student/teacher pair and session per room"""
+        from accounts.models import User
+        from courses.models import Session
+
+        tag = uuid.uuid4().hex[:8]
+        rooms = []
+        for i in range(count):
+            student = User.objects.create_user(email=f'bench-{tag}-s{i}@bench.invalid', role='STUDENT')
+            teacher = User.objects.create_user(email=f'bench-{tag}-t{i}@bench.invalid', role='TEACHER')
+            session = Session.objects.create(
+                student=student, teacher=teacher, title=f'Websocket benchmark {tag}',
+                scheduled_date=date.today(), start_time=clock_time(10), end_time=clock_time(11)
+            )
+            rooms.append((session.id, [str(AccessToken.for_user(student)), str(AccessToken.for_user(teacher))]))
+        return tag, rooms
+
+    async def _connect(self, application, consumer, session_id, token):
+        """Open one socket; returns None if the handshake was rejected"""
+        comm = ApplicationCommunicator(application, {
+            'type': 'websocket',
+            'path': f'/ws/{consumer}/{session_id}/',
+            'query_string': f'token={token}'.encode(),
+            'headers': [],
+            'subprotocols': [],
+        })
+        await comm.send_input({'type': 'websocket.connect'})
+        reply = await comm.receive_output(10)
+        return comm if reply['type'] == 'websocket.accept' else None
+
+    async def _client(self, comm, consumer, rate, stop_at, stats):
+        async def send_loop():
+            # Random start offset so clients don't all send in lockstep
+            await asyncio.sleep(random.random() / rate)
+            while time.perf_counter() < stop_at:
+                sent_at = time.perf_counter()
+                if consumer == 'chat':
+                    await comm.send_input({'type': 'websocket.receive', 'text': json.dumps({'text': f'bench {sent_at}'})})
+                else:
+                    frame = pack_frame([encode_stroke(f'{sent_at:.6f}', [(random.random() * 800, random.random() * 600)])])
+                    await comm.send_input({'type': 'websocket.receive', 'bytes': frame})
+                stats['sent'] += 1
+                await asyncio.sleep(1 / rate)
+
+        async def receive_loop():
+            deadline = stop_at + 2
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return
+                try:
+                    # Read the queue directly: receive_output() cancels the app on timeout
+                    message = await asyncio.wait_for(comm.output_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return
+                if message['type'] != 'websocket.send':
+                    return
+                received_at = time.perf_counter()
+                for sent_at in self._timestamps(consumer, message):
+                    stats['latencies'].append((received_at - sent_at) * 1000)
+
+        await asyncio.gather(send_loop(), receive_loop())
+        await comm.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        try:
+            await comm.wait(5)
+        except asyncio.TimeoutError:
+            pass
+
+    @staticmethod
+    def _timestamps(consumer, message):
+        if consumer == 'chat':
+            try:
+                text = json.loads(message.get('text') or '{}').get('text', '')
+            except ValueError:
+                return []
+            return [float(text[6:])] if text.startswith('bench ') else []
+
+        if not message.get('bytes'):
+            return []
+        return [float(decode_op(op)['element_id']) for op in unpack_frame(message['bytes'])]
+
+    async def _run(self, consumer, rooms, clients, duration, rate):
+        from config.asgi import application
+        from courses.chat import ChatWriteBuffer
+
+        stats = {'sent': 0, 'latencies': []}
+        # Clients alternate between the room's student and teacher
+        members = [(rooms[i % len(rooms)][0], rooms[i % len(rooms)][1][(i // len(rooms)) % 2]) for i in range(clients)]
+
+        # Connect everyone first so nobody's history/catch-up counts as a broadcast
+        sockets = await asyncio.gather(*[
+            self._connect(application, consumer, session_id, token) for session_id, token in members
+        ])
+        connected = Counter(session_id for (session_id, _), comm in zip(members, sockets) if comm)
+
+        started = time.perf_counter()
+        stop_at = started + duration
+        await asyncio.gather(*[self._client(comm, consumer, rate, stop_at, stats) for comm in sockets if comm])
+        elapsed = min(time.perf_counter() - started, duration)
+        await ChatWriteBuffer.flush()
+
+        # Chat echoes to the sender, whiteboard frames go to everyone else in the room
+        fanout = statistics.mean(n if consumer == 'chat' else n - 1 for n in connected.values()) if connected else 0
+        latencies = sorted(stats['latencies'])
+        return {
+            'consumer': consumer,
+            'clients': clients,
+            'rooms': len(rooms),
+            'rate_per_client': rate,
+            'rejected': sockets.count(None),
+            'sent': stats['sent'],
+            'delivered': len(latencies),
+            'delivery_ratio': round(len(latencies) / (stats['sent'] * fanout), 3) if stats['sent'] and fanout else 0,
+            'sent_per_sec': round(stats['sent'] / elapsed, 1),
+            'delivered_per_sec': round(len(latencies) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p90': round(percentile(latencies, 90), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2) if latencies else 0.0,
+            },
+        }
+
+    def handle(self, *args, **options):
+        from accounts.models import User
+
+        if options['clients'] < 1 or options['rooms'] < 1:
+            raise CommandError("--clients and --rooms must be positive")
+        consumers = CONSUMERS if options['consumer'] == 'all' else (options['consumer'],)
+        rooms_count = min(options['rooms'], options['clients'])
+
+        self.stdout.write(f"Channel layer: {settings.CHANNEL_LAYERS['default']['BACKEND']}")
+        tag, rooms = self._create_rooms(rooms_count)
+        results = []
+        try:
+            for consumer in consumers:
+                rate = options['rate'] or DEFAULT_RATES[consumer]
+                result = asyncio.run(self._run(consumer, rooms, options['clients'], options['duration'], rate))
+                results.append(result)
+
+                latency = result['latency_ms']
+                self.stdout.write(
+                    f"{consumer:<10} {result['clients']} clients / {result['rooms']} rooms: "
+                    f"sent {result['sent_per_sec']}/s, delivered {result['delivered_per_sec']}/s "
+                    f"({result['delivery_ratio']:.1%} of expected), rejected {result['rejected']}"
+                )
+                self.stdout.write(
+                    f"{'':<10} latency p50 {latency['p50']} ms, p90 {latency['p90']} ms, "
+                    f"p99 {latency['p99']} ms, max {latency['max']} ms"
+                )
+        finally:
+            if not options['keep']:
+                # Sessions, messages and whiteboard ops go with the users
+                User.objects.filter(email__startswith=f'bench-{tag}-', email__endswith='@bench.invalid').delete()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
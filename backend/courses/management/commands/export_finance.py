@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from courses.export_service import DATASETS, FORMATS, FinanceExporter
+
+
+class Command(BaseCommand):
+    help = "Stream payments, payouts, refunds or invoices to a CSV or Parquet file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS), help="What to export")
+        parser.add_argument('--format', dest='export_format', choices=FORMATS, default='csv')
+        parser.add_argument('--since', type=str, help="Inclusive start date (YYYY-MM-DD)")
+        parser.add_argument('--until', type=str, help="Inclusive end date (YYYY-MM-DD)")
+        parser.add_argument('--status', type=str, help="Only rows with this status")
+        parser.add_argument('--output', type=str, help="Output path (default: <dataset>.<format>)")
+
+    def _date(self, value, option):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if not parsed:
+            raise CommandError(f"--{option} must be YYYY-MM-DD")
+        return parsed
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        export_format = options['export_format']
+        output = options['output'] or f"{dataset}.{export_format}"
+
+        try:
+            chunks = FinanceExporter.stream(
+                dataset, export_format,
+                since=self._date(options['since'], 'since'),
+                until=self._date(options['until'], 'until'),
+                status=options['status']
+            )
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+
+        start = time.time()
+        size = 0
+        with open(output, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {dataset} to {output} ({size / 1024:.1f} KB in {time.time() - start:.1f}s)"
+        ))
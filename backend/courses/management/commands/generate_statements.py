@@ -0,0 +1,53 @@
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from courses.pdf_engine import create_render_pool
+from courses.statement_service import StatementGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate month-end statements (and optionally invoices) with a manifest and zip archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=str, help="Statement month as YYYY-MM (default: previous month)")
+        parser.add_argument('--with-invoices', action='store_true', help="Also create missing invoices for the month")
+        parser.add_argument('--restart', action='store_true', help="Discard saved progress and start the month over")
+        parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default STATEMENT_RENDER_WORKERS, 0 = inline)")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Users rendered and checkpointed together")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period = parse_date(f"{options['month']}-01")
+            except ValueError:
+                period = None
+            if not period:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            period = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        workers = settings.STATEMENT_RENDER_WORKERS if options['workers'] is None else options['workers']
+        self.stdout.write(f"Generating statements for {period:%Y-%m} ({workers or 'no'} worker processes)")
+
+        start = time.time()
+        with (create_render_pool(workers) if workers else nullcontext()) as executor:
+            run = StatementGenerator.run_month(
+                period,
+                executor=executor,
+                with_invoices=options['with_invoices'],
+                restart=options['restart'],
+                users_per_chunk=options['chunk_size'],
+                log=self.stdout.write
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{run.statements_count} statements ({run.failed_count} failed), "
+            f"{run.invoices_count} invoices in {time.time() - start:.1f}s. "
+            f"Manifest: {run.manifest_file.name}, archive: {run.archive_file.name}"
+        ))
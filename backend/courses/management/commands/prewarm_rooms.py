@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from courses.rtc import RoomManager
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Create VideoSDK rooms for sessions starting soon so joining never waits on the provider"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=None, help="Look-ahead window (default ROOM_PREWARM_MINUTES)")
+        parser.add_argument('--workers', type=int, default=None, help="Concurrent room creations (default ROOM_PREWARM_WORKERS)")
+        parser.add_argument('--poll-interval', type=float, default=60.0, help="Seconds between runs when polling")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of running once (e.g. from cron)")
+
+    def prewarm(self):
+        report = RoomManager.prewarm(minutes=self.options['minutes'], max_workers=self.options['workers'])
+        style = self.style.WARNING if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{report['assigned']} room(s) assigned for {report['sessions']} upcoming session(s), "
+            f"{report['raced']} lost to a concurrent join, {report['failed']} failed, {report['seconds']}s"
+        ))
+        return report['assigned']
+
+    def handle(self, *args, **options):
+        self.options = options
+        if not options['loop']:
+            self.prewarm()
+            return
+
+        self.stdout.write("Room prewarm worker started")
+        run_worker(self.prewarm, poll_interval=options['poll_interval'], log=self.stdout.write)
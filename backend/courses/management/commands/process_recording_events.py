@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from courses.recordings import RecordingIngestor
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Attach queued VideoSDK recording assets (with size/duration metadata) to sessions in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Events claimed per poll")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when idle")
+        parser.add_argument('--once', action='store_true', help="Drain the inbox and exit")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Recording event worker started")
+        run_worker(
+            lambda: RecordingIngestor.process_batch(options['batch_size']),
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+            log=self.stdout.write
+        )
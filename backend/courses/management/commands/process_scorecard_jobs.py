@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from courses.pdf_service import ScorecardJobProcessor
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Render pending mock test scorecards on a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default SCORECARD_RENDER_WORKERS)")
+        parser.add_argument('--batch-size', type=int, default=20, help="Attempts claimed per poll")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when idle")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Scorecard worker started")
+        with ScorecardJobProcessor.create_executor(options['workers']) as executor:
+            run_worker(
+                lambda: ScorecardJobProcessor.process_batch(executor, options['batch_size']),
+                once=options['once'],
+                poll_interval=options['poll_interval'],
+                log=self.stdout.write
+            )
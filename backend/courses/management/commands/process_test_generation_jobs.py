@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from courses.assesment_services import TestGenerationJobProcessor
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run the mock test generation worker against the DB-backed job queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5, help="Jobs claimed per poll")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when idle")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Mock test generation worker started")
+        run_worker(
+            lambda: TestGenerationJobProcessor.process_batch(options['batch_size']),
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+            log=self.stdout.write
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.ledger_service import EarningsLedger
+
+
+class Command(BaseCommand):
+    help = "Recompute teacher balances from payments and payouts and report (or fix) drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Post missing ledger entries and adjust drifting balances")
+        parser.add_argument('--limit', type=int, default=50, help="Mismatches to print")
+
+    def handle(self, *args, **options):
+        start = time.time()
+        drift = EarningsLedger.find_drift()
+        teachers = sorted({row['teacher_id'] for row in drift})
+
+        for row in drift[:options['limit']]:
+            self.stdout.write(
+                f"teacher {row['teacher_id']} {row['bucket']}: "
+                f"balance {row['actual']}, expected {row['expected']}"
+            )
+        if len(drift) > options['limit']:
+            self.stdout.write(f"... {len(drift) - options['limit']} more")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f"No drift ({time.time() - start:.1f}s)"))
+            return
+
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drift)} mismatches across {len(teachers)} teachers ({time.time() - start:.1f}s). "
+                f"Run with --fix to repair."
+            ))
+            return
+
+        result = EarningsLedger.repair(teachers)
+        remaining = EarningsLedger.find_drift()
+        style = self.style.ERROR if remaining else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Repaired {len(teachers)} teachers: {result['entries']} ledger entries, "
+            f"{result['adjustments']} adjustments, {len(remaining)} mismatches left ({time.time() - start:.1f}s)"
+        ))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from courses.rollup_service import RevenueRollups
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Recompute revenue rollups for days touched by payments, refunds and payouts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help="Mark every day with activity before draining")
+        parser.add_argument('--since', type=str, help="With --backfill: only days from YYYY-MM-DD on")
+        parser.add_argument('--batch-size', type=int, default=31, help="Days recomputed per transaction")
+        parser.add_argument('--poll-interval', type=float, default=10.0, help="Seconds to sleep when idle")
+        parser.add_argument('--once', action='store_true', help="Drain the dirty days and exit")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if not since:
+                raise CommandError("--since must be YYYY-MM-DD")
+
+        if options['backfill']:
+            start = time.time()
+            self.stdout.write(f"Marked {RevenueRollups.mark_all(since)} days for backfill")
+            run_worker(lambda: RevenueRollups.process_dirty(options['batch_size']), once=True, log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f"Backfill finished in {time.time() - start:.1f}s"))
+            return
+
+        self.stdout.write("Revenue rollup worker started")
+        run_worker(
+            lambda: RevenueRollups.process_dirty(options['batch_size']),
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+            log=self.stdout.write
+        )
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from courses.job_queue import claim_jobs
+from courses.models import MockTestAttempt
+from courses.pdf_service import ScorecardJobProcessor
+
+
+class Command(BaseCommand):
+    help = "Re-render scorecards for many completed attempts in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempt-ids', type=int, nargs='+', help="Specific attempt IDs")
+        parser.add_argument('--mock-test', type=int, help="Only attempts of this mock test")
+        parser.add_argument('--since', type=str, help="Only attempts submitted on/after YYYY-MM-DD")
+        parser.add_argument('--failed-only', action='store_true', help="Only attempts whose scorecard failed")
+        parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default SCORECARD_RENDER_WORKERS)")
+        parser.add_argument('--chunk-size', type=int, default=100, help="Attempts loaded per chunk")
+
+    def handle(self, *args, **options):
+        attempts = MockTestAttempt.objects.filter(status='COMPLETED')
+
+        if options['attempt_ids']:
+            attempts = attempts.filter(id__in=options['attempt_ids'])
+        if options['mock_test']:
+            attempts = attempts.filter(mock_test_id=options['mock_test'])
+        if options['since']:
+            attempts = attempts.filter(submitted_at__date__gte=parse_date(options['since']))
+        if options['failed_only']:
+            attempts = attempts.filter(scorecard_status='FAILED')
+
+        # Scorecards already being rendered (by a worker or another run) are left alone
+        skipped = attempts.filter(scorecard_status='RENDERING').count()
+        attempt_ids = list(
+            attempts.exclude(scorecard_status='RENDERING').order_by('id').values_list('id', flat=True)
+        )
+        if not attempt_ids:
+            self.stdout.write(f"No attempts to regenerate ({skipped} already rendering)")
+            return
+
+        start = time.time()
+        rendered = failed = 0
+        chunk_size = options['chunk_size']
+
+        with ScorecardJobProcessor.create_executor(options['workers']) as executor:
+            for i in range(0, len(attempt_ids), chunk_size):
+                chunk_ids = attempt_ids[i:i + chunk_size]
+                # Claim right before rendering, the same way the worker does, so a
+                # row picked up meanwhile is skipped and the fresh timestamp keeps
+                # the stale requeue from handing ours to a worker
+                claimed = claim_jobs(
+                    MockTestAttempt.objects.filter(id__in=chunk_ids)
+                    .exclude(scorecard_status='RENDERING').order_by('id'),
+                    batch_size=len(chunk_ids),
+                    scorecard_status='RENDERING',
+                    scorecard_requested_at=timezone.now()
+                )
+                skipped += len(chunk_ids) - len(claimed)
+                chunk = MockTestAttempt.objects.filter(
+                    id__in=[attempt.id for attempt in claimed]
+                ).select_related('mock_test', 'student')
+                ok, bad = ScorecardJobProcessor.render_attempts(chunk, executor)
+                rendered += ok
+                failed += bad
+                self.stdout.write(f"{i + len(chunk_ids)}/{len(attempt_ids)} processed")
+
+        elapsed = time.time() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} scorecards ({failed} failed, {skipped} already rendering) in {elapsed:.1f}s "
+            f"({rendered / elapsed if elapsed else 0:.1f}/s)"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from courses.payment_service import EscrowManager
+from courses.job_queue import run_worker
+
+
+class Command(BaseCommand):
+    help = "Release due escrow payments in batches and send teacher payouts in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Payments claimed per batch (default ESCROW_RELEASE_BATCH_SIZE)")
+        parser.add_argument('--workers', type=int, default=None, help="Concurrent payout transfers (default ESCROW_PAYOUT_WORKERS)")
+        parser.add_argument('--poll-interval', type=float, default=300.0, help="Seconds between runs when polling")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of running once (e.g. from cron)")
+
+    def release(self):
+        report = EscrowManager.release_due_payments(
+            batch_size=self.options['batch_size'],
+            max_workers=self.options['workers'],
+            log=self.stdout.write
+        )
+        style = self.style.WARNING if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{report['released']} released, {report['retried']} payout(s) retried "
+            f"({report['paid']} paid, {report['failed']} failed), "
+            f"{report['skipped']} without verified bank account, {report['scheduled']} newly scheduled, "
+            f"{report['seconds']}s ({report['per_second']} payouts/s)"
+        ))
+        return report['released']
+
+    def handle(self, *args, **options):
+        self.options = options
+        if not options['loop']:
+            self.release()
+            return
+
+        self.stdout.write("Escrow release worker started")
+        run_worker(self.release, poll_interval=options['poll_interval'], log=self.stdout.write)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from courses.rtc_stub import StubVideoSDKServer
+
+
+class Command(BaseCommand):
+    help = "Serve a local stand-in for the VideoSDK room and recording APIs (set VIDEOSDK_API_URL to its address)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay-ms', type=int, default=0, help="Artificial latency per API call")
+
+    def handle(self, *args, **options):
+        server = StubVideoSDKServer(options['port'], options['delay_ms'] / 1000)
+        self.stdout.write(f"VideoSDK stub listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(f"Stopped after creating {server.rooms_created} room(s)")
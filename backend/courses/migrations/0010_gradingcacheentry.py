@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_mocktestgenerationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GradingCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("answer_hash", models.CharField(max_length=64)),
+                ("expected_answer_hash", models.CharField(max_length=64)),
+                ("normalized_answer", models.TextField()),
+                ("score", models.DecimalField(decimal_places=3, max_digits=4)),
+                ("is_correct", models.BooleanField(default=False)),
+                ("feedback", models.TextField(blank=True, null=True)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grade_cache",
+                        to="courses.mocktestquestion",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("question", "answer_hash")},
+            },
+        ),
+    ]
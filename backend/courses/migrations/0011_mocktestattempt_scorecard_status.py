@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_scorecards_ready(apps, schema_editor):
+    MockTestAttempt = apps.get_model("courses", "MockTestAttempt")
+    MockTestAttempt.objects.exclude(scorecard_pdf="").exclude(
+        scorecard_pdf__isnull=True
+    ).update(scorecard_status="READY")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_gradingcacheentry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mocktestattempt",
+            name="scorecard_error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mocktestattempt",
+            name="scorecard_requested_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mocktestattempt",
+            name="scorecard_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("RENDERING", "Rendering"),
+                    ("READY", "Ready"),
+                    ("FAILED", "Failed"),
+                ],
+                max_length=20,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mocktestattempt",
+            index=models.Index(
+                fields=["scorecard_status", "scorecard_requested_at"],
+                name="courses_moc_scoreca_771551_idx",
+            ),
+        ),
+        migrations.RunPython(mark_existing_scorecards_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_mocktestattempt_scorecard_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatementRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.DateField(unique=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RUNNING",
+                        max_length=20,
+                    ),
+                ),
+                ("student_checkpoint", models.PositiveIntegerField(default=0)),
+                ("teacher_checkpoint", models.PositiveIntegerField(default=0)),
+                ("statements_count", models.PositiveIntegerField(default=0)),
+                ("failed_count", models.PositiveIntegerField(default=0)),
+                ("invoices_count", models.PositiveIntegerField(default=0)),
+                (
+                    "manifest_file",
+                    models.FileField(blank=True, null=True, upload_to="statements/"),
+                ),
+                (
+                    "archive_file",
+                    models.FileField(blank=True, null=True, upload_to="statements/"),
+                ),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-period"],
+            },
+        ),
+        migrations.CreateModel(
+            name="Statement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("STUDENT", "Student"), ("TEACHER", "Teacher")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "pdf_file",
+                    models.FileField(blank=True, null=True, upload_to="statements/"),
+                ),
+                ("checksum", models.CharField(blank=True, max_length=64)),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                (
+                    "total_debits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "total_credits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statements",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statements",
+                        to="courses.statementrun",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["run", "role", "user"],
+                "unique_together": {("run", "user", "role")},
+            },
+        ),
+    ]
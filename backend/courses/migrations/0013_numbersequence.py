@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    NumberSequence = apps.get_model("courses", "NumberSequence")
+    for name in ("invoice", "ticket"):
+        NumberSequence.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_statementrun_statement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberSequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("next_value", models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
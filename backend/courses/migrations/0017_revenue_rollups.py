@@ -0,0 +1,122 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0016_earnings_ledger"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevenueRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("DAY", "Day"), ("MONTH", "Month")], max_length=10
+                    ),
+                ),
+                ("bucket", models.DateField()),
+                (
+                    "gross_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "platform_commission",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "teacher_earnings",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("payments_count", models.PositiveIntegerField(default=0)),
+                (
+                    "refunds",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("refunds_count", models.PositiveIntegerField(default=0)),
+                (
+                    "payouts",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["period", "bucket"],
+            },
+        ),
+        migrations.CreateModel(
+            name="RevenueRollupDirtyDay",
+            fields=[
+                ("day", models.DateField(primary_key=True, serialize=False)),
+                ("marked_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["captured_at"], name="courses_pay_capture_3865eb_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payout",
+            index=models.Index(
+                fields=["completed_at"], name="courses_pay_complet_a7adf5_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="refund",
+            index=models.Index(
+                fields=["completed_at"], name="courses_ref_complet_8cb5e5_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="revenuerollup",
+            name="teacher",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="revenue_rollups",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="revenuerollup",
+            index=models.Index(
+                fields=["teacher", "period", "bucket"],
+                name="courses_rev_teacher_02dab9_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="revenuerollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("teacher__isnull", False)),
+                fields=("period", "bucket", "teacher"),
+                name="unique_teacher_revenue_bucket",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="revenuerollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("teacher__isnull", True)),
+                fields=("period", "bucket"),
+                name="unique_platform_revenue_bucket",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0017_revenue_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WhiteboardSnapshot",
+            fields=[
+                (
+                    "session",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="whiteboard_snapshot",
+                        serialize=False,
+                        to="courses.session",
+                    ),
+                ),
+                ("last_seq", models.BigIntegerField(default=0)),
+                ("elements", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="WhiteboardOp",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("payload", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="whiteboard_ops",
+                        to="courses.session",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["session", "id"], name="courses_whi_session_69ae53_idx"
+                    )
+                ],
+            },
+        ),
+    ]
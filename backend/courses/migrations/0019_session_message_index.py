@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:03
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0018_whiteboard_log"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sessionmessage",
+            name="sent_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="sessionmessage",
+            index=models.Index(
+                fields=["session", "sent_at"], name="courses_ses_session_d3e994_idx"
+            ),
+        ),
+    ]
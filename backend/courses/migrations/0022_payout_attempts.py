@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0021_recording_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payout",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -2,10 +2,6 @@
 Machine Learning recommendation engine
 """
 
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
 from typing import List, Dict
 from django.db.models import Avg, Count, Q, Sum
 from datetime import datetime, timedelta
@@ -118,8 +118,8 @@ class Session(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    provider_room_id = models.CharField(max_length=128, blank=True, null=True)
-    recording_assets = models.JSONField(default=list, blank=True)
+    provider_room_id = models.CharField(max_length=128, blank=True, null=True, db_index=True)
+    recording_assets = models.JSONField(default=list, blank=True)  # [{url, size_bytes, duration_seconds, format}]
     started_at = models.DateTimeField(blank=True, null=True)
     ended_at = models.DateTimeField(blank=True, null=True)
 
@@ -282,7 +282,13 @@ class SessionMessage(models.Model):
     session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
-    sent_at = models.DateTimeField(auto_now_add=True)
+    # Set when the consumer receives the message; rows are written later in batches
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'sent_at']),
+        ]
 
 
 from django.db import models
@@ -764,6 +770,27 @@ class MockTestQuestion(models.Model):
     
     def __str__(self):
         return f"Q{self.order}: {self.question_text[:50]}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What cached grades were computed against, so save() can tell if it changed
+        loaded = dict(zip(field_names, values))
+        instance._graded_against = (loaded.get('correct_answer'), loaded.get('points'))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        graded_against = None if self._state.adding else getattr(self, '_graded_against', (None, None))
+        super().save(*args, **kwargs)
+        
+        # Cached grades are only valid for the expected answer and points they were graded against
+        if graded_against is not None and graded_against != (self.correct_answer, self.points):
+            from .grading_cache import GradingCache
+            stale = self.grade_cache.all()
+            if graded_against[1] == self.points:
+                stale = stale.exclude(expected_answer_hash=GradingCache.hash_text(self.correct_answer))
+            stale.delete()
+        self._graded_against = (self.correct_answer, self.points)
 
 
 class MockTestAttempt(models.Model):
@@ -775,6 +802,13 @@ class MockTestAttempt(models.Model):
         ('ABANDONED', 'Abandoned'),
     ]
     
+    SCORECARD_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RENDERING', 'Rendering'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    
     mock_test = models.ForeignKey(
         MockTest,
         on_delete=models.CASCADE,
@@ -800,13 +834,17 @@ class MockTestAttempt(models.Model):
     submitted_at = models.DateTimeField(null=True, blank=True)
     time_taken_minutes = models.PositiveIntegerField(default=0)
     
-    # PDF report
+    # PDF report (rendered off-request by the scorecard worker)
     scorecard_pdf = models.FileField(upload_to='scorecards/', null=True, blank=True)
+    scorecard_status = models.CharField(max_length=20, choices=SCORECARD_STATUS_CHOICES, blank=True, null=True)
+    scorecard_error = models.TextField(blank=True, null=True)
+    scorecard_requested_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-started_at']
         indexes = [
             models.Index(fields=['student', 'status', 'started_at']),
+            models.Index(fields=['scorecard_status', 'scorecard_requested_at']),
         ]
     
     def __str__(self):
@@ -844,6 +882,95 @@ class MockTestAnswer(models.Model):
         return f"{self.attempt.student.email} - Q{self.question.order}"
 
 
+class GradingCacheEntry(models.Model):
+    """Cached LLM grade for a normalized short answer to a question"""
+    
+    question = models.ForeignKey(
+        MockTestQuestion,
+        on_delete=models.CASCADE,
+        related_name='grade_cache'
+    )
+    
+    # Cache key
+    answer_hash = models.CharField(max_length=64)  # sha256 of normalized student answer
+    expected_answer_hash = models.CharField(max_length=64)  # sha256 of correct_answer when graded
+    normalized_answer = models.TextField()
+    
+    # Grade
+    score = models.DecimalField(max_digits=4, decimal_places=3)  # 0-1
+    is_correct = models.BooleanField(default=False)
+    feedback = models.TextField(blank=True, null=True)
+    
+    # Usage
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('question', 'answer_hash')
+    
+    def __str__(self):
+        return f"Q{self.question_id} '{self.normalized_answer[:30]}' -> {self.score}"
+
+
+class MockTestGenerationJob(models.Model):
+    """Background job that generates a mock test from session content"""
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    session = models.ForeignKey(
+        'Session',
+        on_delete=models.CASCADE,
+        related_name='test_generation_jobs'
+    )
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='test_generation_jobs'
+    )
+    mock_test = models.ForeignKey(
+        MockTest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='generation_jobs'
+    )
+
+    # Request parameters
+    difficulty = models.CharField(max_length=20, choices=MockTest.DIFFICULTY_CHOICES, default='MEDIUM')
+    num_questions = models.PositiveIntegerField(default=10)
+    idempotency_key = models.CharField(max_length=100)
+
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    stage = models.CharField(max_length=50, blank=True, null=True)  # extracting, generating, saving
+    progress = models.PositiveIntegerField(default=0)  # 0-100
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ('session', 'idempotency_key')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['student', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} - {self.session.title} ({self.status}, {self.progress}%)"
+
+
 class SessionSummary(models.Model):
     """AI-generated summaries of live sessions"""
     
@@ -1174,9 +1301,8 @@ class SupportTicket(models.Model):
     def save(self, *args, **kwargs):
         if not self.ticket_number:
             # Generate ticket number
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            self.ticket_number = f"TKT-{timestamp}"
+            from .numbering import NumberAllocator
+            self.ticket_number = NumberAllocator.next_number('ticket')
         super().save(*args, **kwargs)
 
 
@@ -1292,6 +1418,8 @@ class Payment(models.Model):
             models.Index(fields=['student', 'status']),
             models.Index(fields=['razorpay_order_id']),
             models.Index(fields=['status', 'is_held_in_escrow']),
+            models.Index(fields=['status', 'released_from_escrow', 'escrow_release_date']),
+            models.Index(fields=['captured_at']),
         ]
     
     def __str__(self):
@@ -1350,12 +1478,17 @@ class Payout(models.Model):
     
     # Error handling
     failure_reason = models.TextField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)  # Transfer attempts, capped by ESCROW_PAYOUT_MAX_ATTEMPTS
+    
+    # Sent with the transfer so a retried payout can find an earlier attempt
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['teacher', 'status']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['completed_at']),
         ]
     
     def __str__(self):
@@ -1424,6 +1557,8 @@ class Refund(models.Model):
         indexes = [
             models.Index(fields=['student', 'status']),
             models.Index(fields=['status', 'requested_at']),
+            models.Index(fields=['payment', 'status']),
+            models.Index(fields=['completed_at']),
         ]
     
     def __str__(self):
@@ -1469,9 +1604,8 @@ class Invoice(models.Model):
     
     def generate_invoice_number(self):
         """Generate unique invoice number"""
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        self.invoice_number = f"INV-{timestamp}-{self.payment.id}"
+        from .numbering import NumberAllocator
+        self.invoice_number = NumberAllocator.next_number('invoice')
         return self.invoice_number
 
 
@@ -1504,3 +1638,329 @@ class TeacherBankAccount(models.Model):
     
     def __str__(self):
         return f"{self.teacher.email} - {self.bank_name}"
+
+
+class StatementRun(models.Model):
+    """Month-end statement generation run (resumable, see generate_statements command)"""
+    
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    period = models.DateField(unique=True)  # First day of the statement month
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RUNNING')
+    
+    # Resume points: statements are generated in user id order per role
+    student_checkpoint = models.PositiveIntegerField(default=0)
+    teacher_checkpoint = models.PositiveIntegerField(default=0)
+    
+    statements_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    invoices_count = models.PositiveIntegerField(default=0)
+    
+    manifest_file = models.FileField(upload_to='statements/', blank=True, null=True)
+    archive_file = models.FileField(upload_to='statements/', blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-period']
+    
+    def __str__(self):
+        return f"Statements {self.period:%Y-%m} ({self.status})"
+
+
+class Statement(models.Model):
+    """Monthly account statement for one student or teacher"""
+    
+    ROLE_CHOICES = [
+        ('STUDENT', 'Student'),
+        ('TEACHER', 'Teacher'),
+    ]
+    
+    run = models.ForeignKey(StatementRun, on_delete=models.CASCADE, related_name='statements')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statements')
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    
+    pdf_file = models.FileField(upload_to='statements/', blank=True, null=True)
+    checksum = models.CharField(max_length=64, blank=True)  # sha256 of the PDF
+    
+    # Totals (student: charged/refunded, teacher: earned/paid out)
+    line_count = models.PositiveIntegerField(default=0)
+    total_debits = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_credits = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('run', 'user', 'role')
+        ordering = ['run', 'role', 'user']
+    
+    def __str__(self):
+        return f"{self.get_role_display()} statement {self.run.period:%Y-%m} - user {self.user_id}"
+
+
+class NumberSequence(models.Model):
+    """Counter behind invoice and ticket numbers (see courses/numbering.py)"""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """Razorpay webhook inbox, drained in batches by process_payment_webhooks"""
+    
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('PROCESSING', 'Processing'),
+        ('PROCESSED', 'Processed'),
+        ('IGNORED', 'Ignored'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    event_id = models.CharField(max_length=100, unique=True)  # X-Razorpay-Event-Id
+    event = models.CharField(max_length=50)
+    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
+    payload = models.JSONField()
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    
+    received_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} {self.event_id} ({self.status})"
+
+
+class TeacherBalance(models.Model):
+    """Running earnings totals for one teacher, maintained by courses/ledger_service.py"""
+    
+    teacher = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='earnings_balance'
+    )
+    
+    captured = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Teacher share of captured payments
+    in_escrow = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_out = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_payouts = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def available_for_payout(self):
+        return self.captured - self.in_escrow - self.paid_out - self.pending_payouts
+    
+    def __str__(self):
+        return f"{self.teacher_id}: {self.captured} captured, {self.paid_out} paid out"
+
+
+class EarningsLedgerEntry(models.Model):
+    """Append-only change to a TeacherBalance, tied to the payment or payout that caused it"""
+    
+    ENTRY_TYPES = [
+        ('CAPTURE', 'Payment Captured'),
+        ('ESCROW_RELEASE', 'Released from Escrow'),
+        ('REVERSAL', 'Payment Reversed'),
+        ('PAYOUT_QUEUED', 'Payout Queued'),
+        ('PAYOUT_COMPLETED', 'Payout Completed'),
+        ('PAYOUT_FAILED', 'Payout Failed'),
+        ('ADJUSTMENT', 'Reconciliation Adjustment'),
+    ]
+    
+    teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name='earnings_ledger')
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES)
+    payment = models.ForeignKey(
+        Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries'
+    )
+    payout = models.ForeignKey(
+        Payout, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries'
+    )
+    
+    # Signed deltas applied to the matching TeacherBalance columns
+    captured = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    in_escrow = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_out = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_payouts = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['teacher', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_entry_type_display()} for teacher {self.teacher_id}"
+
+
+class RevenueRollup(models.Model):
+    """Pre-aggregated revenue for one day or month, per teacher or platform-wide (teacher NULL)"""
+    
+    PERIOD_CHOICES = [
+        ('DAY', 'Day'),
+        ('MONTH', 'Month'),
+    ]
+    
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket = models.DateField()  # The day, or the first day of the month
+    teacher = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revenue_rollups'
+    )
+    
+    # Payments captured in the bucket
+    gross_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    platform_commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    teacher_earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments_count = models.PositiveIntegerField(default=0)
+    
+    # Refunds and payouts completed in the bucket
+    refunds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds_count = models.PositiveIntegerField(default=0)
+    payouts = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period', 'bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'bucket', 'teacher'],
+                condition=models.Q(teacher__isnull=False),
+                name='unique_teacher_revenue_bucket'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'bucket'],
+                condition=models.Q(teacher__isnull=True),
+                name='unique_platform_revenue_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['teacher', 'period', 'bucket']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_period_display()} {self.bucket} - {self.teacher_id or 'platform'}"
+
+
+class RevenueRollupDirtyDay(models.Model):
+    """Day whose rollups must be recomputed (see courses/rollup_service.py)"""
+    
+    day = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return str(self.day)
+
+
+class WhiteboardOp(models.Model):
+    """Append-only whiteboard operation; the id doubles as the board sequence number"""
+    
+    id = models.BigAutoField(primary_key=True)
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='whiteboard_ops')
+    payload = models.JSONField()  # {"type": "draw_ops", "elements": [...]} or {"type": "clear"}
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['session', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"Whiteboard op {self.id} ({self.session_id})"
+
+
+class WhiteboardSnapshot(models.Model):
+    """Compacted whiteboard state up to and including op last_seq"""
+    
+    session = models.OneToOneField(
+        Session,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='whiteboard_snapshot'
+    )
+    last_seq = models.BigIntegerField(default=0)
+    elements = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Whiteboard snapshot {self.session_id} @ {self.last_seq}"
+
+
+class SessionPresence(models.Model):
+    """One open presence socket of a session participant"""
+    
+    channel_name = models.CharField(max_length=255, unique=True)
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='presence')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_presence')
+    connected_at = models.DateTimeField(auto_now_add=True)
+    # Refreshed by heartbeats; rows older than PRESENCE_TIMEOUT_SECONDS belong to dead sockets
+    last_seen = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'last_seen']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} in session {self.session_id}"
+
+
+class RecordingEvent(models.Model):
+    """VideoSDK recording webhook inbox, drained in batches by process_recording_events"""
+    
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('PROCESSING', 'Processing'),
+        ('PROCESSED', 'Processed'),
+        ('IGNORED', 'Ignored'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    event_id = models.CharField(max_length=100, unique=True)  # Hash of the webhook body
+    event = models.CharField(max_length=50)
+    room_id = models.CharField(max_length=128, blank=True, null=True)
+    payload = models.JSONField()
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    
+    received_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} {self.room_id} ({self.status})"
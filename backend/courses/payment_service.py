@@ -5,18 +5,44 @@ Razorpay payment processing service
 import razorpay
 import hmac
 import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from django.conf import settings
+from django.db import connection, transaction
 from decimal import Decimal
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
 from django.utils import timezone
+from .http_client import OutboundHTTP
+
+OPEN_REFUND_STATUSES = ['REQUESTED', 'APPROVED', 'PROCESSING']
+
+
+@lru_cache(maxsize=None)
+def get_razorpay_client():
+    """
+    Process-wide Razorpay client on the shared outbound session
+    
+    The client is stateless apart from its credentials, so views and
+    payout workers all reuse it (and its warm connections to the API).
+    """
+    client = razorpay.Client(
+        session=OutboundHTTP.session(),
+        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+    )
+    client.set_app_details({"title": "EliteClassroom", "version": "1.0"})
+    return client
 
 
 class RazorpayService:
     """Wrapper for Razorpay API"""
     
     def __init__(self):
-        self.client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        self.client.set_app_details({"title": "EliteClassroom", "version": "1.0"})
+        self.client = get_razorpay_client()
     
     def create_order(self, amount, currency='INR', receipt=None, notes=None):
         """
@@ -64,6 +90,19 @@ class RazorpayService:
         except razorpay.errors.SignatureVerificationError:
             return False
     
+    @staticmethod
+    def verify_webhook_signature(body: bytes, signature: str) -> bool:
+        """
+        Check X-Razorpay-Signature (HMAC-SHA256 of the raw body)
+        
+        Static so webhook requests don't build an API client.
+        """
+        secret = settings.RAZORPAY_WEBHOOK_SECRET
+        if not secret or not signature:
+            return False
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+    
     def capture_payment(self, payment_id, amount, currency='INR'):
         """
         Manually capture a payment (if auto-capture disabled)
@@ -110,7 +149,7 @@ class RazorpayService:
         """Get refund details"""
         return self.client.refund.fetch(refund_id)
     
-    def create_transfer(self, payment_id, amount, account_id, currency='INR', notes=None):
+    def create_transfer(self, payment_id, amount, account_id, currency='INR', notes=None, idempotency_key=None):
         """
         Transfer funds to linked account (teacher payout)
         
@@ -120,6 +159,7 @@ class RazorpayService:
             account_id: Razorpay account ID of recipient
             currency: Currency code
             notes: Additional metadata
+            idempotency_key: Stored in the transfer notes (see find_transfer)
         
         Returns:
             Transfer dict
@@ -132,11 +172,26 @@ class RazorpayService:
             'currency': currency
         }
         
-        if notes:
-            data['notes'] = notes
+        if notes or idempotency_key:
+            data['notes'] = dict(notes or {})
+            if idempotency_key:
+                data['notes']['idempotency_key'] = idempotency_key
         
         transfer = self.client.payment.transfer(payment_id, data)
         return transfer
+    
+    def find_transfer(self, payment_id, idempotency_key):
+        """
+        Look up a transfer made earlier for the same idempotency key
+        
+        Returns:
+            Transfer dict or None
+        """
+        transfers = self.client.payment.transfers(payment_id)
+        for transfer in transfers.get('items', []):
+            if (transfer.get('notes') or {}).get('idempotency_key') == idempotency_key:
+                return transfer
+        return None
 
 
 class EscrowManager:
@@ -152,8 +207,6 @@ class EscrowManager:
         - Escrow hold period has passed
         - No active disputes
         """
-        from .models import Session
-        
         if not payment.is_held_in_escrow:
             return False
         
@@ -166,17 +219,15 @@ class EscrowManager:
             if session.status != 'COMPLETED':
                 return False
             
-            # Check hold period
-            if not payment.escrow_release_date:
-                # Set release date if not set
-                payment.escrow_release_date = session.ended_at + timedelta(hours=settings.ESCROW_HOLD_HOURS)
-                payment.save()
-            
-            if timezone.now() < payment.escrow_release_date:
+            # Check hold period (release date is stored by schedule_releases)
+            release_date = payment.escrow_release_date or (
+                (session.ended_at or session.updated_at) + timedelta(hours=settings.ESCROW_HOLD_HOURS)
+            )
+            if timezone.now() < release_date:
                 return False
             
             # Check for active disputes/refunds
-            if payment.refunds.filter(status__in=['REQUESTED', 'APPROVED', 'PROCESSING']).exists():
+            if payment.refunds.filter(status__in=OPEN_REFUND_STATUSES).exists():
                 return False
         
         return True
@@ -204,71 +255,539 @@ class EscrowManager:
             # Cannot process payout without verified bank account
             return None
         
-        # Create payout
-        payout = Payout.objects.create(
-            teacher=teacher,
-            payment=payment,
-            amount=payment.teacher_amount,
-            currency=payment.currency,
-            razorpay_account_id=bank_account.razorpay_account_id,
-            bank_account_number=bank_account.account_number[-4:],  # Last 4 digits only
-            bank_ifsc=bank_account.ifsc_code,
-            bank_name=bank_account.bank_name,
-            status='PENDING'
-        )
-        
-        # Mark payment as released
-        payment.released_from_escrow = True
-        payment.save()
+        from .ledger_service import EarningsLedger
+        
+        with transaction.atomic():
+            # Create payout
+            payout = Payout.objects.create(
+                teacher=teacher,
+                payment=payment,
+                amount=payment.teacher_amount,
+                currency=payment.currency,
+                razorpay_account_id=bank_account.razorpay_account_id,
+                bank_account_number=bank_account.account_number[-4:],  # Last 4 digits only
+                bank_ifsc=bank_account.ifsc_code,
+                bank_name=bank_account.bank_name,
+                status='PENDING',
+                idempotency_key=PayoutProcessor.idempotency_key(payment)
+            )
+            
+            # Mark payment as released
+            payment.released_from_escrow = True
+            payment.save()
+            
+            EarningsLedger.sync_payments([payment.id])
+            EarningsLedger.sync_payouts([payout.id])
         
         # Process payout asynchronously (can be Celery task)
         PayoutProcessor.process_payout(payout)
         
         return payout
+    
+    @staticmethod
+    def schedule_releases() -> int:
+        """
+        Store escrow_release_date on held payments that became due for one
+        
+        Session payments are released ESCROW_HOLD_HOURS after the session
+        ended (falling back to its last update when ended_at was never
+        set); course payments have no hold. Two UPDATE statements, so the
+        release query below can filter on an indexed column.
+        
+        Returns:
+            Number of payments scheduled
+        """
+        from django.db.models import DateTimeField, ExpressionWrapper, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+        from .models import Payment, Session
+        
+        unscheduled = Payment.objects.filter(
+            status='CAPTURED', is_held_in_escrow=True,
+            released_from_escrow=False, escrow_release_date__isnull=True
+        )
+        
+        session_end = Subquery(
+            Session.objects.filter(pk=OuterRef('session_id'))
+            .annotate(end=Coalesce('ended_at', 'updated_at'))
+            .values('end')[:1]
+        )
+        scheduled = unscheduled.filter(session__status='COMPLETED').update(
+            escrow_release_date=ExpressionWrapper(
+                session_end + Value(timedelta(hours=settings.ESCROW_HOLD_HOURS)),
+                output_field=DateTimeField()
+            )
+        )
+        scheduled += unscheduled.filter(session__isnull=True, course__isnull=False).update(
+            escrow_release_date=Coalesce('captured_at', 'created_at')
+        )
+        return scheduled
+    
+    @staticmethod
+    def releasable_payments():
+        """
+        Captured, held, due payments with no open refund and no payout
+        
+        Payments whose session and course were both deleted have no teacher
+        to pay and are left out. PARTIALLY_REFUNDED payments are never
+        released automatically; their remaining teacher share is settled by
+        an operator.
+        """
+        from django.db.models import Exists, OuterRef, Q
+        from .models import Payment, Payout, Refund
+        
+        open_refunds = Refund.objects.filter(payment=OuterRef('pk'), status__in=OPEN_REFUND_STATUSES)
+        payouts = Payout.objects.filter(payment=OuterRef('pk'))
+        
+        return (
+            Payment.objects
+            .filter(
+                status='CAPTURED', is_held_in_escrow=True, released_from_escrow=False,
+                escrow_release_date__lte=timezone.now()
+            )
+            .filter(Q(session__isnull=True) | Q(session__status='COMPLETED'))
+            .filter(Q(session__isnull=False) | Q(course__isnull=False))
+            .filter(~Exists(open_refunds), ~Exists(payouts))
+        )
+    
+    @staticmethod
+    def claim_releases(batch_size: int = 100, after_id: int = 0):
+        """
+        Release one batch of due payments and create their payouts
+        
+        Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED, so several
+        workers can release concurrently. Payments whose teacher has no
+        verified bank account stay held; after_id moves the scan past them.
+        
+        Args:
+            batch_size: Max payments examined
+            after_id: Only payments with a larger primary key
+        
+        Returns:
+            (payouts created, payments skipped, last payment id examined)
+        """
+        from .models import Payment, Payout, TeacherBankAccount
+        from .ledger_service import EarningsLedger
+        
+        with transaction.atomic():
+            payments = list(
+                EscrowManager.releasable_payments()
+                .filter(pk__gt=after_id)
+                .select_related('session', 'course')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('pk')[:batch_size]
+            )
+            if not payments:
+                return [], 0, None
+            
+            def teacher_id(payment):
+                return payment.session.teacher_id if payment.session else payment.course.teacher_id
+            
+            accounts = {
+                account.teacher_id: account
+                for account in TeacherBankAccount.objects.filter(
+                    teacher_id__in={teacher_id(p) for p in payments}, is_verified=True
+                )
+            }
+            
+            payouts = []
+            for payment in payments:
+                account = accounts.get(teacher_id(payment))
+                if not account:
+                    continue
+                payouts.append(Payout(
+                    teacher_id=account.teacher_id,
+                    payment=payment,
+                    amount=payment.teacher_amount,
+                    currency=payment.currency,
+                    razorpay_account_id=account.razorpay_account_id,
+                    bank_account_number=account.account_number[-4:],  # Last 4 digits only
+                    bank_ifsc=account.ifsc_code,
+                    bank_name=account.bank_name,
+                    status='PENDING',
+                    idempotency_key=PayoutProcessor.idempotency_key(payment)
+                ))
+            
+            Payout.objects.bulk_create(payouts)
+            Payment.objects.filter(id__in=[payout.payment_id for payout in payouts]).update(released_from_escrow=True)
+            
+            EarningsLedger.sync_payments([payout.payment_id for payout in payouts])
+            EarningsLedger.sync_payouts(
+                Payout.objects.filter(payment_id__in=[payout.payment_id for payout in payouts]).values_list('id', flat=True)
+            )
+        
+        created = list(
+            Payout.objects.select_related('payment', 'teacher')
+            .filter(payment_id__in=[payout.payment_id for payout in payouts])
+        )
+        return created, len(payments) - len(payouts), payments[-1].pk
+    
+    @staticmethod
+    def release_due_payments(batch_size: int = None, max_workers: int = None, log=print) -> Dict:
+        """
+        Release every due payment and dispatch the payouts
+        
+        Payouts are sent ESCROW_PAYOUT_WORKERS at a time; one thread pool
+        and one Razorpay client are shared by the whole run.
+        
+        Payouts left PROCESSING by a dead worker and FAILED payouts whose
+        backoff is over are retried before new payments are released.
+        
+        Returns:
+            Counts (scheduled, released, retried, paid, failed, skipped) plus
+            elapsed seconds and payouts per second
+        """
+        batch_size = batch_size or settings.ESCROW_RELEASE_BATCH_SIZE
+        max_workers = max_workers or settings.ESCROW_PAYOUT_WORKERS
+        
+        start = time.time()
+        report = {
+            'scheduled': EscrowManager.schedule_releases(),
+            'released': 0, 'retried': 0, 'paid': 0, 'failed': 0, 'skipped': 0
+        }
+        razorpay_service = RazorpayService()
+        caller = threading.get_ident()
+        
+        def dispatch(payout):
+            try:
+                return PayoutProcessor.process_payout(payout, razorpay_service)
+            finally:
+                # Pool threads each hold their own connection; never close the caller's
+                if threading.get_ident() != caller:
+                    connection.close()
+        
+        after_id = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Payouts left PROCESSING by a worker that died go out first, then failed ones
+            for kind, claim in (('stale', PayoutProcessor.claim_stale), ('failed', PayoutProcessor.due_retries)):
+                retries = claim(batch_size)
+                if retries:
+                    results = list(executor.map(dispatch, retries))
+                    report['retried'] += len(retries)
+                    report['paid'] += sum(results)
+                    report['failed'] += len(results) - sum(results)
+                    log(f"Retried {len(retries)} {kind} payout(s), {results.count(False)} failed")
+            
+            while True:
+                payouts, skipped, after_id = EscrowManager.claim_releases(batch_size, after_id)
+                if after_id is None:
+                    break
+                
+                results = list(executor.map(dispatch, payouts))
+                report['released'] += len(payouts)
+                report['paid'] += sum(results)
+                report['failed'] += len(results) - sum(results)
+                report['skipped'] += skipped
+                log(f"Released {len(payouts)} payment(s), {results.count(False)} payout(s) failed, {skipped} skipped")
+        
+        report['seconds'] = round(time.time() - start, 2)
+        report['per_second'] = round(report['released'] / report['seconds'], 1) if report['seconds'] else 0.0
+        return report
 
 
 class PayoutProcessor:
     """Handle teacher payouts"""
     
     @staticmethod
-    def process_payout(payout):
+    def idempotency_key(payment) -> str:
+        """One key per payment, since a payment has at most one payout"""
+        return f"payout_{payment.pk}"
+    
+    @staticmethod
+    def claim_stale(batch_size: int = 100, timeout_minutes: int = None) -> list:
+        """
+        Take back payouts whose worker died while they were PROCESSING
+        
+        Claimed payouts are marked FAILED so process_payout can send them
+        again. Their processed_at is kept, so it takes the retry path and
+        looks for a transfer under the payout's idempotency key before
+        creating one; a transfer that went through before the worker died
+        is recorded rather than paid twice.
+        
+        Returns:
+            Claimed payouts, ready for process_payout
+        """
+        from .models import Payout
+        from .job_queue import claim_jobs
+        from .ledger_service import EarningsLedger
+        
+        cutoff = timezone.now() - timedelta(minutes=timeout_minutes or settings.ESCROW_PAYOUT_TIMEOUT_MINUTES)
+        payouts = claim_jobs(
+            Payout.objects.filter(status='PROCESSING', processed_at__lt=cutoff).order_by('processed_at'),
+            batch_size=batch_size,
+            status='FAILED',
+            failure_reason='Worker stopped while the payout was processing'
+        )
+        if payouts:
+            EarningsLedger.sync_payouts([payout.id for payout in payouts])
+        return payouts
+    
+    @staticmethod
+    def due_retries(batch_size: int = 100) -> list:
+        """
+        FAILED payouts that are due for another transfer attempt
+        
+        After the n-th failed attempt a payout waits
+        ESCROW_PAYOUT_RETRY_MINUTES * 2**(n-1) from when that attempt
+        started. Payouts that used up ESCROW_PAYOUT_MAX_ATTEMPTS stay FAILED
+        for an operator. Nothing is locked here: process_payout's
+        conditional claim already keeps two runs from sending one payout.
+        
+        Returns:
+            Payouts ready for process_payout, oldest attempt first
+        """
+        from django.db.models import Q
+        from .models import Payout
+        
+        now = timezone.now()
+        due = Q(attempts=0)
+        for attempts in range(1, settings.ESCROW_PAYOUT_MAX_ATTEMPTS):
+            wait = timedelta(minutes=settings.ESCROW_PAYOUT_RETRY_MINUTES * 2 ** (attempts - 1))
+            due |= Q(attempts=attempts, processed_at__lte=now - wait)
+        
+        return list(
+            Payout.objects.filter(due, status='FAILED')
+            .select_related('payment', 'teacher')
+            .order_by('processed_at')[:batch_size]
+        )
+    
+    @staticmethod
+    def process_payout(payout, razorpay_service=None):
         """
         Process payout to teacher's bank account
         
+        Only PENDING or FAILED payouts are sent, and the status change to
+        PROCESSING is a conditional UPDATE, so two workers can never send
+        the same payout. A retry first looks for a transfer carrying the
+        payout's idempotency key and reuses it instead of paying twice.
+        
         Args:
             payout: Payout object
+            razorpay_service: Service to send with (defaults to one on the shared client)
         
         Returns:
             Boolean indicating success
         """
+        from django.db.models import F
+        from .models import Payout
+        from .ledger_service import EarningsLedger
+        
+        retry = payout.processed_at is not None
+        now = timezone.now()
+        with transaction.atomic():
+            claimed = Payout.objects.filter(id=payout.id, status__in=['PENDING', 'FAILED']).update(
+                status='PROCESSING', processed_at=now, attempts=F('attempts') + 1
+            )
+            if not claimed:
+                return False
+            EarningsLedger.sync_payouts([payout.id])
+        payout.status = 'PROCESSING'
+        payout.processed_at = now
+        
         try:
-            razorpay_service = RazorpayService()
+            razorpay_service = razorpay_service or RazorpayService()
             
-            # Update status
-            payout.status = 'PROCESSING'
-            payout.processed_at = timezone.now()
-            payout.save()
+            transfer = None
+            if retry and payout.idempotency_key:
+                transfer = razorpay_service.find_transfer(payout.payment.razorpay_payment_id, payout.idempotency_key)
             
             # Create transfer
-            transfer = razorpay_service.create_transfer(
+            transfer = transfer or razorpay_service.create_transfer(
                 payment_id=payout.payment.razorpay_payment_id,
                 amount=float(payout.amount),
                 account_id=payout.razorpay_account_id,
                 notes={
                     'payout_id': payout.id,
                     'teacher_email': payout.teacher.email
-                }
+                },
+                idempotency_key=payout.idempotency_key
             )
             
             payout.razorpay_transfer_id = transfer['id']
             payout.status = 'COMPLETED'
             payout.completed_at = timezone.now()
-            payout.save()
+            with transaction.atomic():
+                payout.save(update_fields=['razorpay_transfer_id', 'status', 'completed_at'])
+                EarningsLedger.sync_payouts([payout.id])
             
             return True
             
         except Exception as e:
             payout.status = 'FAILED'
             payout.failure_reason = str(e)
-            payout.save()
+            with transaction.atomic():
+                # attempts was counted in the claim above; the in-memory value may be behind
+                payout.save(update_fields=['status', 'failure_reason'])
+                EarningsLedger.sync_payouts([payout.id])
             return False
+
+
+class PaymentWebhookProcessor:
+    """Queue Razorpay webhooks in an inbox table and apply them in batches"""
+    
+    HANDLED_EVENTS = ('payment.authorized', 'payment.captured', 'payment.failed')
+    
+    # Webhooks never move a payment out of these (refunds are handled by our own views)
+    FINAL_STATUSES = ('REFUNDED', 'PARTIALLY_REFUNDED')
+    
+    PAYMENT_FIELDS = [
+        'status', 'razorpay_payment_id', 'payment_method', 'authorized_at',
+        'captured_at', 'error_code', 'error_description',
+    ]
+    
+    @staticmethod
+    def _entity(data) -> dict:
+        """payload.payment.entity of a webhook body, or {} when absent"""
+        entity = ((data.get('payload') or {}).get('payment') or {}).get('entity')
+        return entity if isinstance(entity, dict) else {}
+    
+    @staticmethod
+    def enqueue(body: bytes, event_id: Optional[str] = None):
+        """
+        Store a verified webhook body, ignoring redeliveries
+        
+        A single INSERT ... ON CONFLICT DO NOTHING on event_id, so the
+        webhook request never waits on payment rows.
+        
+        Args:
+            body: Raw request body
+            event_id: X-Razorpay-Event-Id (falls back to a hash of the body)
+        
+        Raises:
+            ValueError: body is not a JSON object
+        """
+        from .models import PaymentWebhookEvent
+        
+        data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Webhook body must be a JSON object")
+        
+        entity = PaymentWebhookProcessor._entity(data)
+        PaymentWebhookEvent.objects.bulk_create([
+            PaymentWebhookEvent(
+                event_id=event_id or hashlib.sha256(body).hexdigest(),
+                event=str(data.get('event', ''))[:50],
+                razorpay_order_id=entity.get('order_id'),
+                payload=data
+            )
+        ], ignore_conflicts=True)
+    
+    @staticmethod
+    def claim_batch(batch_size: int = 500) -> list:
+        """Claim queued events for this worker"""
+        from .models import PaymentWebhookEvent
+        from .job_queue import claim_jobs, requeue_stale_jobs
+        
+        requeue_stale_jobs(
+            PaymentWebhookEvent.objects.filter(status='PROCESSING'),
+            timeout_minutes=settings.PAYMENT_WEBHOOK_TIMEOUT_MINUTES,
+            status='QUEUED'
+        )
+        
+        return claim_jobs(
+            PaymentWebhookEvent.objects.filter(status='QUEUED').order_by('received_at'),
+            batch_size=batch_size,
+            status='PROCESSING',
+            started_at=timezone.now()
+        )
+    
+    @staticmethod
+    def _apply_event(payment, event) -> bool:
+        """Apply one event to a payment in memory; returns whether it changed anything"""
+        if payment.status in PaymentWebhookProcessor.FINAL_STATUSES:
+            return False
+        
+        entity = PaymentWebhookProcessor._entity(event.payload)
+        created_at = event.payload.get('created_at')
+        at = datetime.fromtimestamp(created_at, tz=dt_timezone.utc) if created_at else timezone.now()
+        
+        payment.razorpay_payment_id = payment.razorpay_payment_id or entity.get('id')
+        payment.payment_method = entity.get('method') or payment.payment_method
+        
+        if event.event == 'payment.captured':
+            payment.status = 'CAPTURED'
+            payment.captured_at = payment.captured_at or at
+            return True
+        
+        # A failed retry or a late authorization must not undo a capture
+        if payment.status == 'CAPTURED':
+            return False
+        
+        if event.event == 'payment.authorized':
+            payment.status = 'AUTHORIZED'
+            payment.authorized_at = payment.authorized_at or at
+        else:
+            payment.status = 'FAILED'
+            payment.error_code = entity.get('error_code')
+            payment.error_description = entity.get('error_description')
+        return True
+    
+    @staticmethod
+    def apply_events(events) -> Tuple[List[int], List[int]]:
+        """
+        Fold events into their payments and save them with one bulk_update
+        
+        Call inside a transaction so the earnings ledger is posted atomically
+        with the payment changes. Events are grouped by razorpay_order_id and applied in the order
+        Razorpay created them, so out-of-order delivery within a batch
+        ends in the right state.
+        
+        Returns:
+            (processed event ids, ignored event ids)
+        """
+        from .models import Payment
+        from .ledger_service import EarningsLedger
+        
+        by_order = defaultdict(list)
+        ignored = []
+        for event in events:
+            if event.event in PaymentWebhookProcessor.HANDLED_EVENTS and event.razorpay_order_id:
+                by_order[event.razorpay_order_id].append(event)
+            else:
+                ignored.append(event.id)
+        
+        payments = Payment.objects.in_bulk(list(by_order), field_name='razorpay_order_id')
+        
+        processed = []
+        changed = []
+        for order_id, order_events in by_order.items():
+            payment = payments.get(order_id)
+            if payment is None:
+                ignored.extend(event.id for event in order_events)
+                continue
+            
+            order_events.sort(key=lambda e: (e.payload.get('created_at') or 0, e.received_at))
+            applied = [PaymentWebhookProcessor._apply_event(payment, event) for event in order_events]
+            if any(applied):
+                changed.append(payment)
+            processed.extend(event.id for event in order_events)
+        
+        Payment.objects.bulk_update(changed, PaymentWebhookProcessor.PAYMENT_FIELDS, batch_size=500)
+        EarningsLedger.sync_payments([payment.id for payment in changed])
+        return processed, ignored
+    
+    @staticmethod
+    def process_batch(batch_size: int = 500) -> int:
+        """Claim and apply one batch of events; returns number of events handled"""
+        from django.db.models import F
+        from .models import PaymentWebhookEvent
+        
+        events = PaymentWebhookProcessor.claim_batch(batch_size)
+        if not events:
+            return 0
+        
+        ids = [event.id for event in events]
+        try:
+            with transaction.atomic():
+                processed, ignored = PaymentWebhookProcessor.apply_events(events)
+                now = timezone.now()
+                PaymentWebhookEvent.objects.filter(id__in=processed).update(status='PROCESSED', processed_at=now)
+                PaymentWebhookEvent.objects.filter(id__in=ignored).update(status='IGNORED', processed_at=now)
+        except Exception as e:
+            # Put the batch back until the attempt budget is spent
+            PaymentWebhookEvent.objects.filter(id__in=ids).update(attempts=F('attempts') + 1, error_message=str(e))
+            PaymentWebhookEvent.objects.filter(
+                id__in=ids, attempts__gte=settings.PAYMENT_WEBHOOK_MAX_ATTEMPTS
+            ).update(status='FAILED', processed_at=timezone.now())
+            PaymentWebhookEvent.objects.filter(id__in=ids, status='PROCESSING').update(status='QUEUED')
+        
+        return len(events)
@@ -0,0 +1,243 @@
+"""
+Shared ReportLab building blocks for invoices and scorecards
+
+Stylesheets, table styles and font metrics are built once per process and
+reused by every render instead of being rebuilt per document. Render
+functions take plain dicts so batches can be spread over a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, Tuple
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import SimpleDocTemplate, Paragraph, TableStyle
+
+BRAND_BLUE = colors.HexColor('#1e40af')
+LABEL_GREY = colors.HexColor('#e5e7eb')
+ROW_ALT_GREY = colors.HexColor('#f3f4f6')
+PASS_GREEN = colors.HexColor('#10b981')
+FAIL_RED = colors.HexColor('#ef4444')
+
+FONTS = ('Helvetica', 'Helvetica-Bold')
+
+# name -> (markup, style name) for PDFTemplates.static()
+STATIC_PARAGRAPHS = {
+    'invoice_brand': ("ELITE CLASSROOM", 'invoice_title'),
+    'invoice_heading': ("Invoice", 'heading1'),
+    'invoice_bill_to': ("Bill To:", 'heading3'),
+    'invoice_items': ("Items:", 'heading3'),
+    'invoice_footer': ("Thank you for your business!<br/>Elite Classroom - Empowering Education", 'invoice_footer'),
+    'statement_heading': ("Monthly Statement", 'heading1'),
+    'scorecard_title': ("Mock Test Scorecard", 'scorecard_title'),
+    'scorecard_summary': ("Score Summary", 'section_heading'),
+    'scorecard_accuracy': ("Accuracy by Skill Level", 'section_heading'),
+    'scorecard_breakdown': ("Question Breakdown", 'section_heading'),
+    'scorecard_recommendations': ("Recommendations", 'section_heading'),
+}
+
+
+class PDFTemplates:
+    """Per-process cache of everything that is identical across documents"""
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def styles() -> dict:
+        """Paragraph styles by name"""
+        sample = getSampleStyleSheet()
+
+        return {
+            'normal': sample['Normal'],
+            'heading1': sample['Heading1'],
+            'heading3': sample['Heading3'],
+            'invoice_title': ParagraphStyle(
+                'InvoiceTitle',
+                parent=sample['Title'],
+                fontSize=24,
+                textColor=BRAND_BLUE,
+                spaceAfter=20,
+                alignment=TA_CENTER
+            ),
+            'scorecard_title': ParagraphStyle(
+                'ScorecardTitle',
+                parent=sample['Title'],
+                fontSize=24,
+                textColor=BRAND_BLUE,
+                spaceAfter=30,
+                alignment=TA_CENTER
+            ),
+            'section_heading': ParagraphStyle(
+                'SectionHeading',
+                parent=sample['Heading2'],
+                fontSize=14,
+                textColor=BRAND_BLUE,
+                spaceAfter=12,
+                spaceBefore=12
+            ),
+            'invoice_footer': ParagraphStyle('InvoiceFooter', parent=sample['Normal'], fontSize=9, alignment=TA_CENTER),
+            'scorecard_footer': ParagraphStyle(
+                'ScorecardFooter', parent=sample['Normal'], fontSize=9, textColor=colors.grey, alignment=TA_CENTER
+            ),
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def table_styles() -> dict:
+        """TableStyles by name (per-document cells are added with a second setStyle)"""
+        return {
+            'invoice_details': TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ]),
+            'invoice_items': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ]),
+            'invoice_totals': TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 11),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+            ]),
+            'statement_lines': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (-2, 0), (-1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, ROW_ALT_GREY]),
+            ]),
+            'scorecard_info': TableStyle([
+                ('BACKGROUND', (0, 0), (0, -1), LABEL_GREY),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 11),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ]),
+            'scorecard_summary': TableStyle([
+                ('BACKGROUND', (0, 0), (0, -1), LABEL_GREY),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('TEXTCOLOR', (1, 2), (1, 2), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+                ('TOPPADDING', (0, 0), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ]),
+            'scorecard_questions': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 11),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, ROW_ALT_GREY]),
+            ]),
+        }
+
+    @staticmethod
+    def static(name: str) -> Paragraph:
+        """
+        Fixed header/footer paragraph
+
+        Built fresh on every call from the cached style: a Paragraph keeps
+        layout state from the document it was drawn in, so instances are
+        never shared between documents.
+        """
+        text, style = STATIC_PARAGRAPHS[name]
+        return Paragraph(text, PDFTemplates.styles()[style])
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def fonts() -> tuple:
+        """Load metrics for the fonts used in our documents"""
+        return tuple(pdfmetrics.getFont(name) for name in FONTS)
+
+    @staticmethod
+    def warm():
+        """Build all caches up front (process pool initializer)"""
+        PDFTemplates.fonts()
+        PDFTemplates.styles()
+        PDFTemplates.table_styles()
+
+    @staticmethod
+    def reset():
+        """Drop all caches (used by the benchmark to measure cold renders)"""
+        for cached in (PDFTemplates.fonts, PDFTemplates.styles, PDFTemplates.table_styles):
+            cached.cache_clear()
+
+
+def build_pdf(story: list, pagesize=letter) -> bytes:
+    """Lay out a story and return the PDF bytes"""
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=pagesize).build(story)
+    return buffer.getvalue()
+
+
+def create_render_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers build the PDF templates once at startup"""
+    from django.db import connections
+
+    # Forked children must not reuse the parent's DB sockets
+    connections.close_all()
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=PDFTemplates.warm)
+    # Fork the workers now, before the caller opens connections or cursors
+    executor.submit(int).result()
+    return executor
+
+
+def _render_job(render: Callable[[dict], bytes], job: Tuple[object, dict]):
+    key, data = job
+    try:
+        return key, render(data), None
+    except Exception as e:
+        return key, None, str(e)
+
+
+def render_batch(
+    render: Callable[[dict], bytes],
+    jobs: Iterable[Tuple[object, dict]],
+    executor=None,
+    chunksize: int = 8
+) -> Iterator[Tuple[object, bytes, str]]:
+    """
+    Render many documents in one pass
+
+    Args:
+        render: Module-level or static render function taking a data dict
+        jobs: (key, data) pairs
+        executor: Optional process pool from create_render_pool(); renders
+            inline when omitted
+        chunksize: Jobs sent to a pool worker per round trip
+
+    Yields:
+        (key, pdf_bytes, error) in job order; error is None on success
+    """
+    job_fn = partial(_render_job, render)
+    if executor:
+        return executor.map(job_fn, jobs, chunksize=chunksize)
+    return map(job_fn, jobs)
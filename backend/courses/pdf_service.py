@@ -2,180 +2,325 @@
 PDF scorecard generation for test results
 """
 
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import Table, Paragraph, Spacer
 from io import BytesIO
 from datetime import datetime
-import matplotlib
-matplotlib.use('Agg')  # Non-GUI backend
-import matplotlib.pyplot as plt
+from typing import Tuple
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.utils import timezone
+from .pdf_engine import PDFTemplates, BRAND_BLUE, PASS_GREEN, FAIL_RED, build_pdf, create_render_pool, render_batch
+
+# Chart columns follow the taxonomy; unknown levels go last in first-seen order
+BLOOM_ORDER = ('remember', 'understand', 'apply', 'analyze', 'evaluate', 'create')
 
 
 class ScorecardGenerator:
     """Generate professional PDF scorecards"""
     
     @staticmethod
-    def generate_scorecard(attempt) -> BytesIO:
+    def build_scorecard_data(attempt) -> dict:
         """
-        Generate PDF scorecard for a mock test attempt
+        Collect everything the scorecard needs into a plain, picklable dict
         
-        Args:
-            attempt: MockTestAttempt instance
+        All DB access happens here so rendering can run in a worker process.
+        """
+        answers = attempt.answers.select_related('question').order_by('question__order')
         
-        Returns:
-            BytesIO buffer with PDF data
+        return {
+            'attempt_id': attempt.id,
+            'student_id': attempt.student.id,
+            'student_name': attempt.student.full_name,
+            'test_title': attempt.mock_test.title,
+            'subject': attempt.mock_test.subject,
+            'date': attempt.started_at.strftime('%B %d, %Y'),
+            'time_taken_minutes': attempt.time_taken_minutes,
+            'total_score': attempt.total_score,
+            'max_score': attempt.max_score,
+            'percentage': attempt.percentage,
+            'passed': attempt.passed,
+            'passing_score': attempt.mock_test.passing_score,
+            'answers': [
+                {
+                    'order': answer.question.order,
+                    'is_correct': answer.is_correct,
+                    'points_earned': answer.points_earned,
+                    'points': answer.question.points,
+                    'bloom_level': answer.question.bloom_level,
+                }
+                for answer in answers
+            ],
+        }
+    
+    @staticmethod
+    def render_scorecard(data: dict) -> bytes:
         """
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
+        Render scorecard PDF bytes from build_scorecard_data() output
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
+        Pure CPU work with no DB access, safe to run in a process pool.
+        """
+        styles = PDFTemplates.styles()
+        table_styles = PDFTemplates.table_styles()
+        story = []
         
         # Title
-        story.append(Paragraph("Mock Test Scorecard", title_style))
+        story.append(PDFTemplates.static('scorecard_title'))
         story.append(Spacer(1, 0.2*inch))
         
         # Student info
         student_data = [
-            ['Student:', attempt.student.full_name],
-            ['Test:', attempt.mock_test.title],
-            ['Subject:', attempt.mock_test.subject],
-            ['Date:', attempt.started_at.strftime('%B %d, %Y')],
-            ['Duration:', f"{attempt.time_taken_minutes} minutes"],
+            ['Student:', data['student_name']],
+            ['Test:', data['test_title']],
+            ['Subject:', data['subject']],
+            ['Date:', data['date']],
+            ['Duration:', f"{data['time_taken_minutes']} minutes"],
         ]
         
         student_table = Table(student_data, colWidths=[2*inch, 4*inch])
-        student_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e5e7eb')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
+        student_table.setStyle(table_styles['scorecard_info'])
         
         story.append(student_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Score summary
-        story.append(Paragraph("Score Summary", heading_style))
+        story.append(PDFTemplates.static('scorecard_summary'))
         
-        passed_text = "PASSED ✓" if attempt.passed else "NEEDS IMPROVEMENT"
-        passed_color = colors.HexColor('#10b981') if attempt.passed else colors.HexColor('#ef4444')
+        passed_text = "PASSED ✓" if data['passed'] else "NEEDS IMPROVEMENT"
+        passed_color = PASS_GREEN if data['passed'] else FAIL_RED
         
         score_data = [
-            ['Score', f"{attempt.total_score}/{attempt.max_score}"],
-            ['Percentage', f"{attempt.percentage}%"],
+            ['Score', f"{data['total_score']}/{data['max_score']}"],
+            ['Percentage', f"{data['percentage']}%"],
             ['Status', passed_text],
-            ['Passing Score', f"{attempt.mock_test.passing_score}%"],
+            ['Passing Score', f"{data['passing_score']}%"],
         ]
         
         score_table = Table(score_data, colWidths=[3*inch, 3*inch])
-        score_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e5e7eb')),
-            ('BACKGROUND', (1, 2), (1, 2), passed_color),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('TEXTCOLOR', (1, 2), (1, 2), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 2), (1, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
+        score_table.setStyle(table_styles['scorecard_summary'])
+        score_table.setStyle([('BACKGROUND', (1, 2), (1, 2), passed_color)])
         
         story.append(score_table)
         story.append(Spacer(1, 0.3*inch))
         
-        # Question-by-question breakdown
-        story.append(Paragraph("Question Breakdown", heading_style))
+        # Accuracy per bloom level
+        if data['answers']:
+            story.append(PDFTemplates.static('scorecard_accuracy'))
+            story.append(ScorecardGenerator._bloom_accuracy_chart(data['answers']))
+            story.append(Spacer(1, 0.2*inch))
         
-        answers = attempt.answers.select_related('question').order_by('question__order')
+        # Question-by-question breakdown
+        story.append(PDFTemplates.static('scorecard_breakdown'))
         
         question_data = [['Q#', 'Correct?', 'Points', 'Topic']]
-        for answer in answers:
-            q = answer.question
-            check = '✓' if answer.is_correct else '✗'
+        for answer in data['answers']:
+            check = '✓' if answer['is_correct'] else '✗'
             question_data.append([
-                str(q.order + 1),
+                str(answer['order'] + 1),
                 check,
-                f"{answer.points_earned}/{q.points}",
-                q.bloom_level or 'General'
+                f"{answer['points_earned']}/{answer['points']}",
+                answer['bloom_level'] or 'General'
             ])
         
         question_table = Table(question_data, colWidths=[0.75*inch, 1*inch, 1.25*inch, 3*inch])
-        question_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f3f4f6')]),
-        ]))
+        question_table.setStyle(table_styles['scorecard_questions'])
         
         story.append(question_table)
         story.append(Spacer(1, 0.3*inch))
         
         # Recommendations
-        story.append(Paragraph("Recommendations", heading_style))
+        story.append(PDFTemplates.static('scorecard_recommendations'))
         
-        if attempt.percentage < 60:
+        if data['percentage'] < 60:
             recommendation = "Focus on reviewing the material and retake the test. Consider scheduling additional tutoring sessions."
-        elif attempt.percentage < 80:
+        elif data['percentage'] < 80:
             recommendation = "Good effort! Review the questions you missed and practice similar problems."
         else:
             recommendation = "Excellent work! You've demonstrated strong understanding. Ready to move to advanced topics."
         
-        story.append(Paragraph(recommendation, styles['Normal']))
+        story.append(Paragraph(recommendation, styles['normal']))
         story.append(Spacer(1, 0.2*inch))
         
         # Footer
         footer = Paragraph(
             f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')} | Elite Classroom",
-            ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.grey, alignment=TA_CENTER)
+            styles['scorecard_footer']
         )
         story.append(Spacer(1, 0.3*inch))
         story.append(footer)
         
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return build_pdf(story)
+    
+    @staticmethod
+    def _bloom_accuracy_chart(answers) -> Drawing:
+        """
+        Bar chart of accuracy per bloom level, drawn as vector shapes
+        
+        Bars are green for strengths (>= 75%) and red for weaknesses (< 60%),
+        matching RecommendationEngine._analyze_strengths_weaknesses.
+        """
+        totals = {}
+        for answer in answers:
+            level = answer['bloom_level'] or 'General'
+            correct, total = totals.get(level, (0, 0))
+            totals[level] = (correct + (1 if answer['is_correct'] else 0), total + 1)
+        
+        def level_rank(level):
+            key = level.lower()
+            return BLOOM_ORDER.index(key) if key in BLOOM_ORDER else len(BLOOM_ORDER)
+        
+        levels = sorted(totals, key=level_rank)  # stable, keeps first-seen order for the rest
+        accuracy = [totals[level][0] * 100 / totals[level][1] for level in levels]
+        
+        drawing = Drawing(6*inch, 2.2*inch)
+        chart = VerticalBarChart()
+        chart.x = 0.5*inch
+        chart.y = 0.4*inch
+        chart.width = 5.4*inch
+        chart.height = 1.6*inch
+        chart.data = [accuracy]
+        chart.barWidth = 0.4*inch
+        chart.groupSpacing = 0.25*inch
+        
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.valueMax = 100
+        chart.valueAxis.valueStep = 25
+        chart.valueAxis.labelTextFormat = '%d%%'
+        chart.valueAxis.labels.fontSize = 8
+        chart.categoryAxis.categoryNames = [level.title() for level in levels]
+        chart.categoryAxis.labels.fontSize = 8
+        
+        chart.bars.strokeColor = None
+        chart.bars[0].fillColor = BRAND_BLUE
+        for i, value in enumerate(accuracy):
+            if value >= 75:
+                chart.bars[(0, i)].fillColor = PASS_GREEN
+            elif value < 60:
+                chart.bars[(0, i)].fillColor = FAIL_RED
+        
+        chart.barLabelFormat = '%.0f%%'
+        chart.barLabels.fontSize = 8
+        chart.barLabels.nudge = 7
+        
+        drawing.add(chart)
+        return drawing
+    
+    @staticmethod
+    def generate_scorecard(attempt) -> BytesIO:
+        """
+        Generate PDF scorecard for a mock test attempt
+        
+        Args:
+            attempt: MockTestAttempt instance
+        
+        Returns:
+            BytesIO buffer with PDF data
+        """
+        data = ScorecardGenerator.build_scorecard_data(attempt)
+        return BytesIO(ScorecardGenerator.render_scorecard(data))
     
     @staticmethod
     def save_scorecard_to_attempt(attempt):
         """Generate and save PDF to attempt instance"""
         pdf_buffer = ScorecardGenerator.generate_scorecard(attempt)
-        filename = f"scorecard_{attempt.id}_{attempt.student.id}.pdf"
-        attempt.scorecard_pdf.save(filename, ContentFile(pdf_buffer.read()))
-        attempt.save()
+        ScorecardGenerator._store_pdf(attempt, pdf_buffer.read())
+    
+    @staticmethod
+    def _store_pdf(attempt, pdf_bytes: bytes):
+        filename = f"scorecard_{attempt.id}_{attempt.student_id}.pdf"
+        attempt.scorecard_pdf.save(filename, ContentFile(pdf_bytes), save=False)
+        attempt.scorecard_status = 'READY'
+        attempt.scorecard_error = None
+        attempt.save(update_fields=['scorecard_pdf', 'scorecard_status', 'scorecard_error'])
+
+
+class ScorecardJobProcessor:
+    """Render queued scorecards off the request thread on a process pool"""
+    
+    @staticmethod
+    def create_executor(max_workers: int = None):
+        return create_render_pool(max_workers or settings.SCORECARD_RENDER_WORKERS)
+    
+    @staticmethod
+    def claim_batch(batch_size: int = 20) -> list:
+        """Claim pending scorecards for this worker"""
+        from .models import MockTestAttempt
+        from .job_queue import claim_jobs, requeue_stale_jobs
+        
+        requeue_stale_jobs(
+            MockTestAttempt.objects.filter(scorecard_status='RENDERING'),
+            timeout_minutes=settings.SCORECARD_RENDER_TIMEOUT_MINUTES,
+            timestamp_field='scorecard_requested_at',
+            scorecard_status='PENDING'
+        )
+        
+        return claim_jobs(
+            MockTestAttempt.objects.filter(scorecard_status='PENDING').order_by('scorecard_requested_at'),
+            batch_size=batch_size,
+            scorecard_status='RENDERING',
+            scorecard_requested_at=timezone.now()
+        )
+    
+    @staticmethod
+    def render_attempts(attempts, executor=None) -> Tuple[int, int]:
+        """
+        Render and store scorecards for many attempts
+        
+        Data is gathered in this process, PDFs are rendered in parallel on
+        the executor (or inline without one) and files are saved here.
+        
+        Returns:
+            (rendered, failed) counts
+        """
+        from .models import MockTestAttempt
+        
+        by_id = {}
+        jobs = []
+        failed = 0
+        for attempt in attempts:
+            try:
+                jobs.append(ScorecardGenerator.build_scorecard_data(attempt))
+                by_id[attempt.id] = attempt
+            except Exception as e:
+                MockTestAttempt.objects.filter(id=attempt.id).update(
+                    scorecard_status='FAILED', scorecard_error=str(e)
+                )
+                failed += 1
+        
+        results = render_batch(
+            ScorecardGenerator.render_scorecard,
+            ((data['attempt_id'], data) for data in jobs),
+            executor
+        )
+        
+        rendered = 0
+        for attempt_id, pdf_bytes, error in results:
+            if error is None:
+                try:
+                    ScorecardGenerator._store_pdf(by_id[attempt_id], pdf_bytes)
+                    rendered += 1
+                    continue
+                except Exception as e:
+                    error = str(e)
+            
+            MockTestAttempt.objects.filter(id=attempt_id).update(
+                scorecard_status='FAILED', scorecard_error=error
+            )
+            failed += 1
+        
+        return rendered, failed
+    
+    @staticmethod
+    def process_batch(executor=None, batch_size: int = 20) -> int:
+        """Claim and render one batch; returns number of attempts handled"""
+        from .models import MockTestAttempt
+        
+        claimed = ScorecardJobProcessor.claim_batch(batch_size)
+        if claimed:
+            attempts = MockTestAttempt.objects.filter(
+                id__in=[attempt.id for attempt in claimed]
+            ).select_related('mock_test', 'student')
+            ScorecardJobProcessor.render_attempts(attempts, executor)
+        return len(claimed)
@@ -0,0 +1,78 @@
+"""
+Who is connected to a session room
+
+Every presence socket has a SessionPresence row, refreshed by the
+consumer's heartbeat loop. Rows are deleted on disconnect. Rows of sockets
+that died without disconnecting (crashed node, lost network) stop counting
+once their heartbeat is older than PRESENCE_TIMEOUT_SECONDS and are purged
+the next time someone joins the room. Rows live in the database so the
+roster is the same on every node.
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+
+class PresenceRegistry:
+    """Track presence sockets and build room rosters"""
+
+    @staticmethod
+    def _cutoff():
+        return timezone.now() - timedelta(seconds=settings.PRESENCE_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def join(session_id: int, user_id: int, channel_name: str) -> List[Dict]:
+        """Register a socket; returns the room's roster including it"""
+        from .models import SessionPresence
+
+        SessionPresence.objects.filter(session_id=session_id, last_seen__lt=PresenceRegistry._cutoff()).delete()
+        SessionPresence.objects.update_or_create(
+            channel_name=channel_name,
+            defaults={'session_id': session_id, 'user_id': user_id, 'last_seen': timezone.now()}
+        )
+        return PresenceRegistry.roster(session_id)
+
+    @staticmethod
+    def touch(channel_name: str) -> None:
+        """Record a heartbeat"""
+        from .models import SessionPresence
+
+        SessionPresence.objects.filter(channel_name=channel_name).update(last_seen=timezone.now())
+
+    @staticmethod
+    def leave(session_id: int, channel_name: str) -> List[Dict]:
+        """Remove a socket; returns the remaining roster"""
+        from .models import SessionPresence
+
+        SessionPresence.objects.filter(channel_name=channel_name).delete()
+        return PresenceRegistry.roster(session_id)
+
+    @staticmethod
+    def roster(session_id: int) -> List[Dict]:
+        """
+        Participants with at least one live socket
+
+        Returns:
+            [{'user_id', 'name', 'role', 'connections'}] ordered by user id
+        """
+        from .models import SessionPresence
+
+        rows = (
+            SessionPresence.objects
+            .filter(session_id=session_id, last_seen__gte=PresenceRegistry._cutoff())
+            .values('user_id', 'user__first_name', 'user__last_name', 'user__role')
+            .annotate(connections=Count('id'))
+            .order_by('user_id')
+        )
+        return [
+            {
+                'user_id': row['user_id'],
+                'name': f"{row['user__first_name']} {row['user__last_name']}".strip(),
+                'role': row['user__role'],
+                'connections': row['connections'],
+            }
+            for row in rows
+        ]
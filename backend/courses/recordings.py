@@ -0,0 +1,248 @@
+"""
+Recording webhook inbox and batched asset ingestion
+
+SessionRecordingWebhookView only appends the webhook body to the
+RecordingEvent inbox (one INSERT, redeliveries dropped), so a burst of
+recordings finishing together never waits on session rows or the
+provider. `manage.py process_recording_events` claims events in
+batches, fetches each room's recording metadata (size, duration) in
+parallel, merges the assets into their sessions and saves them with a
+single bulk_update.
+
+Metadata comes from RecordingIngestor.metadata_provider, by default the
+VideoSDK recordings API; `manage.py run_videosdk_stub` serves a local
+stand-in for it.
+"""
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .http_client import OutboundHTTP
+
+logger = logging.getLogger(__name__)
+
+
+class VideoSDKRecordingMetadata:
+    """Recording metadata from the VideoSDK REST API"""
+
+    @staticmethod
+    def fetch(room_id: str) -> Dict[str, Dict]:
+        """
+        Recordings of a room, keyed by file URL
+
+        Returns:
+            {url: {'url', 'size_bytes', 'duration_seconds', 'format'}}
+        """
+        res = OutboundHTTP.session().get(
+            f"{settings.VIDEOSDK_API_URL.rstrip('/')}/v2/recordings",
+            params={'roomId': room_id},
+            headers={"Authorization": settings.VIDEOSDK_API_KEY},
+            timeout=10
+        )
+        res.raise_for_status()
+
+        assets = {}
+        for recording in res.json().get('data', []):
+            file = recording.get('file') or {}
+            if not file.get('fileUrl'):
+                continue
+            meta = file.get('meta') or {}
+            assets[file['fileUrl']] = {
+                'url': file['fileUrl'],
+                'size_bytes': file.get('size'),
+                'duration_seconds': meta.get('duration'),
+                'format': meta.get('format'),
+            }
+        return assets
+
+
+class RecordingIngestor:
+    """Queue recording webhooks in an inbox table and attach their assets in batches"""
+
+    HANDLED_EVENTS = ('recording.completed',)
+
+    # Swap for a stub in tests: any object with fetch(room_id) -> {url: asset}
+    metadata_provider = VideoSDKRecordingMetadata
+
+    SESSION_FIELDS = ['recording_assets', 'ended_at']
+
+    @staticmethod
+    def enqueue(body: bytes):
+        """
+        Store a webhook body, ignoring redeliveries of the same body
+
+        Raises:
+            ValueError: body is not a JSON object
+        """
+        from .models import RecordingEvent
+
+        data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Webhook body must be a JSON object")
+
+        RecordingEvent.objects.bulk_create([
+            RecordingEvent(
+                event_id=hashlib.sha256(body).hexdigest(),
+                event=str(data.get('event', ''))[:50],
+                room_id=data.get('roomId'),
+                payload=data
+            )
+        ], ignore_conflicts=True)
+
+    @staticmethod
+    def claim_batch(batch_size: int = 200) -> list:
+        """Claim queued events for this worker"""
+        from .models import RecordingEvent
+        from .job_queue import claim_jobs, requeue_stale_jobs
+
+        requeue_stale_jobs(
+            RecordingEvent.objects.filter(status='PROCESSING'),
+            timeout_minutes=settings.RECORDING_EVENT_TIMEOUT_MINUTES,
+            status='QUEUED'
+        )
+
+        return claim_jobs(
+            RecordingEvent.objects.filter(status='QUEUED').order_by('received_at'),
+            batch_size=batch_size,
+            status='PROCESSING',
+            started_at=timezone.now()
+        )
+
+    @staticmethod
+    def fetch_metadata(room_ids, max_workers: int = None) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Look up several rooms' recordings in parallel
+
+        Returns:
+            ({room_id: {url: asset}}, {room_id: error} for failed lookups)
+        """
+        room_ids = list(room_ids)
+        if not room_ids:
+            return {}, {}
+        max_workers = max_workers or settings.RECORDING_METADATA_WORKERS
+
+        def fetch(room_id):
+            try:
+                return room_id, RecordingIngestor.metadata_provider.fetch(room_id), None
+            except Exception as e:
+                logger.warning("Recording metadata lookup failed for room %s: %s", room_id, e)
+                return room_id, None, str(e)
+
+        metadata, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(room_ids))) as executor:
+            for room_id, assets, error in executor.map(fetch, room_ids):
+                if error is None:
+                    metadata[room_id] = assets
+                else:
+                    errors[room_id] = error
+        return metadata, errors
+
+    @staticmethod
+    def merge_assets(existing: list, urls: list, metadata: Dict[str, Dict]) -> list:
+        """
+        Existing assets plus new URLs, one entry per URL, with metadata filled in
+
+        Older sessions stored bare URL strings; those are converted too.
+        """
+        merged = {}
+        for asset in existing or []:
+            asset = {'url': asset} if isinstance(asset, str) else asset
+            merged[asset['url']] = asset
+        for url in urls:
+            merged.setdefault(url, {'url': url})
+        for url, asset in merged.items():
+            if url in metadata:
+                merged[url] = {**asset, **metadata[url]}
+        return list(merged.values())
+
+    @staticmethod
+    def apply_events(events, sessions: Dict, metadata: Dict[str, Dict]) -> Tuple[List[int], List[int]]:
+        """
+        Merge events' assets into their sessions and save them with one bulk_update
+
+        Args:
+            events: Events whose room's metadata was fetched (or isn't needed)
+            sessions: {provider_room_id: Session}
+            metadata: {room_id: {url: asset}}
+
+        Returns:
+            (processed event ids, ignored event ids)
+        """
+        from .models import Session
+
+        by_room = defaultdict(list)
+        ignored = []
+        for event in events:
+            if event.event in RecordingIngestor.HANDLED_EVENTS and event.room_id in sessions:
+                by_room[event.room_id].append(event)
+            else:
+                ignored.append(event.id)
+
+        processed = []
+        changed = []
+        for room_id, room_events in by_room.items():
+            session = sessions[room_id]
+            urls = [url for event in room_events for url in (event.payload.get('assets') or []) if isinstance(url, str)]
+            session.recording_assets = RecordingIngestor.merge_assets(
+                session.recording_assets, urls, metadata.get(room_id, {})
+            )
+            session.ended_at = max(event.received_at for event in room_events)
+            changed.append(session)
+            processed.extend(event.id for event in room_events)
+
+        Session.objects.bulk_update(changed, RecordingIngestor.SESSION_FIELDS, batch_size=500)
+        return processed, ignored
+
+    @staticmethod
+    def _retry(event_ids: List[int], error: str):
+        """Put events back in the queue until the attempt budget is spent"""
+        from .models import RecordingEvent
+
+        RecordingEvent.objects.filter(id__in=event_ids).update(attempts=F('attempts') + 1, error_message=error)
+        RecordingEvent.objects.filter(
+            id__in=event_ids, attempts__gte=settings.RECORDING_EVENT_MAX_ATTEMPTS
+        ).update(status='FAILED', processed_at=timezone.now())
+        RecordingEvent.objects.filter(id__in=event_ids, status='PROCESSING').update(status='QUEUED')
+
+    @staticmethod
+    def process_batch(batch_size: int = 200) -> int:
+        """Claim and ingest one batch of events; returns number of events handled"""
+        from .models import RecordingEvent, Session
+
+        events = RecordingIngestor.claim_batch(batch_size)
+        if not events:
+            return 0
+
+        try:
+            room_ids = {
+                event.room_id for event in events
+                if event.event in RecordingIngestor.HANDLED_EVENTS and event.room_id
+            }
+            sessions = {
+                session.provider_room_id: session
+                for session in Session.objects.filter(provider_room_id__in=room_ids)
+                .only('id', 'provider_room_id', *RecordingIngestor.SESSION_FIELDS)
+            }
+            # Metadata is only worth fetching for rooms we have a session for
+            metadata, errors = RecordingIngestor.fetch_metadata(sessions)
+
+            retry = [event for event in events if event.room_id in errors]
+            ready = [event for event in events if event.room_id not in errors]
+            with transaction.atomic():
+                processed, ignored = RecordingIngestor.apply_events(ready, sessions, metadata)
+                now = timezone.now()
+                RecordingEvent.objects.filter(id__in=processed).update(status='PROCESSED', processed_at=now)
+                RecordingEvent.objects.filter(id__in=ignored).update(status='IGNORED', processed_at=now)
+            for room_id in {event.room_id for event in retry}:
+                RecordingIngestor._retry([event.id for event in retry if event.room_id == room_id], errors[room_id])
+        except Exception as e:
+            RecordingIngestor._retry([event.id for event in events], str(e))
+
+        return len(events)
@@ -0,0 +1,251 @@
+"""
+Daily and monthly revenue rollups for earnings charts
+
+RevenueRollup holds one row per (day or month, teacher) plus a
+platform-wide row (teacher NULL). Payment, refund and payout transitions
+only record the affected day in RevenueRollupDirtyDay (one INSERT ... ON
+CONFLICT DO NOTHING). The refresh_revenue_rollups worker recomputes those
+days from the source tables with three grouped queries each, then rebuilds
+their months from the day rows. Recomputing a whole day keeps the rollups
+exact no matter how often or in which order a day is touched.
+
+Charts sum month rows for whole months and day rows for the partial months
+at either end of the range, so any range reads a few dozen rows.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+# Captured payments stay in revenue after a refund; refunds are reported separately
+REVENUE_STATUSES = ['CAPTURED', 'REFUNDED', 'PARTIALLY_REFUNDED']
+
+MEASURES = (
+    'gross_revenue', 'platform_commission', 'teacher_earnings', 'payments_count',
+    'refunds', 'refunds_count', 'payouts',
+)
+
+MAX_DAY_BUCKETS = 366
+MAX_MONTH_BUCKETS = 120
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def months_between(since: date, until: date) -> int:
+    """Number of calendar months touched by since..until (inclusive)"""
+    return (until.year - since.year) * 12 + until.month - since.month + 1
+
+
+class RevenueRollups:
+    """Maintain and query RevenueRollup rows"""
+
+    @staticmethod
+    def mark_dirty(moments: Iterable) -> int:
+        """
+        Queue the local days of these datetimes (or dates) for recomputation
+
+        Call in the same transaction as the state change.
+
+        Returns:
+            Number of distinct days marked
+        """
+        from .models import RevenueRollupDirtyDay
+
+        days = {
+            moment if not isinstance(moment, datetime) else timezone.localdate(moment)
+            for moment in moments if moment
+        }
+        RevenueRollupDirtyDay.objects.bulk_create(
+            [RevenueRollupDirtyDay(day=day) for day in days], ignore_conflicts=True
+        )
+        return len(days)
+
+    @staticmethod
+    def compute_day(day: date) -> Dict[Optional[int], Dict]:
+        """
+        Totals for one local day straight from the source tables
+
+        Returns:
+            {teacher id or None (platform): {measure: value}}
+        """
+        from .models import Payment, Payout, Refund
+
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        totals = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+
+        def add(teacher_id, **values):
+            for key in ([teacher_id, None] if teacher_id else [None]):
+                for measure, value in values.items():
+                    totals[key][measure] += value or 0
+
+        payments = (
+            Payment.objects
+            .filter(status__in=REVENUE_STATUSES, captured_at__gte=start, captured_at__lt=end)
+            .annotate(teacher_id=Coalesce('session__teacher_id', 'course__teacher_id'))
+            .values('teacher_id')
+            .annotate(
+                gross=Sum('amount'), commission=Sum('platform_fee'),
+                earnings=Sum('teacher_amount'), n=Count('id')
+            )
+        )
+        for row in payments:
+            add(
+                row['teacher_id'], gross_revenue=row['gross'], platform_commission=row['commission'],
+                teacher_earnings=row['earnings'], payments_count=row['n']
+            )
+
+        refunds = (
+            Refund.objects
+            .filter(status='COMPLETED', completed_at__gte=start, completed_at__lt=end)
+            .annotate(teacher_id=Coalesce('payment__session__teacher_id', 'payment__course__teacher_id'))
+            .values('teacher_id')
+            .annotate(total=Sum('refund_amount'), n=Count('id'))
+        )
+        for row in refunds:
+            add(row['teacher_id'], refunds=row['total'], refunds_count=row['n'])
+
+        payouts = (
+            Payout.objects
+            .filter(status='COMPLETED', completed_at__gte=start, completed_at__lt=end)
+            .values('teacher_id')
+            .annotate(total=Sum('amount'))
+        )
+        for row in payouts:
+            add(row['teacher_id'], payouts=row['total'])
+
+        return totals
+
+    @staticmethod
+    def _rebuild_month(month: date) -> None:
+        """Replace the month rows of one month with sums of its day rows"""
+        from .models import RevenueRollup
+
+        days = RevenueRollup.objects.filter(period='DAY', bucket__gte=month, bucket__lt=next_month(month))
+        rows = [
+            RevenueRollup(period='MONTH', bucket=month, **row)
+            for row in days.values('teacher_id').annotate(**{measure: Sum(measure) for measure in MEASURES})
+        ]
+        RevenueRollup.objects.filter(period='MONTH', bucket=month).delete()
+        RevenueRollup.objects.bulk_create(rows)
+
+    @staticmethod
+    def refresh_days(days: Iterable[date]) -> None:
+        """Recompute the given days and rebuild the months they belong to"""
+        from .models import RevenueRollup
+
+        days = sorted(set(days))
+        with transaction.atomic():
+            for day in days:
+                rows = [
+                    RevenueRollup(period='DAY', bucket=day, teacher_id=teacher_id, **values)
+                    for teacher_id, values in RevenueRollups.compute_day(day).items()
+                    if any(values.values())
+                ]
+                RevenueRollup.objects.filter(period='DAY', bucket=day).delete()
+                RevenueRollup.objects.bulk_create(rows)
+
+            for month in sorted({month_start(day) for day in days}):
+                RevenueRollups._rebuild_month(month)
+
+    @staticmethod
+    def process_dirty(batch_size: int = 31) -> int:
+        """
+        Refresh one batch of dirty days; returns number of days handled
+
+        Dirty rows are locked while their days are recomputed and deleted in
+        the same transaction, so a transition that marks the day again in
+        the meantime is picked up by the next batch.
+        """
+        from .models import RevenueRollupDirtyDay
+
+        with transaction.atomic():
+            dirty = list(
+                RevenueRollupDirtyDay.objects.select_for_update(skip_locked=True)
+                .order_by('day')[:batch_size]
+            )
+            if not dirty:
+                return 0
+            RevenueRollups.refresh_days(row.day for row in dirty)
+            RevenueRollupDirtyDay.objects.filter(day__in=[row.day for row in dirty]).delete()
+        return len(dirty)
+
+    @staticmethod
+    def mark_all(since: Optional[date] = None) -> int:
+        """Mark every day with payment, refund or payout activity (for backfills)"""
+        from .models import Payment, Payout, Refund
+
+        sources = [
+            (Payment.objects.filter(status__in=REVENUE_STATUSES), 'captured_at'),
+            (Refund.objects.filter(status='COMPLETED'), 'completed_at'),
+            (Payout.objects.filter(status='COMPLETED'), 'completed_at'),
+        ]
+        days = set()
+        for queryset, field in sources:
+            queryset = queryset.exclude(**{field: None})
+            if since:
+                queryset = queryset.filter(**{f'{field}__gte': timezone.make_aware(datetime.combine(since, time.min))})
+            days.update(queryset.annotate(day=TruncDate(field)).values_list('day', flat=True).distinct())
+        return RevenueRollups.mark_dirty(days)
+
+    @staticmethod
+    def series(since: date, until: date, interval: str = 'day', teacher_id: Optional[int] = None) -> List[Dict]:
+        """
+        Zero-filled buckets between since and until (inclusive)
+
+        Args:
+            since: First day
+            until: Last day
+            interval: 'day' or 'month'
+            teacher_id: One teacher, or None for platform-wide totals
+
+        Returns:
+            [{'bucket': date, measure: value, ...}] in date order
+        """
+        from .models import RevenueRollup
+
+        rollups = (
+            RevenueRollup.objects.filter(teacher_id=teacher_id) if teacher_id
+            else RevenueRollup.objects.filter(teacher__isnull=True)
+        )
+        buckets = {}
+
+        if interval == 'day':
+            day = since
+            while day <= until:
+                buckets[day] = dict.fromkeys(MEASURES, 0)
+                day += timedelta(days=1)
+            rows = rollups.filter(period='DAY', bucket__gte=since, bucket__lte=until)
+            for row in rows.values('bucket', *MEASURES):
+                buckets[row.pop('bucket')] = row
+        else:
+            month = month_start(since)
+            full_months = []
+            while month <= until:
+                buckets[month] = dict.fromkeys(MEASURES, 0)
+                if month >= since and next_month(month) - timedelta(days=1) <= until:
+                    full_months.append(month)
+                month = next_month(month)
+
+            # Whole months come from month rows, partial edge months from day rows
+            days = rollups.filter(period='DAY', bucket__gte=since, bucket__lte=until)
+            if full_months:
+                days = days.exclude(bucket__gte=full_months[0], bucket__lt=next_month(full_months[-1]))
+            rows = list(rollups.filter(period='MONTH', bucket__in=full_months).values('bucket', *MEASURES))
+            rows += list(days.values('bucket', *MEASURES))
+            for row in rows:
+                bucket = buckets[month_start(row.pop('bucket'))]
+                for measure in MEASURES:
+                    bucket[measure] += row[measure]
+
+        return [{'bucket': bucket, **values} for bucket, values in sorted(buckets.items())]
@@ -3,17 +3,26 @@ import hmac
 import hashlib
 import base64
 import json
-import requests
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .http_client import OutboundHTTP
+
+logger = logging.getLogger(__name__)
+
 
 def videosdk_create_or_get_room():
-    url = "https://api.videosdk.live/v2/rooms"
+    url = f"{settings.VIDEOSDK_API_URL.rstrip('/')}/v2/rooms"
     headers = {
         "Authorization": settings.VIDEOSDK_API_KEY,
         "Content-Type": "application/json"
     }
     payload = {"region": settings.VIDEOSDK_REGION}
-    res = requests.post(url, headers=headers, json=payload, timeout=10)
+    res = OutboundHTTP.session().post(url, headers=headers, json=payload, timeout=10)
     res.raise_for_status()
     data = res.json()
     return data.get("roomId")
@@ -33,3 +42,94 @@ def videosdk_generate_token(participant_id: str, room_id: str, role: str, exp_se
         "role": role,
         "expiresIn": exp_seconds
     }
+
+
+class RoomManager:
+    """Give sessions their VideoSDK room ahead of time, exactly once"""
+
+    JOINABLE_STATUSES = ['PENDING', 'CONFIRMED']
+
+    @staticmethod
+    def assign_room(session_id: int, room_id: str) -> str:
+        """
+        Store room_id on the session unless it already has a room
+
+        A conditional UPDATE, so concurrent callers can't overwrite each
+        other; the loser's room is simply never used.
+
+        Returns:
+            The session's room id after the call
+        """
+        from .models import Session
+
+        if Session.objects.filter(id=session_id, provider_room_id__isnull=True).update(provider_room_id=room_id):
+            return room_id
+        return Session.objects.filter(id=session_id).values_list('provider_room_id', flat=True).first()
+
+    @staticmethod
+    def ensure_room(session) -> str:
+        """Room of a session, creating it now if the prewarm job hasn't yet"""
+        if session.provider_room_id:
+            return session.provider_room_id
+        session.provider_room_id = RoomManager.assign_room(session.id, videosdk_create_or_get_room())
+        return session.provider_room_id
+
+    @staticmethod
+    def upcoming_without_room(minutes: int) -> list:
+        """Joinable sessions starting within the next `minutes` that have no room yet"""
+        from .models import Session
+
+        now = timezone.localtime()
+        until = now + timedelta(minutes=minutes)
+        candidates = (
+            Session.objects
+            .filter(
+                status__in=RoomManager.JOINABLE_STATUSES,
+                provider_room_id__isnull=True,
+                scheduled_date__gte=now.date(),
+                scheduled_date__lte=until.date(),
+            )
+            .values_list('id', 'scheduled_date', 'start_time', 'end_time')
+        )
+        return [
+            session_id
+            for session_id, day, start, end in candidates
+            # Sessions already running still need a room
+            if timezone.make_aware(datetime.combine(day, start)) <= until
+            and timezone.make_aware(datetime.combine(day, end)) > now
+        ]
+
+    @staticmethod
+    def prewarm(minutes: int = None, max_workers: int = None) -> Dict:
+        """
+        Create rooms for upcoming sessions in parallel
+
+        Args:
+            minutes: Look-ahead window (default ROOM_PREWARM_MINUTES)
+            max_workers: Concurrent VideoSDK calls (default ROOM_PREWARM_WORKERS)
+
+        Returns:
+            {'sessions', 'assigned', 'raced', 'failed', 'seconds'}
+        """
+        minutes = minutes or settings.ROOM_PREWARM_MINUTES
+        max_workers = max_workers or settings.ROOM_PREWARM_WORKERS
+        session_ids = RoomManager.upcoming_without_room(minutes)
+        report = {'sessions': len(session_ids), 'assigned': 0, 'raced': 0, 'failed': 0}
+        started = time.monotonic()
+
+        def create(session_id):
+            try:
+                room_id = videosdk_create_or_get_room()
+                return 'assigned' if RoomManager.assign_room(session_id, room_id) == room_id else 'raced'
+            except Exception:
+                logger.exception("Room prewarm failed for session %s", session_id)
+                return 'failed'
+            finally:
+                connection.close()  # Pool threads each hold their own connection
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for outcome in executor.map(create, session_ids):
+                report[outcome] += 1
+
+        report['seconds'] = round(time.monotonic() - started, 2)
+        return report
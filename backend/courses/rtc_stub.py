@@ -0,0 +1,87 @@
+"""
+Local stand-in for the VideoSDK REST API
+
+Implements POST /v2/rooms, answering {"roomId": ...}, and
+GET /v2/recordings?roomId=..., listing one recording per room with a
+made-up size and duration, each after an optional artificial delay. Room
+prewarming, join tokens and recording ingestion can then be exercised
+without network access or credentials. Start it with
+`manage.py run_videosdk_stub` (or StubVideoSDKServer in a test) and set
+VIDEOSDK_API_URL to its address.
+"""
+
+import json
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.rstrip('/') != '/v2/rooms':
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.rooms_created += 1
+        self._reply(200, {'roomId': f'stub-{uuid.uuid4().hex[:12]}'})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        room_id = parse_qs(url.query).get('roomId', [''])[0]
+        if url.path.rstrip('/') != '/v2/recordings' or not room_id:
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.recordings_listed += 1
+        # Stable per room, so repeated lookups agree
+        seed = zlib.crc32(room_id.encode())
+        self._reply(200, {'data': [{
+            'id': f'rec-{room_id}',
+            'roomId': room_id,
+            'file': {
+                'fileUrl': f'https://cdn.example.invalid/recordings/{room_id}.mp4',
+                'size': 1_000_000 + seed % 50_000_000,
+                'meta': {'duration': 60 + seed % 3600, 'format': 'mp4'},
+            },
+        }]})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubVideoSDKServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, delay: float = 0.0):
+        super().__init__(('127.0.0.1', port), _StubHandler)
+        self.delay = delay
+        self.rooms_created = 0
+        self.recordings_listed = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'StubVideoSDKServer':
+        """Serve from a background thread (for tests)"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
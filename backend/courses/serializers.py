@@ -298,7 +298,7 @@ class AIFeedbackSerializer(serializers.ModelSerializer):
 from rest_framework import serializers
 from .models import (
     MockTest, MockTestQuestion, MockTestAttempt, MockTestAnswer,
-    SessionSummary, StudentProgressAnalytics, RecommendedCourse
+    MockTestGenerationJob, SessionSummary, StudentProgressAnalytics, RecommendedCourse
 )
 
 # ... existing serializers
@@ -342,13 +342,15 @@ class MockTestAttemptSerializer(serializers.ModelSerializer):
     mock_test = MockTestSerializer(read_only=True)
     answers = MockTestAnswerSerializer(many=True, read_only=True)
     scorecard_url = serializers.SerializerMethodField()
+    scorecard_status = serializers.SerializerMethodField()
     
     class Meta:
         model = MockTestAttempt
         fields = [
             'id', 'mock_test', 'status', 'total_score', 'max_score',
             'percentage', 'passed', 'started_at', 'submitted_at',
-            'time_taken_minutes', 'scorecard_pdf', 'scorecard_url', 'answers'
+            'time_taken_minutes', 'scorecard_pdf', 'scorecard_url',
+            'scorecard_status', 'answers'
         ]
         read_only_fields = [
             'total_score', 'max_score', 'percentage', 'passed',
@@ -356,9 +358,32 @@ class MockTestAttemptSerializer(serializers.ModelSerializer):
         ]
     
     def get_scorecard_url(self, obj):
-        if obj.scorecard_pdf:
+        if obj.scorecard_status == 'READY' and obj.scorecard_pdf:
             return obj.scorecard_pdf.url
         return None
+    
+    def get_scorecard_status(self, obj):
+        """pending, ready, failed, or None before submission"""
+        if obj.scorecard_status in ('PENDING', 'RENDERING'):
+            return 'pending'
+        if obj.scorecard_status == 'READY' or (obj.scorecard_status is None and obj.scorecard_pdf):
+            return 'ready'
+        if obj.scorecard_status == 'FAILED':
+            return 'failed'
+        return None
+
+
+class MockTestGenerationJobSerializer(serializers.ModelSerializer):
+    session_title = serializers.CharField(source='session.title', read_only=True)
+    
+    class Meta:
+        model = MockTestGenerationJob
+        fields = [
+            'id', 'session', 'session_title', 'mock_test', 'status', 'stage',
+            'progress', 'difficulty', 'num_questions', 'attempts', 'error_message',
+            'created_at', 'updated_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = fields
 
 
 class SessionSummarySerializer(serializers.ModelSerializer):
@@ -517,3 +542,16 @@ class TeacherBankAccountSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'account_number': {'write_only': True}  # Don't expose in responses
         }
+
+
+from .models import SessionMessage
+
+
+class SessionMessageSerializer(serializers.ModelSerializer):
+    """Same shape as live chat messages (courses.chat.message_payload)"""
+    sender_name = serializers.CharField(source='sender.full_name', read_only=True)
+    at = serializers.DateTimeField(source='sent_at', read_only=True)
+    
+    class Meta:
+        model = SessionMessage
+        fields = ['id', 'sender', 'sender_name', 'text', 'at']
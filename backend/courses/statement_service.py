@@ -0,0 +1,473 @@
+"""
+Month-end statements for students and teachers
+
+Payment, Refund and Payout rows are streamed with .iterator() in
+(user, date) order and merged per user, so memory is bounded by one chunk
+of users no matter how many rows the month has. Progress is checkpointed
+on StatementRun after every chunk, so an interrupted run resumes where it
+stopped.
+"""
+
+import csv
+import hashlib
+import heapq
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain, groupby, islice
+from typing import Iterator, List, Tuple
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from reportlab.lib.units import inch
+from reportlab.platypus import Table, Paragraph, Spacer
+from .numbering import NumberAllocator
+from .pdf_engine import PDFTemplates, build_pdf, render_batch
+
+ZERO = Decimal('0.00')
+CAPTURED_STATUSES = ('CAPTURED', 'REFUNDED', 'PARTIALLY_REFUNDED')
+
+# Statement line: (user_id, when, description, reference, debit, credit)
+Line = Tuple[int, datetime, str, str, Decimal, Decimal]
+
+
+def month_bounds(period: date) -> Tuple[datetime, datetime]:
+    """Aware [start, end) datetimes of the month containing period"""
+    first = period.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return (
+        timezone.make_aware(datetime.combine(first, datetime.min.time())),
+        timezone.make_aware(datetime.combine(following, datetime.min.time())),
+    )
+
+
+def _title(payment_type, session_title, course_title):
+    if session_title:
+        return f"Tutoring Session - {session_title}"
+    if course_title:
+        return f"Course Enrollment - {course_title}"
+    return payment_type.title()
+
+
+class StatementGenerator:
+    """Stream, render and archive monthly statements"""
+
+    @staticmethod
+    def stream_student_lines(start, end, after_user_id=0, chunk_size=2000) -> Iterator[Line]:
+        """Charges and completed refunds per student, ordered by (student, date)"""
+        from .models import Payment, Refund
+
+        charges = (
+            Payment.objects
+            .filter(status__in=CAPTURED_STATUSES, captured_at__gte=start, captured_at__lt=end, student_id__gt=after_user_id)
+            .order_by('student_id', 'captured_at', 'id')
+            .values_list('student_id', 'captured_at', 'payment_type', 'session__title', 'course__title', 'razorpay_payment_id', 'amount')
+            .iterator(chunk_size=chunk_size)
+        )
+        refunds = (
+            Refund.objects
+            .filter(status='COMPLETED', completed_at__gte=start, completed_at__lt=end, student_id__gt=after_user_id)
+            .order_by('student_id', 'completed_at', 'id')
+            .values_list('student_id', 'completed_at', 'payment_id', 'razorpay_refund_id', 'refund_amount')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        charge_lines = (
+            (user_id, when, _title(payment_type, session_title, course_title), reference or '', amount, ZERO)
+            for user_id, when, payment_type, session_title, course_title, reference, amount in charges
+        )
+        refund_lines = (
+            (user_id, when, f"Refund for payment #{payment_id}", reference or '', ZERO, amount)
+            for user_id, when, payment_id, reference, amount in refunds
+        )
+        return heapq.merge(charge_lines, refund_lines, key=lambda line: (line[0], line[1]))
+
+    @staticmethod
+    def stream_teacher_lines(start, end, after_user_id=0, chunk_size=2000) -> Iterator[Line]:
+        """Earnings (net of platform fee) and completed payouts per teacher, ordered by (teacher, date)"""
+        from .models import Payment, Payout
+
+        earnings = (
+            Payment.objects
+            .filter(status__in=CAPTURED_STATUSES, captured_at__gte=start, captured_at__lt=end)
+            .annotate(earning_teacher_id=Coalesce('session__teacher_id', 'course__teacher_id'))
+            .filter(earning_teacher_id__gt=after_user_id)
+            .order_by('earning_teacher_id', 'captured_at', 'id')
+            .values_list(
+                'earning_teacher_id', 'captured_at', 'payment_type', 'session__title', 'course__title',
+                'razorpay_payment_id', 'platform_fee', 'teacher_amount'
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+        payouts = (
+            Payout.objects
+            .filter(status='COMPLETED', completed_at__gte=start, completed_at__lt=end, teacher_id__gt=after_user_id)
+            .order_by('teacher_id', 'completed_at', 'id')
+            .values_list('teacher_id', 'completed_at', 'razorpay_transfer_id', 'amount')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        earning_lines = (
+            (
+                user_id, when,
+                f"{_title(payment_type, session_title, course_title)} (fee ₹{platform_fee:.2f})",
+                reference or '', ZERO, teacher_amount
+            )
+            for user_id, when, payment_type, session_title, course_title, reference, platform_fee, teacher_amount in earnings
+        )
+        payout_lines = (
+            (user_id, when, "Payout to bank account", reference or '', amount, ZERO)
+            for user_id, when, reference, amount in payouts
+        )
+        return heapq.merge(earning_lines, payout_lines, key=lambda line: (line[0], line[1]))
+
+    @staticmethod
+    def iter_user_chunks(lines: Iterator[Line], users_per_chunk: int) -> Iterator[List[Tuple[int, List[Line]]]]:
+        """Group a (user, date)-ordered line stream into chunks of users_per_chunk users"""
+        grouped = ((user_id, list(user_lines)) for user_id, user_lines in groupby(lines, key=lambda line: line[0]))
+        while True:
+            chunk = list(islice(grouped, users_per_chunk))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def build_statement_data(role: str, period: date, user: Tuple[str, str], user_id: int, lines: List[Line],
+                             max_lines: int = None) -> dict:
+        """
+        Plain, picklable statement data for render_statement()
+
+        Totals cover every line; only the first max_lines are itemised so a
+        very busy account doesn't produce a thousand-page PDF.
+        """
+        total_debits = sum((line[4] for line in lines), ZERO)
+        total_credits = sum((line[5] for line in lines), ZERO)
+
+        return {
+            'user_id': user_id,
+            'role': role,
+            'period_label': period.strftime('%B %Y'),
+            'name': user[0],
+            'email': user[1],
+            'lines': [
+                (timezone.localtime(when).strftime('%Y-%m-%d'), description, reference, debit, credit)
+                for _, when, description, reference, debit, credit in lines[:max_lines]
+            ],
+            'line_count': len(lines),
+            'total_debits': total_debits,
+            'total_credits': total_credits,
+        }
+
+    @staticmethod
+    def render_statement(data: dict) -> bytes:
+        """Render statement PDF bytes from build_statement_data() output (no DB access)"""
+        styles = PDFTemplates.styles()
+        table_styles = PDFTemplates.table_styles()
+        story = []
+
+        # Header
+        story.append(PDFTemplates.static('invoice_brand'))
+        story.append(PDFTemplates.static('statement_heading'))
+        story.append(Spacer(1, 0.2*inch))
+
+        details_table = Table([
+            ['Statement Period:', data['period_label']],
+            ['Account:', data['name'] or data['email']],
+            ['Email:', data['email']],
+            ['Account Type:', data['role'].title()],
+        ], colWidths=[2*inch, 4*inch])
+        details_table.setStyle(table_styles['invoice_details'])
+        story.append(details_table)
+        story.append(Spacer(1, 0.3*inch))
+
+        # Transactions
+        if data['role'] == 'TEACHER':
+            debit_label, credit_label = 'Payout', 'Earned'
+        else:
+            debit_label, credit_label = 'Charged', 'Refunded'
+
+        rows = [['Date', 'Description', 'Reference', debit_label, credit_label]]
+        for day, description, reference, debit, credit in data['lines']:
+            rows.append([
+                day,
+                Paragraph(escape(description), styles['normal']),
+                reference,
+                f"₹{debit:.2f}" if debit else '',
+                f"₹{credit:.2f}" if credit else '',
+            ])
+
+        omitted = data['line_count'] - len(data['lines'])
+        if omitted:
+            rows.append(['', Paragraph(f"... {omitted} more transactions (included in totals)", styles['normal']), '', '', ''])
+
+        lines_table = Table(rows, colWidths=[0.9*inch, 2.7*inch, 1.4*inch, 0.9*inch, 0.9*inch], repeatRows=1)
+        lines_table.setStyle(table_styles['statement_lines'])
+        story.append(lines_table)
+        story.append(Spacer(1, 0.2*inch))
+
+        # Totals
+        totals_table = Table([
+            [f'Total {debit_label.lower()}:', f"₹{data['total_debits']:.2f}"],
+            [f'Total {credit_label.lower()}:', f"₹{data['total_credits']:.2f}"],
+            ['Net:', f"₹{data['total_credits'] - data['total_debits']:.2f}"],
+        ], colWidths=[4.5*inch, 1.5*inch])
+        totals_table.setStyle(table_styles['invoice_totals'])
+        story.append(totals_table)
+        story.append(Spacer(1, 0.5*inch))
+
+        story.append(PDFTemplates.static('invoice_footer'))
+
+        return build_pdf(story)
+
+    @staticmethod
+    def run_dir(run) -> str:
+        return f"statements/{run.period:%Y-%m}"
+
+    @staticmethod
+    def _save(name: str, content) -> str:
+        """Save to default storage, overwriting (re-runs must not create renamed copies)"""
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        return default_storage.save(name, content)
+
+    @staticmethod
+    def generate_invoices(run, executor=None, chunk_size: int = 500) -> int:
+        """
+        Create and render missing invoices for payments captured in the run's month
+
+        Invoices are bulk-created per chunk and rendered on the executor.
+        Payments whose invoice already has a PDF are skipped, so this is safe
+        to re-run after an interruption.
+        """
+        from .models import Invoice, Payment, StatementRun
+        from .invoice_service import InvoiceGenerator
+
+        start, end = month_bounds(run.period)
+        pending = (
+            Payment.objects
+            .filter(status__in=CAPTURED_STATUSES, captured_at__gte=start, captured_at__lt=end)
+            .filter(Q(invoice__isnull=True) | Q(invoice__pdf_file='') | Q(invoice__pdf_file__isnull=True))
+            .select_related('student', 'session__teacher', 'course__teacher', 'invoice')
+            .order_by('id')
+        )
+
+        created = 0
+        last_id = 0
+        while True:
+            payments = list(pending.filter(id__gt=last_id)[:chunk_size])
+            if not payments:
+                return created
+            last_id = payments[-1].id
+
+            invoices = []
+            for payment in payments:
+                if hasattr(payment, 'invoice'):
+                    continue  # created earlier, only the PDF is missing
+                invoices.append(Invoice(
+                    payment=payment,
+                    student_name=payment.student.full_name,
+                    student_email=payment.student.email,
+                    subtotal=payment.amount,
+                    tax_amount=0,
+                    total_amount=payment.amount,
+                    items=InvoiceGenerator._build_invoice_items(payment),
+                ))
+            NumberAllocator.assign(invoices, 'invoice_number', 'invoice')
+            Invoice.objects.bulk_create(invoices, ignore_conflicts=True)
+
+            rendered, _ = InvoiceGenerator.render_invoices(
+                Invoice.objects.filter(payment_id__in=[p.id for p in payments]).select_related('payment'),
+                executor
+            )
+            created += rendered
+            StatementRun.objects.filter(id=run.id).update(invoices_count=F('invoices_count') + rendered)
+
+    @staticmethod
+    def generate_statements(run, role: str, executor=None, users_per_chunk: int = 200, log=print) -> int:
+        """
+        Render statements for every user of one role, resuming from the run's checkpoint
+
+        Returns:
+            Number of statements written in this call
+        """
+        from accounts.models import User
+        from .models import Statement, StatementRun
+
+        checkpoint_field = 'student_checkpoint' if role == 'STUDENT' else 'teacher_checkpoint'
+        stream = StatementGenerator.stream_student_lines if role == 'STUDENT' else StatementGenerator.stream_teacher_lines
+        start, end = month_bounds(run.period)
+        folder = f"{StatementGenerator.run_dir(run)}/{role.lower()}s"
+
+        written = 0
+        lines = stream(start, end, after_user_id=getattr(run, checkpoint_field))
+        for chunk in StatementGenerator.iter_user_chunks(lines, users_per_chunk):
+            user_ids = [user_id for user_id, _ in chunk]
+            users = {
+                user_id: (f"{first_name} {last_name}".strip(), email)
+                for user_id, first_name, last_name, email in
+                User.objects.filter(id__in=user_ids).values_list('id', 'first_name', 'last_name', 'email')
+            }
+            jobs = [
+                (user_id, StatementGenerator.build_statement_data(
+                    role, run.period, users.get(user_id, ('', '')), user_id, user_lines,
+                    max_lines=settings.STATEMENT_MAX_DETAIL_LINES
+                ))
+                for user_id, user_lines in chunk
+            ]
+            data_by_user = dict(jobs)
+
+            rows = []
+            failed = 0
+            for user_id, pdf_bytes, error in render_batch(StatementGenerator.render_statement, jobs, executor):
+                data = data_by_user[user_id]
+                statement = Statement(
+                    run=run,
+                    user_id=user_id,
+                    role=role,
+                    line_count=data['line_count'],
+                    total_debits=data['total_debits'],
+                    total_credits=data['total_credits'],
+                    error_message=error,
+                )
+                if error is None:
+                    statement.pdf_file = StatementGenerator._save(f"{folder}/{user_id}.pdf", ContentFile(pdf_bytes))
+                    statement.checksum = hashlib.sha256(pdf_bytes).hexdigest()
+                else:
+                    failed += 1
+                rows.append(statement)
+
+            # Rows and checkpoint move together; a crash before this re-renders the chunk
+            with transaction.atomic():
+                Statement.objects.bulk_create(rows, ignore_conflicts=True)
+                StatementRun.objects.filter(id=run.id).update(**{
+                    checkpoint_field: user_ids[-1],
+                    'statements_count': F('statements_count') + len(rows) - failed,
+                    'failed_count': F('failed_count') + failed,
+                })
+            setattr(run, checkpoint_field, user_ids[-1])
+            written += len(rows) - failed
+            log(f"{role.title()} statements: through user {user_ids[-1]} ({written} written)")
+
+        return written
+
+    @staticmethod
+    def write_manifest(run) -> str:
+        """Write manifest.csv listing every statement of the run (streamed)"""
+        from .models import Statement
+
+        statements = (
+            Statement.objects.filter(run=run)
+            .order_by('role', 'user_id')
+            .values_list(
+                'role', 'user_id', 'user__email', 'pdf_file', 'checksum',
+                'line_count', 'total_debits', 'total_credits', 'error_message'
+            )
+            .iterator(chunk_size=2000)
+        )
+
+        with tempfile.TemporaryFile() as manifest:
+            text = io.TextIOWrapper(manifest, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(['role', 'user_id', 'email', 'file', 'sha256', 'lines', 'total_debits', 'total_credits', 'error'])
+            writer.writerows(statements)
+            text.flush()
+            text.detach()
+            manifest.seek(0)
+            name = StatementGenerator._save(f"{StatementGenerator.run_dir(run)}/manifest.csv", File(manifest))
+
+        run.manifest_file = name
+        run.save(update_fields=['manifest_file'])
+        return name
+
+    @staticmethod
+    def write_archive(run) -> str:
+        """Zip every statement PDF plus the manifest, streaming file by file"""
+        from .models import Statement
+
+        prefix = StatementGenerator.run_dir(run) + '/'
+        files = (
+            Statement.objects.filter(run=run, error_message__isnull=True)
+            .exclude(pdf_file='')
+            .order_by('role', 'user_id')
+            .values_list('pdf_file', flat=True)
+            .iterator(chunk_size=2000)
+        )
+
+        with tempfile.TemporaryFile() as archive:
+            with zipfile.ZipFile(archive, 'w') as zf:
+                for name in chain([run.manifest_file.name], files):
+                    # PDFs are already compressed; only deflate the manifest
+                    compress = zipfile.ZIP_DEFLATED if name.endswith('.csv') else zipfile.ZIP_STORED
+                    info = zipfile.ZipInfo(name[len(prefix):] if name.startswith(prefix) else name)
+                    info.compress_type = compress
+                    with default_storage.open(name, 'rb') as src, zf.open(info, 'w') as dst:
+                        shutil.copyfileobj(src, dst)
+            archive.seek(0)
+            name = StatementGenerator._save(
+                f"{StatementGenerator.run_dir(run)}/statements-{run.period:%Y-%m}.zip", File(archive)
+            )
+
+        run.archive_file = name
+        run.save(update_fields=['archive_file'])
+        return name
+
+    @staticmethod
+    def run_month(period: date, executor=None, with_invoices: bool = False, restart: bool = False,
+                  users_per_chunk: int = 200, log=print):
+        """
+        Generate (or resume) all statements for a month
+
+        Args:
+            period: Any date in the statement month
+            executor: Optional pool from pdf_engine.create_render_pool()
+            with_invoices: Also bulk-create missing invoices for the month
+            restart: Discard previous progress for the month and start over
+            users_per_chunk: Users rendered and checkpointed together
+            log: Output function
+
+        Returns:
+            StatementRun
+        """
+        from .models import StatementRun
+
+        run, _ = StatementRun.objects.get_or_create(period=period.replace(day=1))
+
+        if restart:
+            run.statements.all().delete()
+            run.student_checkpoint = run.teacher_checkpoint = 0
+            run.statements_count = run.failed_count = run.invoices_count = 0
+            run.completed_at = None
+        elif run.status == 'COMPLETED':
+            log(f"Statements for {run.period:%Y-%m} already completed")
+            return run
+
+        run.status = 'RUNNING'
+        run.error_message = None
+        run.save()
+
+        try:
+            if with_invoices:
+                log(f"Invoices: {StatementGenerator.generate_invoices(run, executor)} generated")
+            for role in ('STUDENT', 'TEACHER'):
+                StatementGenerator.generate_statements(run, role, executor, users_per_chunk, log)
+
+            run.refresh_from_db()
+            StatementGenerator.write_manifest(run)
+            StatementGenerator.write_archive(run)
+        except Exception as e:
+            StatementRun.objects.filter(id=run.id).update(status='FAILED', error_message=str(e))
+            raise
+
+        run.status = 'COMPLETED'
+        run.completed_at = timezone.now()
+        run.save(update_fields=['status', 'completed_at'])
+        return run
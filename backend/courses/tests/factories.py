@@ -0,0 +1,51 @@
+"""Shared model builders for the courses tests"""
+
+import datetime
+import itertools
+from decimal import Decimal
+from accounts.models import User
+from django.utils import timezone
+from courses.models import Course, Payment, Session
+
+_order_ids = itertools.count(1)
+
+
+def make_user(email: str, role: str = 'STUDENT') -> User:
+    return User.objects.create(email=email, role=role, first_name=email.split('@')[0], last_name='Test')
+
+
+def make_session(student: User, teacher: User, **fields) -> Session:
+    course, _ = Course.objects.get_or_create(
+        title='Algebra', teacher=teacher, defaults={'description': 'Linear equations', 'price': Decimal('100')}
+    )
+    values = {
+        'student': student,
+        'teacher': teacher,
+        'course': course,
+        'title': 'Algebra 1',
+        'scheduled_date': datetime.date.today(),
+        'start_time': datetime.time(10, 0),
+        'end_time': datetime.time(11, 0),
+        'price': Decimal('500'),
+    }
+    values.update(fields)
+    return Session.objects.create(**values)
+
+
+def make_payment(student: User, session: Session = None, **fields) -> Payment:
+    """Captured session payment held in escrow and due for release"""
+    values = {
+        'student': student,
+        'session': session,
+        'payment_type': 'SESSION' if session else 'COURSE',
+        'amount': Decimal('500.00'),
+        'platform_fee': Decimal('75.00'),
+        'teacher_amount': Decimal('425.00'),
+        'razorpay_order_id': f'order_{next(_order_ids)}',
+        'razorpay_payment_id': 'pay_test',
+        'status': 'CAPTURED',
+        'captured_at': timezone.now(),
+        'escrow_release_date': timezone.now() - datetime.timedelta(hours=1),
+    }
+    values.update(fields)
+    return Payment.objects.create(**values)
@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from courses.channel_layer import LocalChannelLayer
+
+
+class LocalChannelLayerTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.layer = LocalChannelLayer(capacity=2)
+        self.channels = [await self.layer.new_channel() for _ in range(3)]
+        for channel in self.channels:
+            await self.layer.group_add('room', channel)
+
+    async def test_fans_out_one_shared_copy(self):
+        message = {'type': 'chat.message', 'message': 'hi'}
+
+        await self.layer.group_send('room', message)
+
+        received = [await self.layer.receive(channel) for channel in self.channels]
+        self.assertEqual(received, [message] * 3)
+        self.assertIsNot(received[0], message)  # copied once, away from the sender
+        self.assertIs(received[0], received[1])
+        self.assertIs(received[1], received[2])
+
+    async def test_full_member_misses_messages_others_still_receive(self):
+        slow, fast = self.channels[0], self.channels[1]
+        for i in range(3):
+            await self.layer.group_send('room', {'type': 'chat.message', 'n': i})
+            await self.layer.receive(fast)
+
+        self.assertEqual([(await self.layer.receive(slow))['n'] for _ in range(2)], [0, 1])
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.layer.receive(slow), timeout=0.05)
+
+    async def test_discarded_members_and_unknown_groups(self):
+        await self.layer.group_discard('room', self.channels[0])
+
+        await self.layer.group_send('room', {'type': 'chat.message'})
+        await self.layer.group_send('empty', {'type': 'chat.message'})
+
+        self.assertNotIn(self.channels[0], self.layer.channels)
+        self.assertEqual((await self.layer.receive(self.channels[1]))['type'], 'chat.message')
+
+    async def test_sweeps_expired_entries_at_most_once_per_interval(self):
+        with mock.patch('channels.layers.InMemoryChannelLayer._clean_expired') as sweep:
+            for _ in range(5):
+                await self.layer.group_send('room', {'type': 'chat.message'})
+            self.assertEqual(sweep.call_count, 1)
+
+            self.layer._cleaned_at -= self.layer.cleanup_interval
+            await self.layer.group_send('room', {'type': 'chat.message'})
+            self.assertEqual(sweep.call_count, 2)
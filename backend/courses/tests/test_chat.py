@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.chat import ChatWriteBuffer
+from courses.models import SessionMessage
+from .factories import make_session, make_user
+
+
+class ChatTestMixin:
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher)
+
+    def message(self, text, minutes_ago=0, **fields):
+        sent_at = timezone.now() - datetime.timedelta(minutes=minutes_ago)
+        return SessionMessage(session=self.session, sender=self.student, text=text, sent_at=sent_at, **fields)
+
+
+class ChatWriteBufferTests(ChatTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # The buffer is per process; give every test an empty one
+        for name in ('_pending', '_in_flight'):
+            self.enterContext(mock.patch.object(ChatWriteBuffer, name, []))
+        self.enterContext(mock.patch.object(ChatWriteBuffer, '_flush_task', None))
+
+    def saved_texts(self):
+        return list(SessionMessage.objects.order_by('id').values_list('text', flat=True))
+
+    @override_settings(CHAT_WRITE_BATCH_SIZE=2, CHAT_WRITE_INTERVAL_MS=60000)
+    async def test_flushes_when_batch_is_full(self):
+        await ChatWriteBuffer.add(self.message('one'))
+        self.assertEqual(await SessionMessage.objects.acount(), 0)
+
+        await ChatWriteBuffer.add(self.message('two'))
+
+        self.assertEqual(await SessionMessage.objects.acount(), 2)
+        self.assertEqual(ChatWriteBuffer._pending, [])
+        self.assertEqual(ChatWriteBuffer._in_flight, [])
+        ChatWriteBuffer._flush_task.cancel()
+
+    @override_settings(CHAT_WRITE_BATCH_SIZE=50, CHAT_WRITE_INTERVAL_MS=10)
+    async def test_flushes_after_interval(self):
+        await ChatWriteBuffer.add(self.message('one'))
+        await ChatWriteBuffer.add(self.message('two'))
+        task = ChatWriteBuffer._flush_task
+        self.assertEqual(await SessionMessage.objects.acount(), 0)
+
+        await asyncio.wait_for(task, timeout=1)
+
+        self.assertEqual(await SessionMessage.objects.acount(), 2)
+        self.assertIsNone(ChatWriteBuffer._flush_task)
+
+    async def test_recent_merges_saved_in_flight_and_pending(self):
+        saved = self.message('saved', minutes_ago=3)
+        await saved.asave()
+        flushing = self.message('flushing', minutes_ago=2)
+        await flushing.asave()  # bulk_create finished, buffer not cleared yet
+        ChatWriteBuffer._in_flight = [flushing, self.message('in flight', minutes_ago=1)]
+        ChatWriteBuffer._pending = [
+            self.message('pending'),
+            SessionMessage(session_id=self.session.id + 1, sender=self.student, text='other room'),
+        ]
+
+        messages = await ChatWriteBuffer.recent(self.session.id, limit=10)
+
+        self.assertEqual([m['text'] for m in messages], ['saved', 'flushing', 'in flight', 'pending'])
+        self.assertEqual(messages[0]['sender'], self.student.id)
+
+        latest = await ChatWriteBuffer.recent(self.session.id, limit=2)
+        self.assertEqual([m['text'] for m in latest], ['in flight', 'pending'])
+
+    def test_falls_back_to_row_by_row_when_batch_fails(self):
+        good, bad, other = self.message('good'), self.message('bad'), self.message('other')
+        bad.save = mock.Mock(side_effect=ValueError('boom'))
+
+        with mock.patch.object(SessionMessage.objects, 'bulk_create', side_effect=ValueError('batch')), \
+                self.assertLogs('courses.chat', level='ERROR'):
+            written = ChatWriteBuffer._write([good, bad, other])
+
+        self.assertEqual(written, 2)
+        self.assertEqual(self.saved_texts(), ['good', 'other'])
+
+
+class SessionMessageListViewTests(ChatTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        SessionMessage.objects.bulk_create([self.message(f'm{i}', minutes_ago=10 - i) for i in range(5)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.url = f'/api/courses/sessions/{self.session.id}/messages/'
+
+    def test_pages_newest_first(self):
+        first = self.client.get(self.url, {'limit': 3})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([m['text'] for m in first.data['results']], ['m4', 'm3', 'm2'])
+        self.assertEqual(first.data['results'][0]['sender_name'], self.student.full_name)
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([m['text'] for m in second.data['results']], ['m1', 'm0'])
+        self.assertIsNone(second.data['next'])
+
+    def test_rejects_non_participants(self):
+        self.client.force_authenticate(make_user('outsider@example.com'))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_session(self):
+        response = self.client.get(f'/api/courses/sessions/{self.session.id + 100}/messages/')
+
+        self.assertEqual(response.status_code, 404)
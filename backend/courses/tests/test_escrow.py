@@ -0,0 +1,232 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from courses.ledger_service import EarningsLedger
+from courses.models import Payout, Refund, TeacherBankAccount
+from courses.payment_service import EscrowManager, PayoutProcessor
+from .factories import make_payment, make_session, make_user
+
+
+class EscrowTestMixin:
+
+    def make_parties(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher, status='COMPLETED')
+
+    def verify_bank_account(self, teacher):
+        return TeacherBankAccount.objects.create(
+            teacher=teacher, account_holder_name='Teacher', account_number='123456789012',
+            ifsc_code='HDFC0001234', bank_name='HDFC', is_verified=True, razorpay_account_id='acc_test'
+        )
+
+    def razorpay(self, existing_transfer=None):
+        service = mock.Mock()
+        service.find_transfer.return_value = existing_transfer
+        service.create_transfer.return_value = {'id': 'trf_new'}
+        return service
+
+
+class ReleasablePaymentsTests(EscrowTestMixin, TestCase):
+
+    def setUp(self):
+        self.make_parties()
+
+    def test_only_due_payments_without_refund_or_payout_are_releasable(self):
+        due = make_payment(self.student, self.session)
+        not_due = make_payment(self.student, self.session, escrow_release_date=timezone.now() + timedelta(hours=1))
+        disputed = make_payment(self.student, self.session)
+        Refund.objects.create(
+            payment=disputed, student=self.student, refund_amount=Decimal('500'), reason='OTHER', description='x'
+        )
+        paid = make_payment(self.student, self.session)
+        Payout.objects.create(teacher=self.teacher, payment=paid, amount=paid.teacher_amount)
+        upcoming = make_payment(self.student, make_session(self.student, self.teacher, status='SCHEDULED'))
+
+        releasable = set(EscrowManager.releasable_payments().values_list('id', flat=True))
+
+        self.assertEqual(releasable, {due.id})
+        self.assertNotIn(not_due.id, releasable)
+        self.assertNotIn(upcoming.id, releasable)
+
+    def test_closed_refund_does_not_block_release(self):
+        payment = make_payment(self.student, self.session)
+        Refund.objects.create(
+            payment=payment, student=self.student, refund_amount=Decimal('500'), reason='OTHER',
+            description='x', status='REJECTED'
+        )
+
+        self.assertTrue(EscrowManager.releasable_payments().filter(id=payment.id).exists())
+
+    def test_claim_releases_skips_teachers_without_verified_account(self):
+        other_teacher = make_user('other@example.com', role='TEACHER')
+        self.verify_bank_account(self.teacher)
+        released = make_payment(self.student, self.session)
+        held = make_payment(self.student, make_session(self.student, other_teacher, status='COMPLETED'))
+
+        payouts, skipped, last_id = EscrowManager.claim_releases()
+
+        self.assertEqual([payout.payment_id for payout in payouts], [released.id])
+        self.assertEqual(payouts[0].idempotency_key, f'payout_{released.id}')
+        self.assertEqual(skipped, 1)
+        self.assertEqual(last_id, held.id)
+        released.refresh_from_db()
+        held.refresh_from_db()
+        self.assertTrue(released.released_from_escrow)
+        self.assertFalse(held.released_from_escrow)
+
+        balance = EarningsLedger.balance_for(self.teacher)
+        self.assertEqual(balance.pending_payouts, Decimal('425.00'))
+        self.assertEqual(balance.in_escrow, Decimal('0.00'))
+
+    def test_payment_without_session_or_course_is_not_released(self):
+        self.verify_bank_account(self.teacher)
+        orphan = make_payment(self.student)
+        released = make_payment(self.student, self.session)
+
+        self.assertNotIn(orphan.id, EscrowManager.releasable_payments().values_list('id', flat=True))
+        payouts, skipped, _ = EscrowManager.claim_releases()
+
+        self.assertEqual([payout.payment_id for payout in payouts], [released.id])
+        self.assertEqual(skipped, 0)
+
+    def test_claim_releases_scans_past_skipped_payments(self):
+        make_payment(self.student, self.session)
+
+        _, skipped, last_id = EscrowManager.claim_releases()
+        self.assertEqual(skipped, 1)
+        self.assertEqual(EscrowManager.claim_releases(after_id=last_id), ([], 0, None))
+
+
+class PayoutProcessorTests(EscrowTestMixin, TestCase):
+
+    def setUp(self):
+        self.make_parties()
+        self.payment = make_payment(self.student, self.session, released_from_escrow=True)
+
+    def make_payout(self, **fields):
+        return Payout.objects.create(
+            teacher=self.teacher, payment=self.payment, amount=self.payment.teacher_amount,
+            razorpay_account_id='acc_test', idempotency_key=PayoutProcessor.idempotency_key(self.payment), **fields
+        )
+
+    def test_pending_payout_is_transferred(self):
+        payout = self.make_payout()
+        service = self.razorpay()
+
+        self.assertTrue(PayoutProcessor.process_payout(payout, service))
+
+        service.find_transfer.assert_not_called()
+        payout.refresh_from_db()
+        self.assertEqual((payout.status, payout.razorpay_transfer_id), ('COMPLETED', 'trf_new'))
+        self.assertEqual(EarningsLedger.balance_for(self.teacher).paid_out, Decimal('425.00'))
+
+    def test_payout_already_processing_is_not_sent_again(self):
+        payout = self.make_payout(status='PROCESSING', processed_at=timezone.now())
+        service = self.razorpay()
+
+        self.assertFalse(PayoutProcessor.process_payout(payout, service))
+        service.create_transfer.assert_not_called()
+
+    def test_stale_processing_payout_reuses_earlier_transfer(self):
+        stale = self.make_payout(status='PROCESSING', processed_at=timezone.now() - timedelta(hours=1))
+        service = self.razorpay(existing_transfer={'id': 'trf_earlier'})
+
+        claimed = PayoutProcessor.claim_stale(timeout_minutes=10)
+        self.assertEqual([payout.id for payout in claimed], [stale.id])
+        self.assertTrue(PayoutProcessor.process_payout(claimed[0], service))
+
+        service.find_transfer.assert_called_once_with('pay_test', stale.idempotency_key)
+        service.create_transfer.assert_not_called()
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.razorpay_transfer_id), ('COMPLETED', 'trf_earlier'))
+
+    def test_recent_processing_payout_is_left_alone(self):
+        self.make_payout(status='PROCESSING', processed_at=timezone.now())
+
+        self.assertEqual(PayoutProcessor.claim_stale(timeout_minutes=10), [])
+
+    def test_failed_transfer_counts_an_attempt(self):
+        payout = self.make_payout()
+        service = self.razorpay()
+        service.create_transfer.side_effect = RuntimeError('Bank unavailable')
+
+        self.assertFalse(PayoutProcessor.process_payout(payout, service))
+
+        payout.refresh_from_db()
+        self.assertEqual((payout.status, payout.attempts, payout.failure_reason), ('FAILED', 1, 'Bank unavailable'))
+
+    @override_settings(ESCROW_PAYOUT_RETRY_MINUTES=15, ESCROW_PAYOUT_MAX_ATTEMPTS=3)
+    def test_failed_payouts_are_retried_with_backoff_until_attempts_are_spent(self):
+        def failed(minutes_ago, attempts):
+            payment = make_payment(self.student, self.session, released_from_escrow=True)
+            return Payout.objects.create(
+                teacher=self.teacher, payment=payment, amount=payment.teacher_amount, status='FAILED',
+                processed_at=timezone.now() - timedelta(minutes=minutes_ago), attempts=attempts,
+                idempotency_key=PayoutProcessor.idempotency_key(payment)
+            )
+
+        first_due = failed(minutes_ago=20, attempts=1)
+        failed(minutes_ago=10, attempts=1)  # waits 15 minutes
+        failed(minutes_ago=20, attempts=2)  # waits 30 minutes
+        second_due = failed(minutes_ago=40, attempts=2)
+        failed(minutes_ago=600, attempts=3)  # spent, left for an operator
+
+        due = PayoutProcessor.due_retries()
+
+        self.assertEqual([payout.id for payout in due], [second_due.id, first_due.id])
+
+
+class ReleaseDuePaymentsTests(EscrowTestMixin, TransactionTestCase):
+    # Payouts are sent from pool threads, which need committed rows
+
+    def setUp(self):
+        self.make_parties()
+        self.verify_bank_account(self.teacher)
+
+    def test_release_sends_payouts_and_retries_stale_ones(self):
+        due = [make_payment(self.student, self.session) for _ in range(3)]
+        stuck_payment = make_payment(self.student, self.session, released_from_escrow=True)
+        stuck = Payout.objects.create(
+            teacher=self.teacher, payment=stuck_payment, amount=stuck_payment.teacher_amount,
+            status='PROCESSING', processed_at=timezone.now() - timedelta(hours=1),
+            idempotency_key=PayoutProcessor.idempotency_key(stuck_payment)
+        )
+        EarningsLedger.sync_payments([stuck_payment.id])
+        EarningsLedger.sync_payouts([stuck.id])
+        service = self.razorpay()
+
+        with mock.patch('courses.payment_service.RazorpayService', return_value=service):
+            # One sender thread: SQLite's shared test cache rejects concurrent writers
+            report = EscrowManager.release_due_payments(batch_size=2, max_workers=1, log=lambda *_: None)
+
+        self.assertEqual((report['released'], report['retried'], report['paid'], report['failed']), (3, 1, 4, 0))
+        self.assertEqual(
+            Payout.objects.filter(payment__in=due + [stuck_payment], status='COMPLETED').count(), 4
+        )
+        service.find_transfer.assert_called_once_with('pay_test', stuck.idempotency_key)
+        self.assertEqual(Payout.objects.get(id=stuck.id).attempts, 1)
+        # The caller's connection is still usable afterwards
+        self.assertIsNotNone(connection.connection)
+        self.assertEqual(EarningsLedger.find_drift(), [])
+
+    def test_release_retries_failed_payout_after_backoff(self):
+        payment = make_payment(self.student, self.session, released_from_escrow=True)
+        failed = Payout.objects.create(
+            teacher=self.teacher, payment=payment, amount=payment.teacher_amount, status='FAILED',
+            processed_at=timezone.now() - timedelta(days=1), attempts=1,
+            idempotency_key=PayoutProcessor.idempotency_key(payment)
+        )
+        service = self.razorpay()
+
+        with mock.patch('courses.payment_service.RazorpayService', return_value=service):
+            report = EscrowManager.release_due_payments(max_workers=1, log=lambda *_: None)
+
+        self.assertEqual((report['released'], report['retried'], report['paid']), (0, 1, 1))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), ('COMPLETED', 2))
+        service.find_transfer.assert_called_once_with('pay_test', failed.idempotency_key)
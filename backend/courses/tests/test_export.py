@@ -0,0 +1,117 @@
+import csv
+import datetime
+import importlib.util
+import io
+import unittest
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.export_service import DATASETS, FinanceExporter
+from courses.models import Payment
+from .factories import make_payment, make_user
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class FinanceExportTestMixin:
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.march = make_payment(self.student, status='CAPTURED')
+        self.april = make_payment(self.student, status='FAILED', razorpay_payment_id='pay_with,comma')
+        Payment.objects.filter(id=self.march.id).update(created_at=self.at(2026, 3, 31))
+        Payment.objects.filter(id=self.april.id).update(created_at=self.at(2026, 4, 1))
+
+    @staticmethod
+    def at(year, month, day):
+        return timezone.make_aware(datetime.datetime(year, month, day, 23, 30))
+
+    @staticmethod
+    def read_csv(chunks):
+        return list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+
+
+class FinanceExporterTests(FinanceExportTestMixin, TestCase):
+
+    def test_csv_round_trip(self):
+        rows = self.read_csv(FinanceExporter.stream('payments', 'csv'))
+
+        self.assertEqual(list(rows[0]), DATASETS['payments'][3])
+        self.assertEqual([row['id'] for row in rows], [str(self.march.id), str(self.april.id)])
+        self.assertEqual(rows[0]['student__email'], 'student@example.com')
+        self.assertEqual(rows[0]['teacher_amount'], '425.00')
+        self.assertEqual(rows[1]['razorpay_payment_id'], 'pay_with,comma')
+
+    def test_date_filters_are_inclusive(self):
+        march = datetime.date(2026, 3, 31)
+        april = datetime.date(2026, 4, 1)
+
+        def ids(**filters):
+            return [row['id'] for row in self.read_csv(FinanceExporter.stream('payments', 'csv', **filters))]
+
+        self.assertEqual(ids(until=march), [str(self.march.id)])
+        self.assertEqual(ids(since=april), [str(self.april.id)])
+        self.assertEqual(ids(since=march, until=april), [str(self.march.id), str(self.april.id)])
+
+    def test_status_filter(self):
+        rows = self.read_csv(FinanceExporter.stream('payments', 'csv', status='FAILED'))
+
+        self.assertEqual([row['id'] for row in rows], [str(self.april.id)])
+
+    def test_unknown_dataset_and_format(self):
+        with self.assertRaises(ValueError):
+            FinanceExporter.stream('salaries')
+        with self.assertRaises(ValueError):
+            FinanceExporter.stream('payments', 'xlsx')
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_parquet_round_trip(self):
+        import pyarrow.parquet as pq
+
+        data = b''.join(FinanceExporter.stream('payments', 'parquet'))
+        table = pq.read_table(io.BytesIO(data))
+
+        self.assertEqual(table.column_names, DATASETS['payments'][3])
+        self.assertEqual(table.column('id').to_pylist(), [self.march.id, self.april.id])
+        self.assertEqual(str(table.column('teacher_amount')[0]), '425.00')
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow installed")
+    def test_parquet_without_pyarrow(self):
+        with self.assertRaises(RuntimeError):
+            FinanceExporter.stream('payments', 'parquet')
+
+
+class FinanceExportViewTests(FinanceExportTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        admin = make_user('finance@example.com', role='ADMIN')
+        admin.is_staff = True
+        admin.save(update_fields=['is_staff'])
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_streams_filtered_csv(self):
+        response = self.client.get('/api/courses/finance/export/payments/', {
+            'since': '2026-04-01', 'status': 'FAILED',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('payments.csv', response['Content-Disposition'])
+        rows = self.read_csv(response.streaming_content)
+        self.assertEqual([row['id'] for row in rows], [str(self.april.id)])
+
+    def test_rejects_bad_format_and_dates(self):
+        for params in ({'file_format': 'xlsx'}, {'since': '2026-13-01'}, {'until': 'yesterday'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/courses/finance/export/payments/', params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.student)
+
+        response = self.client.get('/api/courses/finance/export/payments/')
+
+        self.assertEqual(response.status_code, 403)
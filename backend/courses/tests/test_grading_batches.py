@@ -0,0 +1,76 @@
+import json
+from unittest import mock
+from django.test import SimpleTestCase
+
+from courses.assesment_services import AnswerGrader, AssessmentGenerator
+
+
+def item(size=0, label='q'):
+    return {'question': label + 'x' * size, 'correct_answer': 'a', 'student_answer': 'b'}
+
+
+class SplitGradingBatchesTests(SimpleTestCase):
+
+    def test_items_are_packed_up_to_the_token_budget(self):
+        # Each item costs len // 4 + 1 + 20 = 46 estimated tokens
+        items = [item(100) for _ in range(5)]
+
+        self.assertEqual(
+            AssessmentGenerator.split_grading_batches(items, token_budget=100, max_items=10),
+            [[0, 1], [2, 3], [4]]
+        )
+
+    def test_max_items_caps_a_batch(self):
+        items = [item() for _ in range(5)]
+
+        self.assertEqual(
+            AssessmentGenerator.split_grading_batches(items, token_budget=10_000, max_items=2),
+            [[0, 1], [2, 3], [4]]
+        )
+
+    def test_item_over_budget_gets_its_own_batch(self):
+        items = [item(), item(4000), item()]
+
+        self.assertEqual(
+            AssessmentGenerator.split_grading_batches(items, token_budget=100, max_items=10),
+            [[0], [1], [2]]
+        )
+
+    def test_empty(self):
+        self.assertEqual(AssessmentGenerator.split_grading_batches([]), [])
+
+
+class EvaluateShortAnswerBatchTests(SimpleTestCase):
+
+    def reply(self, content):
+        return mock.patch(
+            'courses.assesment_services.LLMService.generate_response', return_value={'content': content}
+        )
+
+    def test_results_are_matched_by_id(self):
+        content = '```json\n' + json.dumps([
+            {'id': 2, 'score': 0.0, 'is_correct': False, 'feedback': 'No'},
+            {'id': 1, 'score': 1.0, 'is_correct': True, 'feedback': 'Yes'},
+        ]) + '\n```'
+        with self.reply(content):
+            results = AssessmentGenerator.evaluate_short_answer_batch([item(), item()])
+
+        self.assertEqual([r['feedback'] for r in results], ['Yes', 'No'])
+
+    def test_missing_and_invalid_entries_are_none(self):
+        content = json.dumps([{'id': 1, 'score': 'high'}, {'id': 9, 'score': 1}, {'id': 3, 'score': 0.5}])
+        with self.reply(content):
+            results = AssessmentGenerator.evaluate_short_answer_batch([item(), item(), item()])
+
+        self.assertEqual([r and r['score'] for r in results], [None, None, 0.5])
+
+    def test_malformed_reply_falls_back_per_item(self):
+        single = {'score': 1.0, 'is_correct': True, 'feedback': 'Graded alone'}
+        with self.reply('Sorry, I cannot help with that'), \
+                mock.patch.object(AssessmentGenerator, 'evaluate_short_answer', return_value=single) as per_item:
+            results = AnswerGrader.evaluate_short_answers([item(label='q1'), item(label='q2')])
+
+        self.assertEqual(results, [single, single])
+        self.assertEqual(
+            sorted(call.kwargs['question'] for call in per_item.call_args_list), ['q1', 'q2']
+        )
@@ -0,0 +1,80 @@
+from django.test import TestCase
+
+from courses.grading_cache import GradingCache
+from courses.models import GradingCacheEntry, MockTest, MockTestQuestion
+from .factories import make_user
+
+
+class NormalizeAnswerTests(TestCase):
+
+    def test_case_whitespace_and_outer_punctuation_are_ignored(self):
+        self.assertEqual(GradingCache.normalize_answer('  The   MITOCHONDRIA.\n'), 'the mitochondria')
+        self.assertEqual(GradingCache.normalize_answer('"Photosynthesis!"'), 'photosynthesis')
+
+    def test_inner_punctuation_is_kept(self):
+        self.assertNotEqual(GradingCache.normalize_answer('3.14'), GradingCache.normalize_answer('314'))
+
+    def test_compatibility_forms_are_folded(self):
+        self.assertEqual(GradingCache.normalize_answer('ＡＢＣ'), 'abc')
+        self.assertEqual(GradingCache.normalize_answer('Straße'), GradingCache.normalize_answer('STRASSE'))
+
+    def test_empty_answer(self):
+        self.assertEqual(GradingCache.normalize_answer(None), '')
+
+
+class GradingCacheTests(TestCase):
+
+    def setUp(self):
+        student = make_user('student@example.com')
+        mock_test = MockTest.objects.create(student=student, title='Biology', subject='Biology')
+        self.question = MockTestQuestion.objects.create(
+            mock_test=mock_test, order=1, question_type='SHORT_ANSWER', question_text='Powerhouse of the cell?',
+            correct_answer='Mitochondria'
+        )
+        self.evaluation = {'score': 1.0, 'is_correct': True, 'feedback': 'Correct'}
+
+    def test_equivalent_answers_share_an_entry(self):
+        GradingCache.set_many([(self.question, 'Mitochondria')], [self.evaluation])
+
+        hit, = GradingCache.get_many([(self.question, '  mitochondria. ')])
+
+        self.assertEqual(hit['score'], 1.0)
+        self.assertTrue(hit['cached'])
+        self.assertEqual(GradingCacheEntry.objects.get().hit_count, 1)
+
+    def test_fallback_evaluations_are_not_stored(self):
+        GradingCache.set_many([(self.question, 'Mitochondria')], [{'score': 0.0, 'evaluated': False}])
+
+        self.assertFalse(GradingCacheEntry.objects.exists())
+
+    def test_changed_expected_answer_invalidates_entries(self):
+        GradingCache.set_many([(self.question, 'Mitochondria')], [self.evaluation])
+
+        self.question.correct_answer = 'Mitochondrion'
+        self.question.save()
+
+        self.assertEqual(GradingCache.get_many([(self.question, 'Mitochondria')]), [None])
+        self.assertFalse(GradingCacheEntry.objects.exists())
+
+    def test_points_change_invalidates_every_entry(self):
+        GradingCache.set_many([(self.question, 'Mitochondria')], [self.evaluation])
+        question = MockTestQuestion.objects.get(id=self.question.id)
+
+        question.points = 2
+        question.save()
+
+        self.assertFalse(GradingCacheEntry.objects.exists())
+
+    def test_insert_and_unchanged_save_leave_the_cache_alone(self):
+        GradingCache.set_many([(self.question, 'Mitochondria')], [self.evaluation])
+        question = MockTestQuestion.objects.get(id=self.question.id)
+
+        with self.assertNumQueries(1):
+            MockTestQuestion.objects.create(
+                mock_test_id=question.mock_test_id, order=2, question_type='MCQ', question_text='Q2', correct_answer='A'
+            )
+        with self.assertNumQueries(1):
+            question.question_text = 'What is the powerhouse of the cell?'
+            question.save()
+
+        self.assertEqual(GradingCacheEntry.objects.count(), 1)
@@ -0,0 +1,110 @@
+from unittest import mock
+from django.test import SimpleTestCase
+
+from courses import ai_service
+from courses.ai_service import OPENAI_HOST, LLMService
+from courses.http_client import CircuitBreaker, CircuitOpenError, OutboundHTTP
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = mock.patch('courses.http_client.time.monotonic', return_value=100.0)
+        self.now = self.clock.start()
+        self.addCleanup(self.clock.stop)
+        self.breaker = CircuitBreaker('api.example.com', threshold=3, reset_seconds=30)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        self.fail(2)
+        self.assertTrue(self.breaker.allow())
+
+        self.fail(1)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_the_count(self):
+        self.fail(2)
+        self.breaker.record_success()
+        self.fail(2)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_single_probe_after_reset_period(self):
+        self.fail(3)
+        self.now.return_value = 131.0
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_outcome_closes_or_reopens(self):
+        self.fail(3)
+        self.now.return_value = 131.0
+        self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.fail(3)
+        self.now.return_value = 200.0
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.opened_at, 200.0)
+
+
+class OutboundGuardTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.multiple(OutboundHTTP, _breakers={}, _stats={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        error = Exception('bad request')
+        error.status_code = 400
+
+        with self.settings(HTTP_BREAKER_FAILURES=1):
+            with self.assertRaises(Exception):
+                with OutboundHTTP.guard('api.example.com'):
+                    raise error
+            with OutboundHTTP.guard('api.example.com'):
+                pass
+
+        self.assertEqual(OutboundHTTP.metrics()['api.example.com']['errors'], 0)
+
+    def test_open_breaker_short_circuits(self):
+        with self.settings(HTTP_BREAKER_FAILURES=1):
+            with OutboundHTTP.guard('api.example.com') as call:
+                call.fail('HTTP 503')
+            with self.assertRaises(CircuitOpenError):
+                with OutboundHTTP.guard('api.example.com'):
+                    pass
+
+        metrics = OutboundHTTP.metrics()['api.example.com']
+        self.assertEqual((metrics['calls'], metrics['errors'], metrics['short_circuited']), (1, 1, 1))
+        self.assertEqual(metrics['circuit'], CircuitBreaker.OPEN)
+
+    def test_stream_failure_after_first_chunk_is_recorded(self):
+        def chunks():
+            yield mock.Mock(choices=[mock.Mock(delta=mock.Mock(content='Hel'))])
+            raise ConnectionError('reset by peer')
+
+        openai = mock.Mock()
+        openai.chat.completions.create.return_value = chunks()
+        received = []
+
+        with self.settings(LLM_PROVIDER='openai'), \
+                mock.patch.object(ai_service, 'get_openai', return_value=openai):
+            with self.assertRaises(ConnectionError):
+                for delta in LLMService.stream_response([{'role': 'user', 'content': 'Hi'}]):
+                    received.append(delta)
+
+        self.assertEqual(received, ['Hel'])
+        metrics = OutboundHTTP.metrics()[OPENAI_HOST]
+        self.assertEqual((metrics['calls'], metrics['errors']), (1, 1))
+        self.assertIn('reset by peer', metrics['last_error'])
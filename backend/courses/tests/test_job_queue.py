@@ -0,0 +1,145 @@
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.assesment_services import AssessmentGenerator, SessionSummarizer, TestGenerationJobProcessor
+from courses.job_queue import claim_jobs, requeue_stale_jobs
+from courses.models import MockTestGenerationJob
+from .factories import make_session, make_user
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher)
+
+    def make_job(self, key, **fields):
+        return MockTestGenerationJob.objects.create(
+            session=self.session, student=self.student, idempotency_key=key, **fields
+        )
+
+    def test_claim_jobs_applies_updates_and_respects_batch_size(self):
+        jobs = [self.make_job(f'k{i}') for i in range(3)]
+
+        claimed = claim_jobs(
+            MockTestGenerationJob.objects.filter(status='QUEUED').order_by('id'),
+            batch_size=2,
+            status='RUNNING'
+        )
+
+        self.assertEqual([job.id for job in claimed], [jobs[0].id, jobs[1].id])
+        self.assertTrue(all(job.status == 'RUNNING' for job in claimed))
+        self.assertEqual(MockTestGenerationJob.objects.filter(status='RUNNING').count(), 2)
+        self.assertEqual(MockTestGenerationJob.objects.get(id=jobs[2].id).status, 'QUEUED')
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        self.make_job('k')
+        queued = MockTestGenerationJob.objects.filter(status='QUEUED')
+
+        self.assertEqual(len(claim_jobs(queued, status='RUNNING')), 1)
+        self.assertEqual(claim_jobs(queued, status='RUNNING'), [])
+
+    def test_requeue_only_touches_jobs_older_than_timeout(self):
+        now = timezone.now()
+        stale = self.make_job('stale', status='RUNNING', started_at=now - timedelta(minutes=30))
+        fresh = self.make_job('fresh', status='RUNNING', started_at=now)
+
+        requeued = requeue_stale_jobs(
+            MockTestGenerationJob.objects.filter(status='RUNNING'), timeout_minutes=10, status='QUEUED'
+        )
+
+        self.assertEqual(requeued, 1)
+        self.assertEqual(MockTestGenerationJob.objects.get(id=stale.id).status, 'QUEUED')
+        self.assertEqual(MockTestGenerationJob.objects.get(id=fresh.id).status, 'RUNNING')
+
+    def test_stale_job_fails_once_attempts_are_spent(self):
+        long_ago = timezone.now() - timedelta(minutes=settings.TEST_GENERATION_JOB_TIMEOUT_MINUTES + 5)
+        spent = self.make_job(
+            'spent', status='RUNNING', started_at=long_ago, attempts=settings.TEST_GENERATION_MAX_ATTEMPTS
+        )
+        retryable = self.make_job('retryable', status='RUNNING', started_at=long_ago, attempts=1)
+
+        claimed = TestGenerationJobProcessor.claim_batch()
+
+        spent.refresh_from_db()
+        self.assertEqual(spent.status, 'FAILED')
+        self.assertIsNotNone(spent.completed_at)
+        self.assertEqual([job.id for job in claimed], [retryable.id])
+
+    def test_missing_content_fails_without_retry(self):
+        job = self.make_job('k', status='RUNNING')
+
+        with mock.patch.object(SessionSummarizer, 'extract_transcript_from_session', return_value=''):
+            self.assertFalse(TestGenerationJobProcessor.process_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 1))
+        self.assertEqual(job.error_message, 'No content available to generate test from')
+
+    def test_llm_failure_is_retried(self):
+        job = self.make_job('k', status='RUNNING')
+
+        with mock.patch.object(SessionSummarizer, 'extract_transcript_from_session', return_value='Notes'), \
+                mock.patch.object(AssessmentGenerator, 'generate_test_from_content', side_effect=RuntimeError('timeout')):
+            self.assertFalse(TestGenerationJobProcessor.process_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+
+
+class GenerateMockTestViewTests(TestCase):
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/courses/sessions/{self.session.id}/generate-test/'
+
+    def post(self, **headers):
+        return self.client.post(self.url, {'difficulty': 'EASY', 'num_questions': 5}, format='json', headers=headers)
+
+    def test_in_flight_job_is_reused_without_key(self):
+        first = self.post()
+        second = self.post()
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data['id'], second.data['id'])
+
+    def test_finished_job_is_not_reused_without_key(self):
+        first = self.post()
+        MockTestGenerationJob.objects.filter(id=first.data['id']).update(status='COMPLETED')
+
+        second = self.post()
+
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(first.data['id'], second.data['id'])
+
+    def test_explicit_key_returns_same_job_after_completion(self):
+        first = self.post(**{'Idempotency-Key': 'abc'})
+        MockTestGenerationJob.objects.filter(id=first.data['id']).update(status='COMPLETED')
+
+        second = self.post(**{'Idempotency-Key': 'abc'})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data['id'], second.data['id'])
+
+    def test_rejects_unknown_difficulty_and_out_of_range_counts(self):
+        for data in (
+            {'difficulty': 'EXTREME'},
+            {'num_questions': 0},
+            {'num_questions': settings.MOCK_TEST_MAX_QUESTIONS + 1},
+            {'num_questions': 'ten'},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post(self.url, data, format='json')
+                self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(MockTestGenerationJob.objects.exists())
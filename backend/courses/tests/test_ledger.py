@@ -0,0 +1,94 @@
+from decimal import Decimal
+from rest_framework.test import APIClient
+from django.test import TestCase
+
+from courses.ledger_service import EarningsLedger
+from courses.models import EarningsLedgerEntry, Payout, TeacherBalance
+from .factories import make_payment, make_session, make_user
+
+
+class EarningsLedgerTests(TestCase):
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher)
+
+    def balance(self):
+        balance = EarningsLedger.balance_for(self.teacher)
+        return balance.captured, balance.in_escrow, balance.paid_out, balance.pending_payouts
+
+    def test_capture_is_posted_once(self):
+        payment = make_payment(self.student, self.session)
+
+        self.assertEqual(EarningsLedger.sync_payments([payment.id]), 1)
+        self.assertEqual(EarningsLedger.sync_payments([payment.id]), 0)
+
+        self.assertEqual(self.balance(), (Decimal('425.00'), Decimal('425.00'), 0, 0))
+        self.assertEqual(EarningsLedgerEntry.objects.get().entry_type, 'CAPTURE')
+
+    def test_release_and_payout_move_money_between_buckets(self):
+        payment = make_payment(self.student, self.session)
+        EarningsLedger.sync_payments([payment.id])
+
+        payment.released_from_escrow = True
+        payment.save()
+        payout = Payout.objects.create(teacher=self.teacher, payment=payment, amount=payment.teacher_amount)
+        EarningsLedger.sync_payments([payment.id])
+        EarningsLedger.sync_payouts([payout.id])
+        self.assertEqual(self.balance(), (Decimal('425.00'), 0, 0, Decimal('425.00')))
+
+        payout.status = 'COMPLETED'
+        payout.save()
+        EarningsLedger.sync_payouts([payout.id])
+        self.assertEqual(self.balance(), (Decimal('425.00'), 0, Decimal('425.00'), 0))
+
+        self.assertEqual(
+            list(EarningsLedgerEntry.objects.order_by('id').values_list('entry_type', flat=True)),
+            ['CAPTURE', 'ESCROW_RELEASE', 'PAYOUT_QUEUED', 'PAYOUT_COMPLETED']
+        )
+
+    def test_refund_reverses_capture(self):
+        payment = make_payment(self.student, self.session)
+        EarningsLedger.sync_payments([payment.id])
+
+        payment.status = 'REFUNDED'
+        payment.save()
+        EarningsLedger.sync_payments([payment.id])
+
+        self.assertEqual(self.balance(), (0, 0, 0, 0))
+        self.assertEqual(EarningsLedgerEntry.objects.order_by('-id').first().entry_type, 'REVERSAL')
+
+    def test_course_payment_counts_for_course_teacher(self):
+        payment = make_payment(self.student, course=self.session.course)
+
+        EarningsLedger.sync_payments([payment.id])
+
+        self.assertEqual(self.balance()[0], Decimal('425.00'))
+
+    def test_drift_is_found_and_repaired(self):
+        payment = make_payment(self.student, self.session)
+        EarningsLedger.sync_payments([payment.id])
+        make_payment(self.student, self.session)  # saved without syncing
+        TeacherBalance.objects.filter(teacher=self.teacher).update(paid_out=Decimal('10.00'))
+
+        drift = {row['bucket'] for row in EarningsLedger.find_drift()}
+        self.assertEqual(drift, {'captured', 'in_escrow', 'paid_out'})
+
+        result = EarningsLedger.repair([self.teacher.id])
+
+        self.assertEqual(result, {'entries': 1, 'adjustments': 1})
+        self.assertEqual(EarningsLedger.find_drift(), [])
+        self.assertEqual(self.balance(), (Decimal('850.00'), Decimal('850.00'), 0, 0))
+
+    def test_earnings_view_reads_balance(self):
+        payment = make_payment(self.student, self.session)
+        EarningsLedger.sync_payments([payment.id])
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+
+        response = client.get('/api/courses/teacher/earnings/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_earnings'], 425.0)
+        self.assertEqual(response.data['in_escrow'], 425.0)
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from courses.models import NumberSequence
+from courses.numbering import NumberAllocator
+
+
+@override_settings(NUMBER_BLOCK_SIZE=5)
+class NumberAllocatorTests(TransactionTestCase):
+    # Reservations commit on their own connection, so these tests need real commits
+
+    def setUp(self):
+        NumberAllocator._blocks = {}
+
+    def counter(self, sequence='invoice'):
+        return NumberSequence.objects.get(name=sequence).next_value
+
+    def test_numbers_come_from_one_block(self):
+        numbers = [NumberAllocator.allocate('invoice')[0] for _ in range(5)]
+
+        self.assertEqual(numbers, [1, 2, 3, 4, 5])
+        self.assertEqual(self.counter(), 6)
+
+    def test_next_block_is_reserved_when_exhausted(self):
+        NumberAllocator.allocate('invoice', 4)
+
+        self.assertEqual(NumberAllocator.allocate('invoice', 3), [5, 6, 7])
+        self.assertEqual(self.counter(), 11)
+
+    def test_bulk_request_reserves_exactly_what_it_needs(self):
+        numbers = NumberAllocator.allocate('ticket', 12)
+
+        self.assertEqual(numbers, list(range(1, 13)))
+        self.assertEqual(self.counter('ticket'), 13)
+
+    def test_rolled_back_transaction_does_not_return_numbers(self):
+        try:
+            with transaction.atomic():
+                first = NumberAllocator.allocate('invoice')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        # The block stays reserved even though the caller rolled back
+        self.assertEqual(self.counter(), 6)
+
+        NumberAllocator._blocks = {}  # another worker starting fresh
+        self.assertNotIn(first[0], NumberAllocator.allocate('invoice', 5))
+
+    def test_format(self):
+        number = NumberAllocator.next_number('invoice')
+
+        self.assertRegex(number, r'^INV-\d{4}-000001$')
@@ -0,0 +1,113 @@
+import hashlib
+import hmac
+import json
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from courses.ledger_service import EarningsLedger
+from courses.models import PaymentWebhookEvent
+from courses.payment_service import PaymentWebhookProcessor
+from .factories import make_payment, make_session, make_user
+
+
+def webhook(event, order_id, created_at, **entity):
+    return json.dumps({
+        'event': event,
+        'created_at': created_at,
+        'payload': {'payment': {'entity': {'id': 'pay_1', 'order_id': order_id, **entity}}},
+    }).encode()
+
+
+class PaymentWebhookTests(TestCase):
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.payment = make_payment(
+            self.student, make_session(self.student, self.teacher),
+            status='PENDING', razorpay_payment_id=None, captured_at=None
+        )
+        self.order_id = self.payment.razorpay_order_id
+
+    def test_redeliveries_are_stored_once(self):
+        body = webhook('payment.captured', self.order_id, 100)
+
+        PaymentWebhookProcessor.enqueue(body, 'evt_1')
+        PaymentWebhookProcessor.enqueue(body, 'evt_1')
+        PaymentWebhookProcessor.enqueue(body)
+        PaymentWebhookProcessor.enqueue(body)
+
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 2)
+        self.assertEqual(PaymentWebhookEvent.objects.first().razorpay_order_id, self.order_id)
+
+    def test_non_object_body_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PaymentWebhookProcessor.enqueue(b'[1, 2]')
+
+    def test_out_of_order_events_end_captured(self):
+        PaymentWebhookProcessor.enqueue(webhook('payment.captured', self.order_id, 200, method='upi'))
+        PaymentWebhookProcessor.enqueue(webhook('payment.authorized', self.order_id, 100))
+
+        self.assertEqual(PaymentWebhookProcessor.process_batch(), 2)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'CAPTURED')
+        self.assertEqual((self.payment.razorpay_payment_id, self.payment.payment_method), ('pay_1', 'upi'))
+        self.assertIsNotNone(self.payment.authorized_at)
+        self.assertEqual(set(PaymentWebhookEvent.objects.values_list('status', flat=True)), {'PROCESSED'})
+        self.assertEqual(EarningsLedger.balance_for(self.teacher).captured, self.payment.teacher_amount)
+
+    def test_late_failure_does_not_undo_capture(self):
+        PaymentWebhookProcessor.enqueue(webhook('payment.captured', self.order_id, 100))
+        PaymentWebhookProcessor.process_batch()
+        PaymentWebhookProcessor.enqueue(webhook('payment.failed', self.order_id, 200, error_code='BAD_REQUEST_ERROR'))
+        PaymentWebhookProcessor.process_batch()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'CAPTURED')
+        self.assertIsNone(self.payment.error_code)
+
+    def test_refunded_payment_is_final(self):
+        self.payment.status = 'REFUNDED'
+        self.payment.save()
+        PaymentWebhookProcessor.enqueue(webhook('payment.captured', self.order_id, 100))
+
+        PaymentWebhookProcessor.process_batch()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'REFUNDED')
+
+    def test_unknown_orders_and_events_are_ignored(self):
+        PaymentWebhookProcessor.enqueue(webhook('payment.captured', 'order_unknown', 100))
+        PaymentWebhookProcessor.enqueue(webhook('refund.created', self.order_id, 100))
+
+        PaymentWebhookProcessor.process_batch()
+
+        self.assertEqual(set(PaymentWebhookEvent.objects.values_list('status', flat=True)), {'IGNORED'})
+
+    @override_settings(PAYMENT_WEBHOOK_MAX_ATTEMPTS=2)
+    def test_failing_batch_is_retried_then_failed(self):
+        PaymentWebhookProcessor.enqueue(webhook('payment.captured', self.order_id, 100))
+
+        with mock.patch.object(PaymentWebhookProcessor, 'apply_events', side_effect=RuntimeError('db down')):
+            PaymentWebhookProcessor.process_batch()
+            event = PaymentWebhookEvent.objects.get()
+            self.assertEqual((event.status, event.attempts), ('QUEUED', 1))
+
+            PaymentWebhookProcessor.process_batch()
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.error_message), ('FAILED', 'db down'))
+
+    @override_settings(RAZORPAY_WEBHOOK_SECRET='whsec')
+    def test_view_verifies_signature_and_queues(self):
+        body = webhook('payment.captured', self.order_id, 100)
+        signature = hmac.new(b'whsec', body, hashlib.sha256).hexdigest()
+        url = '/api/courses/payments/webhook/'
+
+        bad = self.client.post(url, body, content_type='application/json', headers={'X-Razorpay-Signature': 'nope'})
+        good = self.client.post(url, body, content_type='application/json', headers={
+            'X-Razorpay-Signature': signature, 'X-Razorpay-Event-Id': 'evt_1'
+        })
+
+        self.assertEqual((bad.status_code, good.status_code), (400, 200))
+        self.assertEqual(PaymentWebhookEvent.objects.get().event_id, 'evt_1')
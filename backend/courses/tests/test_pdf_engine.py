@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from courses.pdf_engine import STATIC_PARAGRAPHS, PDFTemplates
+
+
+class StaticParagraphTests(SimpleTestCase):
+
+    def test_each_call_builds_a_new_paragraph_on_the_cached_style(self):
+        first = PDFTemplates.static('invoice_footer')
+        second = PDFTemplates.static('invoice_footer')
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.style, second.style)
+        self.assertIs(first.style, PDFTemplates.styles()['invoice_footer'])
+
+    def test_every_static_paragraph_has_a_style(self):
+        for name in STATIC_PARAGRAPHS:
+            with self.subTest(name=name):
+                self.assertTrue(PDFTemplates.static(name).getPlainText())
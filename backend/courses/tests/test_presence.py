@@ -0,0 +1,73 @@
+import datetime
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from courses.models import SessionPresence
+from courses.presence import PresenceRegistry
+from .factories import make_session, make_user
+
+
+@override_settings(PRESENCE_TIMEOUT_SECONDS=60)
+class PresenceRegistryTests(TestCase):
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(self.student, self.teacher)
+
+    def age(self, channel_name, seconds):
+        SessionPresence.objects.filter(channel_name=channel_name).update(
+            last_seen=timezone.now() - datetime.timedelta(seconds=seconds)
+        )
+
+    def test_join_counts_connections_per_user(self):
+        PresenceRegistry.join(self.session.id, self.student.id, 'phone')
+        PresenceRegistry.join(self.session.id, self.student.id, 'laptop')
+        roster = PresenceRegistry.join(self.session.id, self.teacher.id, 'teacher')
+
+        self.assertEqual(roster, [
+            {'user_id': self.student.id, 'name': 'student Test', 'role': 'STUDENT', 'connections': 2},
+            {'user_id': self.teacher.id, 'name': 'teacher Test', 'role': 'TEACHER', 'connections': 1},
+        ])
+
+    def test_rejoin_on_same_channel_does_not_duplicate(self):
+        PresenceRegistry.join(self.session.id, self.student.id, 'phone')
+        roster = PresenceRegistry.join(self.session.id, self.student.id, 'phone')
+
+        self.assertEqual(roster[0]['connections'], 1)
+        self.assertEqual(SessionPresence.objects.count(), 1)
+
+    def test_leave_removes_only_that_socket(self):
+        PresenceRegistry.join(self.session.id, self.student.id, 'phone')
+        PresenceRegistry.join(self.session.id, self.student.id, 'laptop')
+
+        roster = PresenceRegistry.leave(self.session.id, 'phone')
+
+        self.assertEqual(roster[0]['connections'], 1)
+        self.assertEqual(PresenceRegistry.leave(self.session.id, 'laptop'), [])
+
+    def test_silent_sockets_time_out_and_touch_keeps_them(self):
+        PresenceRegistry.join(self.session.id, self.student.id, 'phone')
+        PresenceRegistry.join(self.session.id, self.teacher.id, 'teacher')
+        self.age('phone', 61)
+        self.age('teacher', 61)
+        PresenceRegistry.touch('teacher')
+
+        roster = PresenceRegistry.roster(self.session.id)
+
+        self.assertEqual([row['user_id'] for row in roster], [self.teacher.id])
+        self.assertTrue(SessionPresence.objects.filter(channel_name='phone').exists())  # not purged yet
+
+    def test_join_purges_timed_out_rows_of_the_room(self):
+        other = make_session(self.student, self.teacher)
+        PresenceRegistry.join(self.session.id, self.student.id, 'dead')
+        PresenceRegistry.join(other.id, self.student.id, 'other room')
+        self.age('dead', 61)
+        self.age('other room', 61)
+
+        PresenceRegistry.join(self.session.id, self.teacher.id, 'teacher')
+
+        self.assertEqual(
+            sorted(SessionPresence.objects.values_list('channel_name', flat=True)),
+            ['other room', 'teacher'],
+        )
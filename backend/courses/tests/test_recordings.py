@@ -0,0 +1,87 @@
+import json
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+
+from courses.models import RecordingEvent
+from courses.recordings import RecordingIngestor
+from .factories import make_session, make_user
+
+
+class MergeAssetsTests(SimpleTestCase):
+
+    def test_one_entry_per_url_with_metadata_filled_in(self):
+        existing = ['https://cdn/a.mp4', {'url': 'https://cdn/b.mp4', 'size_bytes': 10}]
+        metadata = {'https://cdn/c.mp4': {'url': 'https://cdn/c.mp4', 'duration_seconds': 60}}
+
+        merged = RecordingIngestor.merge_assets(existing, ['https://cdn/b.mp4', 'https://cdn/c.mp4'], metadata)
+
+        self.assertEqual(merged, [
+            {'url': 'https://cdn/a.mp4'},
+            {'url': 'https://cdn/b.mp4', 'size_bytes': 10},
+            {'url': 'https://cdn/c.mp4', 'duration_seconds': 60},
+        ])
+
+    def test_metadata_refreshes_existing_entries(self):
+        merged = RecordingIngestor.merge_assets(
+            [{'url': 'u', 'size_bytes': 1, 'label': 'x'}], [], {'u': {'url': 'u', 'size_bytes': 2}}
+        )
+
+        self.assertEqual(merged, [{'url': 'u', 'size_bytes': 2, 'label': 'x'}])
+
+    def test_empty_existing(self):
+        self.assertEqual(RecordingIngestor.merge_assets(None, ['u'], {}), [{'url': 'u'}])
+
+
+class RecordingIngestorTests(TestCase):
+
+    def setUp(self):
+        student = make_user('student@example.com')
+        teacher = make_user('teacher@example.com', role='TEACHER')
+        self.session = make_session(student, teacher, provider_room_id='room-1')
+        self.provider = mock.Mock()
+        self.provider.fetch.return_value = {'u1': {'url': 'u1', 'size_bytes': 5}}
+        patcher = mock.patch.object(RecordingIngestor, 'metadata_provider', self.provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enqueue(self, event='recording.completed', room_id='room-1', assets=('u1',)):
+        RecordingIngestor.enqueue(json.dumps({'event': event, 'roomId': room_id, 'assets': list(assets)}).encode())
+
+    def test_redelivered_webhook_is_stored_once(self):
+        self.enqueue()
+        self.enqueue()
+
+        self.assertEqual(RecordingEvent.objects.count(), 1)
+
+    def test_batch_attaches_assets_and_ignores_the_rest(self):
+        self.enqueue()
+        self.enqueue(event='recording.started', assets=('u2',))
+        self.enqueue(room_id='room-unknown')
+
+        self.assertEqual(RecordingIngestor.process_batch(), 3)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.recording_assets, [{'url': 'u1', 'size_bytes': 5}])
+        self.assertIsNotNone(self.session.ended_at)
+        self.assertEqual(
+            sorted(RecordingEvent.objects.values_list('status', flat=True)), ['IGNORED', 'IGNORED', 'PROCESSED']
+        )
+        self.provider.fetch.assert_called_once_with('room-1')
+
+    def test_failed_metadata_lookup_requeues_only_that_room(self):
+        make_session(self.session.student, self.session.teacher, provider_room_id='room-2')
+
+        def fetch(room_id):
+            if room_id == 'room-2':
+                raise OSError('timeout')
+            return {'u1': {'url': 'u1'}}
+
+        self.provider.fetch.side_effect = fetch
+        self.enqueue()
+        self.enqueue(room_id='room-2', assets=('u9',))
+
+        RecordingIngestor.process_batch()
+
+        statuses = dict(RecordingEvent.objects.values_list('room_id', 'status'))
+        self.assertEqual(statuses, {'room-1': 'PROCESSED', 'room-2': 'QUEUED'})
+        self.assertEqual(RecordingEvent.objects.get(room_id='room-2').attempts, 1)
@@ -0,0 +1,55 @@
+from contextlib import nullcontext
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.models import MockTest, MockTestAttempt
+from courses.pdf_service import ScorecardJobProcessor
+from .factories import make_user
+
+
+class RegenerateScorecardsTests(TestCase):
+
+    def setUp(self):
+        student = make_user('student@example.com')
+        mock_test = MockTest.objects.create(student=student, title='Biology', subject='Biology')
+        self.ready = MockTestAttempt.objects.create(
+            mock_test=mock_test, student=student, status='COMPLETED', scorecard_status='READY'
+        )
+        self.rendering = MockTestAttempt.objects.create(
+            mock_test=mock_test, student=student, status='COMPLETED', scorecard_status='RENDERING',
+            scorecard_requested_at=timezone.now() - timedelta(hours=1)
+        )
+
+    def run_command(self):
+        rendered = []
+
+        def render_attempts(attempts, executor=None):
+            attempts = list(attempts)
+            rendered.extend(attempt.id for attempt in attempts)
+            return len(attempts), 0
+
+        out = StringIO()
+        with mock.patch.object(ScorecardJobProcessor, 'create_executor', return_value=nullcontext()), \
+                mock.patch.object(ScorecardJobProcessor, 'render_attempts', side_effect=render_attempts):
+            call_command('regenerate_scorecards', stdout=out)
+        return rendered, out.getvalue()
+
+    def test_rows_already_rendering_are_skipped(self):
+        rendered, out = self.run_command()
+
+        self.assertEqual(rendered, [self.ready.id])
+        self.assertIn('1 already rendering', out)
+        # The in-flight render keeps its claim untouched
+        self.rendering.refresh_from_db()
+        self.assertLess(self.rendering.scorecard_requested_at, timezone.now() - timedelta(minutes=30))
+
+    def test_claimed_rows_are_not_requeued_as_stale(self):
+        self.run_command()
+
+        self.ready.refresh_from_db()
+        self.assertEqual(self.ready.scorecard_status, 'RENDERING')
+        self.assertNotIn(self.ready.id, [attempt.id for attempt in ScorecardJobProcessor.claim_batch()])
@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.models import Payment, Refund, RevenueRollup, RevenueRollupDirtyDay
+from courses.rollup_service import MAX_MONTH_BUCKETS, RevenueRollups, months_between
+from .factories import make_payment, make_session, make_user
+
+
+class RevenueRollupSeriesTests(TestCase):
+
+    def test_months_between(self):
+        self.assertEqual(months_between(date(2025, 1, 31), date(2025, 1, 31)), 1)
+        self.assertEqual(months_between(date(2024, 11, 15), date(2025, 2, 1)), 4)
+
+    def test_month_series_mixes_month_and_day_rows(self):
+        RevenueRollup.objects.create(period='MONTH', bucket=date(2025, 2, 1), gross_revenue=Decimal('100'))
+        RevenueRollup.objects.create(period='DAY', bucket=date(2025, 1, 10), gross_revenue=Decimal('5'))
+        RevenueRollup.objects.create(period='DAY', bucket=date(2025, 1, 20), gross_revenue=Decimal('7'))
+        RevenueRollup.objects.create(period='DAY', bucket=date(2025, 2, 3), gross_revenue=Decimal('999'))
+
+        buckets = RevenueRollups.series(date(2025, 1, 15), date(2025, 3, 31), 'month')
+
+        self.assertEqual([bucket['bucket'] for bucket in buckets], [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)])
+        # Jan is partial (day rows from the 15th), Feb comes from its month row
+        self.assertEqual([bucket['gross_revenue'] for bucket in buckets], [Decimal('7'), Decimal('100'), 0])
+
+
+class RevenueRollupViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('teacher@example.com', role='TEACHER'))
+        self.url = '/api/courses/teacher/earnings/history/'
+
+    def test_month_range_is_capped(self):
+        ok = self.client.get(self.url, {'interval': 'month', 'since': '2016-01-01', 'until': '2025-12-31'})
+        too_long = self.client.get(self.url, {'interval': 'month', 'since': '2015-12-31', 'until': '2025-12-31'})
+
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(len(ok.data['buckets']), MAX_MONTH_BUCKETS)
+        self.assertEqual(too_long.status_code, 400)
+
+    def test_day_range_is_capped(self):
+        response = self.client.get(self.url, {'since': '2024-01-01', 'until': '2025-12-31'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ProcessRefundViewTests(TestCase):
+
+    def setUp(self):
+        student = make_user('student@example.com')
+        teacher = make_user('teacher@example.com', role='TEACHER')
+        self.payment = make_payment(student, make_session(student, teacher, status='COMPLETED'))
+        self.refund = Refund.objects.create(
+            payment=self.payment, student=student, refund_amount=Decimal('500.00'), reason='OTHER',
+            description='Teacher did not show up'
+        )
+        admin = make_user('admin@example.com', role='ADMIN')
+        admin.is_staff = True
+        admin.save(update_fields=['is_staff'])
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.url = f'/api/courses/refunds/{self.refund.id}/process/'
+        service = mock.Mock()
+        service.create_refund.return_value = {'id': 'rfnd_1'}
+        patcher = mock.patch('courses.views_payment.RazorpayService', return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_approval_completes_refund_and_marks_rollups_dirty(self):
+        response = self.client.post(self.url, {'action': 'approve', 'admin_notes': 'ok'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.refund.refresh_from_db()
+        self.assertEqual((self.refund.status, self.refund.razorpay_refund_id), ('COMPLETED', 'rfnd_1'))
+        self.assertEqual(Payment.objects.get(id=self.payment.id).status, 'REFUNDED')
+        self.assertTrue(RevenueRollupDirtyDay.objects.filter(day=timezone.localdate(self.refund.completed_at)).exists())
+
+    def test_refund_and_payment_roll_back_together(self):
+        with mock.patch.object(RevenueRollups, 'mark_dirty', side_effect=RuntimeError('db gone')):
+            response = self.client.post(self.url, {'action': 'approve'}, format='json')
+
+        self.assertEqual(response.status_code, 500)
+        self.refund.refresh_from_db()
+        self.assertEqual(self.refund.status, 'FAILED')
+        self.assertEqual(Payment.objects.get(id=self.payment.id).status, 'CAPTURED')
@@ -0,0 +1,111 @@
+import datetime
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from courses.models import Session
+from courses.rtc import RoomManager
+from courses.rtc_stub import StubVideoSDKServer
+from .factories import make_session, make_user
+
+NOW = timezone.make_aware(datetime.datetime(2026, 5, 4, 12, 0))
+
+
+class RoomTestMixin:
+
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+
+    def session_at(self, start_minutes, length_minutes=60, **fields):
+        start = timezone.localtime(NOW) + datetime.timedelta(minutes=start_minutes)
+        end = start + datetime.timedelta(minutes=length_minutes)
+        return make_session(
+            self.student, self.teacher,
+            scheduled_date=start.date(), start_time=start.time(), end_time=end.time(), **fields
+        )
+
+    def frozen_clock(self):
+        return mock.patch('courses.rtc.timezone.localtime', return_value=timezone.localtime(NOW))
+
+
+class AssignRoomTests(RoomTestMixin, TestCase):
+
+    def test_first_room_wins(self):
+        session = self.session_at(10)
+
+        self.assertEqual(RoomManager.assign_room(session.id, 'room-a'), 'room-a')
+        self.assertEqual(RoomManager.assign_room(session.id, 'room-b'), 'room-a')
+
+        session.refresh_from_db()
+        self.assertEqual(session.provider_room_id, 'room-a')
+
+    def test_unknown_session(self):
+        self.assertIsNone(RoomManager.assign_room(12345, 'room-a'))
+
+    def test_ensure_room_reuses_existing_room(self):
+        session = self.session_at(10, provider_room_id='room-a')
+
+        with mock.patch('courses.rtc.videosdk_create_or_get_room') as create:
+            self.assertEqual(RoomManager.ensure_room(session), 'room-a')
+
+        create.assert_not_called()
+
+
+class UpcomingWithoutRoomTests(RoomTestMixin, TestCase):
+
+    def test_window(self):
+        starting_soon = self.session_at(10)
+        running = self.session_at(-30)
+        confirmed = self.session_at(60, status='CONFIRMED')
+        self.session_at(61)  # starts after the window
+        self.session_at(-120)  # already over
+        self.session_at(10, provider_room_id='room-a')
+        self.session_at(10, status='CANCELLED')
+
+        with self.frozen_clock():
+            upcoming = RoomManager.upcoming_without_room(60)
+
+        self.assertEqual(sorted(upcoming), sorted([starting_soon.id, running.id, confirmed.id]))
+
+
+class PrewarmTests(RoomTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = StubVideoSDKServer().start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_creates_one_room_per_upcoming_session(self):
+        sessions = [self.session_at(5), self.session_at(20), self.session_at(-10)]
+        later = self.session_at(180)
+
+        # One worker: SQLite in the test settings allows a single writer
+        with override_settings(VIDEOSDK_API_URL=self.server.url), self.frozen_clock():
+            report = RoomManager.prewarm(minutes=30, max_workers=1)
+
+        self.assertEqual(report['sessions'], 3)
+        self.assertEqual(report['assigned'], 3)
+        self.assertEqual(report['failed'], 0)
+        self.assertEqual(self.server.rooms_created, 3)
+        rooms = [Session.objects.get(id=s.id).provider_room_id for s in sessions]
+        self.assertTrue(all(room.startswith('stub-') for room in rooms))
+        self.assertEqual(len(set(rooms)), 3)
+        self.assertIsNone(Session.objects.get(id=later.id).provider_room_id)
+
+        with override_settings(VIDEOSDK_API_URL=self.server.url), self.frozen_clock():
+            again = RoomManager.prewarm(minutes=30, max_workers=1)
+
+        self.assertEqual(again['sessions'], 0)
+        self.assertEqual(self.server.rooms_created, 3)
+
+    def test_provider_errors_are_counted_not_raised(self):
+        session = self.session_at(5)
+
+        with override_settings(VIDEOSDK_API_URL=f'{self.server.url}/missing'), self.frozen_clock(), \
+                self.assertLogs('courses.rtc', level='ERROR'):
+            report = RoomManager.prewarm(minutes=30, max_workers=1)
+
+        self.assertEqual(report['failed'], 1)
+        self.assertIsNone(Session.objects.get(id=session.id).provider_room_id)
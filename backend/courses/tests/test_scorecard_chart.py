@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from courses.pdf_engine import BRAND_BLUE, FAIL_RED, PASS_GREEN
+from courses.pdf_service import ScorecardGenerator
+
+
+def answers(level, correct, wrong):
+    return [{'bloom_level': level, 'is_correct': True}] * correct + [{'bloom_level': level, 'is_correct': False}] * wrong
+
+
+class BloomAccuracyChartTests(SimpleTestCase):
+
+    def chart(self, rows):
+        drawing = ScorecardGenerator._bloom_accuracy_chart(rows)
+        return drawing.contents[0]
+
+    def test_levels_follow_bloom_order_with_unknown_levels_last(self):
+        chart = self.chart(
+            answers('Custom', 1, 0) + answers('evaluate', 1, 0) + answers(None, 1, 0)
+            + answers('Remember', 1, 0) + answers('apply', 1, 0)
+        )
+
+        self.assertEqual(chart.categoryAxis.categoryNames, ['Remember', 'Apply', 'Evaluate', 'Custom', 'General'])
+
+    def test_accuracy_per_level(self):
+        chart = self.chart(answers('remember', 3, 1) + answers('apply', 1, 1))
+
+        self.assertEqual(chart.data, [[75.0, 50.0]])
+
+    def test_bars_are_coloured_by_strength(self):
+        chart = self.chart(answers('remember', 3, 1) + answers('understand', 2, 1) + answers('apply', 1, 1))
+
+        self.assertEqual(
+            [chart.bars[(0, i)].fillColor for i in range(3)],
+            [PASS_GREEN, BRAND_BLUE, FAIL_RED]
+        )
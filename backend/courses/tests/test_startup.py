@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from courses.management.commands.benchmark_startup import BOOT_SCRIPT, LAZY_MODULES
+
+
+class LazyImportTests(SimpleTestCase):
+
+    def test_loading_the_views_imports_no_heavy_library(self):
+        # A fresh interpreter, since this test process may already have loaded them
+        result = subprocess.run(
+            [sys.executable, '-c', BOOT_SCRIPT, 'courses.views', *LAZY_MODULES],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])['loaded']
+        # The URLconf pulled in every view module, and none of the heavy libraries
+        self.assertEqual(loaded, ['courses.views'])
@@ -0,0 +1,95 @@
+import datetime
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from courses.models import Statement, StatementRun
+from courses.statement_service import StatementGenerator
+from .factories import make_payment, make_session, make_user
+
+PERIOD = datetime.date(2026, 3, 1)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class GenerateStatementsTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.enterContext(mock.patch.object(StatementGenerator, 'render_statement', return_value=b'%PDF-test'))
+
+        teacher = make_user('teacher@example.com', role='TEACHER')
+        captured_at = timezone.make_aware(datetime.datetime(2026, 3, 10, 12, 0))
+        self.students = [make_user(f'student{i}@example.com') for i in range(3)]
+        for student in self.students:
+            make_payment(student, make_session(student, teacher), captured_at=captured_at)
+        # Outside the month
+        make_payment(self.students[0], captured_at=captured_at + datetime.timedelta(days=30))
+
+        self.run = StatementRun.objects.create(period=PERIOD)
+
+    def crash_after(self, chunks):
+        """log() stand-in that fails once `chunks` chunks have been checkpointed"""
+        calls = []
+
+        def log(message):
+            calls.append(message)
+            if len(calls) == chunks:
+                raise Interrupted(message)
+        return log
+
+    def test_checkpoints_after_each_chunk(self):
+        written = StatementGenerator.generate_statements(self.run, 'STUDENT', users_per_chunk=2, log=lambda _: None)
+
+        self.assertEqual(written, 3)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.student_checkpoint, self.students[-1].id)
+        self.assertEqual(self.run.statements_count, 3)
+        statements = Statement.objects.filter(run=self.run, role='STUDENT')
+        self.assertEqual(sorted(s.user_id for s in statements), [s.id for s in self.students])
+        self.assertTrue(all(s.line_count == 1 and s.checksum for s in statements))
+
+    def test_resumes_from_checkpoint_after_interruption(self):
+        with self.assertRaises(Interrupted):
+            StatementGenerator.generate_statements(self.run, 'STUDENT', users_per_chunk=1, log=self.crash_after(1))
+
+        run = StatementRun.objects.get(id=self.run.id)
+        self.assertEqual(run.student_checkpoint, self.students[0].id)
+        self.assertEqual(run.statements_count, 1)
+
+        with mock.patch.object(StatementGenerator, 'stream_student_lines',
+                               wraps=StatementGenerator.stream_student_lines) as stream:
+            written = StatementGenerator.generate_statements(run, 'STUDENT', users_per_chunk=1, log=lambda _: None)
+
+        self.assertEqual(stream.call_args.kwargs['after_user_id'], self.students[0].id)
+        self.assertEqual(written, 2)
+        run.refresh_from_db()
+        self.assertEqual(run.statements_count, 3)
+        self.assertEqual(Statement.objects.filter(run=run, role='STUDENT').count(), 3)
+
+    def test_restart_discards_progress(self):
+        StatementGenerator.generate_statements(self.run, 'STUDENT', users_per_chunk=1, log=lambda _: None)
+        StatementRun.objects.filter(id=self.run.id).update(status='FAILED')
+
+        run = StatementGenerator.run_month(PERIOD, restart=True, log=lambda _: None)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(run.statements_count, 4)  # 3 students + 1 teacher, counted once
+        self.assertEqual(Statement.objects.filter(run=run).count(), 4)
+        self.assertTrue(run.manifest_file.name.endswith('manifest.csv'))
+        self.assertTrue(run.archive_file.name.endswith('statements-2026-03.zip'))
+
+    def test_completed_run_is_not_regenerated(self):
+        StatementRun.objects.filter(id=self.run.id).update(status='COMPLETED')
+
+        with mock.patch.object(StatementGenerator, 'generate_statements') as generate:
+            run = StatementGenerator.run_month(PERIOD, log=lambda _: None)
+
+        generate.assert_not_called()
+        self.assertEqual(run.status, 'COMPLETED')
@@ -0,0 +1,117 @@
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from courses.assesment_services import AnswerGrader, AssessmentGenerator
+from courses.models import MockTest, MockTestAnswer, MockTestAttempt, MockTestQuestion
+from .factories import make_user
+
+
+class SubmissionTestMixin:
+
+    def make_test(self):
+        self.student = make_user('student@example.com')
+        self.mock_test = MockTest.objects.create(student=self.student, title='Biology', subject='Biology')
+        self.mcq = MockTestQuestion.objects.create(
+            mock_test=self.mock_test, order=1, question_type='MCQ', question_text='Cell powerhouse?',
+            options=['Nucleus', 'Mitochondria'], correct_answer='B'
+        )
+        self.true_false = MockTestQuestion.objects.create(
+            mock_test=self.mock_test, order=2, question_type='TRUE_FALSE', question_text='Plants photosynthesize',
+            correct_answer='True'
+        )
+        self.short = MockTestQuestion.objects.create(
+            mock_test=self.mock_test, order=3, question_type='SHORT_ANSWER', question_text='Define osmosis',
+            correct_answer='Movement of water across a membrane', points=Decimal('2.00')
+        )
+        self.answers = [
+            {'question_id': self.short.id, 'selected_answer': 'Water moving through a membrane'},
+            {'question_id': self.mcq.id, 'selected_answer': ' b '},
+            {'question_id': self.true_false.id, 'selected_answer': 'False'},
+        ]
+
+
+class GradeSubmissionTests(SubmissionTestMixin, TestCase):
+
+    def setUp(self):
+        self.make_test()
+
+    def test_objective_answers_are_graded_locally_and_short_answers_by_llm(self):
+        evaluation = {'score': 0.75, 'is_correct': True, 'feedback': 'Mostly right'}
+        with mock.patch.object(AssessmentGenerator, 'evaluate_short_answer', return_value=evaluation) as llm:
+            graded = AnswerGrader.grade_submission(self.mock_test, self.answers)
+
+        self.assertEqual([g['question'].id for g in graded], [self.mcq.id, self.true_false.id, self.short.id])
+        self.assertEqual([g['is_correct'] for g in graded], [True, False, True])
+        self.assertEqual([g['points_earned'] for g in graded], [Decimal('1.00'), Decimal('0.00'), Decimal('1.50')])
+        self.assertEqual(graded[2]['ai_feedback'], 'Mostly right')
+        llm.assert_called_once()
+
+    def test_unknown_and_malformed_question_ids_are_ignored(self):
+        graded = AnswerGrader.grade_submission(self.mock_test, [
+            {'question_id': 'abc', 'selected_answer': 'A'},
+            {'question_id': 999999, 'selected_answer': 'A'},
+            {'question_id': self.mcq.id, 'selected_answer': 'A'},
+            {'question_id': self.mcq.id, 'selected_answer': 'B'},
+        ])
+
+        self.assertEqual([(g['question'].id, g['selected_answer']) for g in graded], [(self.mcq.id, 'B')])
+
+    def test_llm_failure_gives_partial_credit(self):
+        with mock.patch.object(AssessmentGenerator, 'evaluate_short_answer', side_effect=RuntimeError('timeout')):
+            graded = AnswerGrader.grade_submission(self.mock_test, self.answers[:1])
+
+        self.assertEqual(graded[0]['points_earned'], Decimal('1.00'))
+        self.assertFalse(graded[0]['is_correct'])
+
+
+class SubmitMockTestViewTests(SubmissionTestMixin, TestCase):
+
+    def setUp(self):
+        self.make_test()
+        self.attempt = MockTestAttempt.objects.create(
+            mock_test=self.mock_test, student=self.student, max_score=Decimal('4.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/courses/tests/attempts/{self.attempt.id}/submit/'
+        patcher = mock.patch.object(
+            AssessmentGenerator, 'evaluate_short_answer',
+            return_value={'score': 1.0, 'is_correct': True, 'feedback': 'Correct'}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_submit_saves_answers_and_score(self):
+        response = self.client.post(self.url, {'answers': self.answers}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, 'COMPLETED')
+        self.assertEqual(self.attempt.total_score, Decimal('3.00'))
+        self.assertEqual(self.attempt.percentage, Decimal('75.00'))
+        self.assertEqual(MockTestAnswer.objects.filter(attempt=self.attempt).count(), 3)
+
+    def test_submit_completed_while_grading_is_rejected(self):
+        grade = AnswerGrader.grade_submission
+
+        def grade_then_race(*args):
+            graded = grade(*args)
+            # Another request finished the same attempt while this one was grading
+            MockTestAttempt.objects.filter(id=self.attempt.id).update(status='COMPLETED')
+            return graded
+
+        with mock.patch.object(AnswerGrader, 'grade_submission', side_effect=grade_then_race):
+            response = self.client.post(self.url, {'answers': self.answers}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MockTestAnswer.objects.filter(attempt=self.attempt).exists())
+
+    def test_second_submit_is_not_found(self):
+        self.client.post(self.url, {'answers': self.answers}, format='json')
+
+        response = self.client.post(self.url, {'answers': self.answers}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(MockTestAnswer.objects.filter(attempt=self.attempt).count(), 3)
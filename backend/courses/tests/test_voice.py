@@ -0,0 +1,168 @@
+import asyncio
+import gc
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
+from channels.db import database_sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from courses.ai_service import SpeechService
+from courses.consumers import VoiceTutorConsumer
+from courses.models import AIConversation, AIMessage
+from courses.voice import SentenceBuffer, VoiceTutor
+from .factories import make_user
+
+
+class SentenceBufferTests(SimpleTestCase):
+
+    def test_sentences_are_released_as_they_complete(self):
+        buffer = SentenceBuffer(min_chars=1)
+
+        self.assertEqual(buffer.feed('Photosynthesis turns light'), [])
+        self.assertEqual(buffer.feed(' into sugar. Plants'), ['Photosynthesis turns light into sugar.'])
+        self.assertEqual(buffer.feed(' need water!\nDone'), ['Plants need water!'])
+        self.assertEqual(buffer.flush(), ['Done'])
+        self.assertEqual(buffer.flush(), [])
+
+    def test_decimals_and_closing_quotes(self):
+        buffer = SentenceBuffer(min_chars=1)
+
+        self.assertEqual(buffer.feed('Pi is 3.14 roughly. '), ['Pi is 3.14 roughly.'])
+        self.assertEqual(buffer.feed('He said "stop." Then'), ['He said "stop."'])
+
+    def test_short_fragments_join_the_next_sentence(self):
+        buffer = SentenceBuffer(min_chars=10)
+
+        self.assertEqual(buffer.feed('Yes. That is right. '), ['Yes. That is right.'])
+
+    def test_reply_sentences_streams_from_llm(self):
+        deltas = ['The mitochondria ', 'is the powerhouse. It makes', ' ATP']
+        with mock.patch('courses.voice.LLMService.stream_response', return_value=iter(deltas)):
+            with self.settings(VOICE_MIN_SENTENCE_CHARS=1):
+                sentences = list(VoiceTutor.reply_sentences([]))
+
+        self.assertEqual(sentences, ['The mitochondria is the powerhouse.', 'It makes ATP'])
+
+
+@override_settings(VOICE_TTS_CONCURRENCY=3)
+class VoiceTutorConsumerTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.enterContext(mock.patch.object(
+            SpeechService, 'transcribe_audio', return_value={'text': 'What is ATP?', 'duration': 2}
+        ))
+
+        self.conversation = AIConversation.objects.create(student=make_user('student@example.com'))
+        self.consumer = VoiceTutorConsumer()
+        self.consumer.conversation_id = self.conversation.id
+        self.consumer.turn_stop = threading.Event()
+        self.frames = []
+
+        async def send(text_data=None, bytes_data=None):
+            self.frames.append(json.loads(text_data) if text_data is not None else bytes_data)
+        self.consumer.send = send
+
+    def reply(self, *sentences):
+        return mock.patch.object(VoiceTutor, 'reply_sentences', return_value=iter(sentences))
+
+    def tts(self, side_effect):
+        return mock.patch.object(SpeechService, 'synthesize_speech', side_effect=side_effect)
+
+    def assert_nothing_saved(self):
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 0)
+        self.assertFalse(AIMessage.objects.exists())
+
+    async def test_sentences_are_spoken_in_order_and_saved_together(self):
+        first_done = threading.Event()
+
+        def synthesize(sentence):
+            # The first sentence finishes last
+            if sentence == 'One.':
+                first_done.wait(1)
+            else:
+                first_done.set()
+            return sentence.encode()
+
+        with self.reply('One.', 'Two.', 'Three.'), self.tts(synthesize):
+            await self.consumer.run_turn(b'audio', 'webm')
+
+        self.assertEqual(self.frames[0], {'type': 'transcript', 'text': 'What is ATP?'})
+        self.assertEqual(self.frames[1:7], [
+            {'type': 'sentence', 'index': 0, 'text': 'One.'}, b'One.',
+            {'type': 'sentence', 'index': 1, 'text': 'Two.'}, b'Two.',
+            {'type': 'sentence', 'index': 2, 'text': 'Three.'}, b'Three.',
+        ])
+        done = self.frames[7]
+        self.assertEqual((done['type'], done['response_text']), ('done', 'One. Two. Three.'))
+
+        messages = [m async for m in AIMessage.objects.order_by('id')]
+        self.assertEqual([(m.id, m.role) for m in messages],
+                         [(done['user_message_id'], 'user'), (done['assistant_message_id'], 'assistant')])
+        self.assertEqual(messages[0].content, 'What is ATP?')
+        await self.conversation.arefresh_from_db()
+        self.assertEqual(self.conversation.message_count, 2)
+
+    async def test_failed_turn_saves_nothing_and_leaves_no_unretrieved_errors(self):
+        tts_failed = threading.Event()
+        unhandled = []
+
+        def sentences():
+            yield 'One.'
+            tts_failed.wait(1)
+            raise ConnectionError('LLM stream dropped')
+
+        def synthesize(sentence):
+            tts_failed.set()
+            raise RuntimeError('TTS quota exceeded')
+
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda _, context: unhandled.append(context))
+        self.addCleanup(loop.set_exception_handler, None)
+        with mock.patch.object(VoiceTutor, 'reply_sentences', return_value=sentences()), self.tts(synthesize):
+            await self.consumer.run_turn(b'audio', 'webm')
+            await asyncio.sleep(0.05)  # Let the reader thread finish
+            gc.collect()
+
+        self.assertEqual(self.frames[-1], {'type': 'error', 'error': 'Voice processing failed: TTS quota exceeded'})
+        self.assertTrue(self.consumer.turn_stop.is_set())
+        self.assertEqual(unhandled, [])
+        await database_sync_to_async(self.assert_nothing_saved)()
+
+    async def test_llm_failure_is_reported(self):
+        def sentences():
+            yield 'One.'
+            raise ConnectionError('LLM stream dropped')
+
+        with mock.patch.object(VoiceTutor, 'reply_sentences', return_value=sentences()), self.tts(str.encode):
+            await self.consumer.run_turn(b'audio', 'webm')
+
+        self.assertEqual(self.frames[1:3], [{'type': 'sentence', 'index': 0, 'text': 'One.'}, b'One.'])
+        self.assertEqual(self.frames[-1], {'type': 'error', 'error': 'Voice processing failed: LLM stream dropped'})
+        await database_sync_to_async(self.assert_nothing_saved)()
+
+    async def test_disconnect_cancels_the_turn(self):
+        speaking, release = threading.Event(), threading.Event()
+
+        def synthesize(sentence):
+            speaking.set()
+            release.wait(1)
+            return sentence.encode()
+
+        with self.reply('One.', 'Two.'), self.tts(synthesize):
+            self.consumer.turn = asyncio.create_task(self.consumer.run_turn(b'audio', 'webm'))
+            self.assertTrue(await asyncio.get_running_loop().run_in_executor(None, speaking.wait, 1))
+
+            await self.consumer.disconnect(1000)
+            with self.assertRaises(asyncio.CancelledError):
+                await self.consumer.turn
+            release.set()
+
+        self.assertTrue(self.consumer.turn_stop.is_set())
+        self.assertFalse(any(isinstance(frame, dict) and frame['type'] == 'done' for frame in self.frames))
+        await database_sync_to_async(self.assert_nothing_saved)()
@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase
+
+from courses.whiteboard import (
+    FRAME_VERSION, OP_STROKE, _read_varint, _unzigzag, _write_varint, _zigzag,
+    decode_op, encode_stroke, pack_frame, unpack_frame,
+)
+
+
+class VarintTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        for value in (0, 1, 127, 128, 300, 2 ** 35):
+            buffer = bytearray()
+            _write_varint(buffer, value)
+            self.assertEqual(_read_varint(bytes(buffer), 0), (value, len(buffer)))
+
+    def test_zigzag_round_trip(self):
+        for value in (0, -1, 1, -64, 64, -100000):
+            self.assertGreaterEqual(_zigzag(value), 0)
+            self.assertEqual(_unzigzag(_zigzag(value)), value)
+
+    def test_truncated_varint(self):
+        with self.assertRaises(ValueError):
+            _read_varint(b'\x80', 0)
+
+
+class StrokeFrameTests(SimpleTestCase):
+
+    def test_stroke_round_trip_at_point_scale(self):
+        points = [(10.0, 20.0), (10.5, 19.9), (-3.2, 0.0)]
+
+        op = decode_op(encode_stroke('el-1', points))
+
+        self.assertEqual(op, {'kind': OP_STROKE, 'element_id': 'el-1', 'points': points})
+
+    def test_small_movements_cost_two_bytes_per_point(self):
+        points = [(100.0, 100.0)] + [(100.0 + i / 10, 100.0 - i / 10) for i in range(1, 51)]
+        short = encode_stroke('e', points[:1])
+
+        self.assertEqual(len(encode_stroke('e', points)) - len(short), 50 * 2)
+
+    def test_frame_round_trip(self):
+        ops = [encode_stroke('a', [(1, 1)]), encode_stroke('b', [(2, 2), (3, 3)])]
+
+        frame = pack_frame(ops)
+
+        self.assertEqual(frame[0], FRAME_VERSION)
+        self.assertEqual(unpack_frame(frame), ops)
+
+    def test_invalid_element_id(self):
+        with self.assertRaises(ValueError):
+            encode_stroke('', [(0, 0)])
+        with self.assertRaises(ValueError):
+            encode_stroke('x' * 256, [(0, 0)])
+
+    def test_malformed_frames_are_rejected(self):
+        frame = pack_frame([encode_stroke('a', [(1, 1)])])
+        bad_kind = bytearray(frame)
+        bad_kind[3] = 99
+
+        for data in (b'', b'\x02\x00', frame[:-1], frame + b'\x00', bytes(bad_kind)):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                unpack_frame(data)
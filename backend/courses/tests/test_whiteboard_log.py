@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+
+from courses.models import WhiteboardOp, WhiteboardSnapshot
+from courses.whiteboard import WhiteboardLog
+from .factories import make_session, make_user
+
+
+def draw(element_id, version, **fields):
+    return {'type': 'draw_ops', 'elements': [{'id': element_id, 'version': version, **fields}]}
+
+
+class WhiteboardFoldTests(TestCase):
+
+    def test_newer_versions_win_and_clear_empties(self):
+        state = {}
+        WhiteboardLog.fold(state, draw('a', 2, x=1))
+        WhiteboardLog.fold(state, draw('a', 1, x=0))
+        WhiteboardLog.fold(state, draw('b', 1))
+
+        self.assertEqual(state['a']['x'], 1)
+        self.assertEqual(set(state), {'a', 'b'})
+
+        WhiteboardLog.fold(state, {'type': 'clear'})
+        self.assertEqual(state, {})
+
+    def test_elements_without_usable_id_are_skipped(self):
+        state = {}
+        WhiteboardLog.fold(state, {'type': 'draw_ops', 'elements': [
+            {'id': ['a'], 'version': 1}, {'id': {'k': 1}, 'version': 1}, {'version': 1}, 'a', None, {'id': 7, 'version': 1},
+        ]})
+
+        self.assertEqual(list(state), [7])
+
+
+@override_settings(WHITEBOARD_SNAPSHOT_INTERVAL=3)
+class WhiteboardLogTests(TestCase):
+
+    def setUp(self):
+        student = make_user('student@example.com')
+        self.session_id = make_session(student, make_user('teacher@example.com', role='TEACHER')).id
+
+    def append(self, message):
+        return WhiteboardLog.append(self.session_id, message)
+
+    def test_compact_folds_ops_into_snapshot(self):
+        self.append(draw('a', 1))
+        last = self.append(draw('a', 2, x=5))
+
+        self.assertEqual(WhiteboardLog.compact(self.session_id), last)
+        self.assertIsNone(WhiteboardLog.compact(self.session_id))
+
+        snapshot = WhiteboardSnapshot.objects.get(session_id=self.session_id)
+        self.assertEqual(snapshot.elements, [{'id': 'a', 'version': 2, 'x': 5}])
+        self.assertFalse(WhiteboardOp.objects.exists())
+
+    def test_new_client_gets_snapshot_and_later_ops(self):
+        self.append(draw('a', 1))
+        folded = WhiteboardLog.compact(self.session_id)
+        later = self.append(draw('b', 1))
+
+        sync, ops = WhiteboardLog.catch_up(self.session_id)
+
+        self.assertEqual((sync['type'], sync['seq'], sync['elements']), ('sync', folded, [{'id': 'a', 'version': 1}]))
+        self.assertEqual([op['seq'] for op in ops], [later])
+
+    def test_reconnect_covered_by_log_gets_only_missed_ops(self):
+        seen = self.append(draw('a', 1))
+        missed = self.append(draw('b', 1))
+
+        sync, ops = WhiteboardLog.catch_up(self.session_id, since=seen)
+
+        self.assertIsNone(sync)
+        self.assertEqual([op['seq'] for op in ops], [missed])
+
+    def test_reconnect_older_than_snapshot_gets_snapshot(self):
+        seen = self.append(draw('a', 1))
+        self.append(draw('b', 1))
+        WhiteboardLog.compact(self.session_id)
+
+        sync, ops = WhiteboardLog.catch_up(self.session_id, since=seen)
+
+        self.assertEqual(len(sync['elements']), 2)
+        self.assertEqual(ops, [])
+
+    def test_large_backlog_is_compacted_on_join(self):
+        for version in range(1, 8):
+            self.append(draw('a', version))
+
+        sync, ops = WhiteboardLog.catch_up(self.session_id)
+
+        self.assertEqual(sync['elements'], [{'id': 'a', 'version': 7}])
+        self.assertEqual(ops, [])
+        self.assertFalse(WhiteboardOp.objects.exists())
@@ -0,0 +1,123 @@
+import time
+import unittest
+from collections import OrderedDict
+from unittest import mock
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses import ws_auth
+from courses.chat import ChatWriteBuffer
+from courses.ws_auth import TokenBucket, TokenCache
+from .factories import make_session, make_user
+
+try:
+    from channels.testing import WebsocketCommunicator
+except ImportError:  # channels.testing needs daphne
+    WebsocketCommunicator = None
+
+MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class TokenBucketTests(unittest.TestCase):
+
+    def test_drops_frames_over_the_burst_and_refills(self):
+        with mock.patch('courses.ws_auth.time.monotonic', return_value=100.0) as clock:
+            bucket = TokenBucket(rate=2, burst=3)
+            self.assertEqual([bucket.consume() for _ in range(4)], [True, True, True, False])
+
+            clock.return_value = 100.5  # one token back
+            self.assertEqual([bucket.consume() for _ in range(2)], [True, False])
+
+            clock.return_value = 200.0  # never more than the burst
+            self.assertEqual(sum(bucket.consume() for _ in range(5)), 3)
+
+
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(TokenCache, '_tokens', OrderedDict()))
+        self.raw = str(AccessToken.for_user(make_user('student@example.com')))
+
+    def test_cached_token_skips_signature_check(self):
+        first = TokenCache.validate(self.raw)
+
+        with mock.patch.object(ws_auth.JWTAuthentication, 'get_validated_token') as verify:
+            self.assertIs(TokenCache.validate(self.raw), first)
+
+        verify.assert_not_called()
+
+    def test_expired_cached_token_is_revalidated(self):
+        TokenCache._tokens[self.raw] = {'exp': time.time() - 1}
+
+        with mock.patch.object(ws_auth.JWTAuthentication, 'get_validated_token',
+                               side_effect=ws_auth.AuthenticationFailed('expired')) as verify:
+            with self.assertRaises(ws_auth.AuthenticationFailed):
+                TokenCache.validate(self.raw)
+
+        verify.assert_called_once_with(self.raw)
+        self.assertNotIn(self.raw, TokenCache._tokens)
+
+
+@unittest.skipIf(WebsocketCommunicator is None, "channels.testing requires daphne")
+@override_settings(CHANNEL_LAYERS=MEMORY_LAYER, CHAT_WRITE_BATCH_SIZE=1,
+                   WS_CHAT_RATE_LIMIT=0, WS_CHAT_RATE_BURST=3)
+class SessionRoomAuthTests(TestCase):
+
+    def setUp(self):
+        from config.asgi import application
+
+        self.application = application
+        self.enterContext(mock.patch.object(TokenCache, '_tokens', OrderedDict()))
+        for name in ('_pending', '_in_flight'):
+            self.enterContext(mock.patch.object(ChatWriteBuffer, name, []))
+
+        self.student = make_user('student@example.com')
+        self.teacher = make_user('teacher@example.com', role='TEACHER')
+        self.outsider = make_user('outsider@example.com')
+        self.session = make_session(self.student, self.teacher)
+
+    @staticmethod
+    def token(user):
+        return str(AccessToken.for_user(user))
+
+    async def connect(self, path, headers=None):
+        communicator = WebsocketCommunicator(self.application, path, headers=headers or [])
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_rejects_missing_and_invalid_tokens(self):
+        for path in (f'/ws/chat/{self.session.id}/', f'/ws/chat/{self.session.id}/?token=garbage'):
+            with self.subTest(path=path):
+                _, connected = await self.connect(path)
+                self.assertFalse(connected)
+
+    async def test_rejects_non_participants_and_unknown_sessions(self):
+        for user, session_id in ((self.outsider, self.session.id), (self.student, self.session.id + 100)):
+            with self.subTest(user=user.email, session_id=session_id):
+                _, connected = await self.connect(f'/ws/chat/{session_id}/?token={self.token(user)}')
+                self.assertFalse(connected)
+
+    async def test_accepts_student_and_teacher(self):
+        chat, student = await self.connect(f'/ws/chat/{self.session.id}/?token={self.token(self.student)}')
+        board, teacher = await self.connect(
+            f'/ws/whiteboard/{self.session.id}/',
+            headers=[(b'authorization', f'Bearer {self.token(self.teacher)}'.encode())],
+        )
+
+        self.assertTrue(student)
+        self.assertTrue(teacher)
+        await chat.disconnect()
+        await board.disconnect()
+
+    async def test_drops_frames_over_the_burst(self):
+        communicator, connected = await self.connect(f'/ws/chat/{self.session.id}/?token={self.token(self.student)}')
+        self.assertTrue(connected)
+
+        for i in range(5):
+            await communicator.send_json_to({'text': f'message {i}'})
+
+        received = []
+        while not await communicator.receive_nothing(timeout=0.2):
+            received.append((await communicator.receive_json_from())['text'])
+        self.assertEqual(received, ['message 0', 'message 1', 'message 2'])
+        await communicator.disconnect()
@@ -48,10 +48,11 @@ urlpatterns += [
 ]
 
 from django.urls import path
-from .views_rtc import SessionJoinTokenView, SessionRecordingWebhookView
+from .views_rtc import SessionJoinTokenView, SessionRecordingWebhookView, SessionMessageListView
 
 urlpatterns += [
     path('rtc/session/<int:session_id>/join-token/', SessionJoinTokenView.as_view(), name='rtc-join-token'),
+    path('sessions/<int:session_id>/messages/', SessionMessageListView.as_view(), name='session-messages'),
     path('rtc/recording/webhook/', SessionRecordingWebhookView.as_view(), name='rtc-recording-webhook'),
 ]
 
@@ -104,7 +105,8 @@ urlpatterns += [
 
 from django.urls import path
 from .views_assessment import (
-    GenerateMockTestView, MockTestListView, StartMockTestView,
+    GenerateMockTestView, MockTestGenerationJobListView, MockTestGenerationJobDetailView,
+    MockTestListView, StartMockTestView,
     SubmitMockTestView, MockTestAttemptListView, GenerateSessionSummaryView,
     StudentAnalyticsView, CourseRecommendationsView
 )
@@ -112,6 +114,8 @@ from .views_assessment import (
 urlpatterns += [
     # Mock Tests
     path('sessions/<int:session_id>/generate-test/', GenerateMockTestView.as_view(), name='generate-test'),
+    path('tests/generation-jobs/', MockTestGenerationJobListView.as_view(), name='test-generation-job-list'),
+    path('tests/generation-jobs/<int:pk>/', MockTestGenerationJobDetailView.as_view(), name='test-generation-job-detail'),
     path('tests/', MockTestListView.as_view(), name='test-list'),
     path('tests/<int:test_id>/start/', StartMockTestView.as_view(), name='start-test'),
     path('tests/attempts/<int:attempt_id>/submit/', SubmitMockTestView.as_view(), name='submit-test'),
@@ -154,7 +158,8 @@ from django.urls import path
 from .views_payment import (
     CreatePaymentOrderView, VerifyPaymentView, PaymentWebhookView,
     RequestRefundView, ProcessRefundView, TeacherEarningsView,
-    AddBankAccountView, DownloadInvoiceView
+    AddBankAccountView, DownloadInvoiceView, FinanceExportView,
+    TeacherEarningsHistoryView, RevenueRollupView
 )
 
 urlpatterns += [
@@ -169,10 +174,22 @@ urlpatterns += [
     
     # Teacher
     path('teacher/earnings/', TeacherEarningsView.as_view(), name='teacher-earnings'),
+    path('teacher/earnings/history/', TeacherEarningsHistoryView.as_view(), name='teacher-earnings-history'),
     path('teacher/bank-account/', AddBankAccountView.as_view(), name='add-bank-account'),
     
     # Invoices
     path('invoices/<int:invoice_id>/download/', DownloadInvoiceView.as_view(), name='download-invoice'),
+
+    # Finance exports
+    path('finance/export/<str:dataset>/', FinanceExportView.as_view(), name='finance-export'),
+    path('finance/revenue/', RevenueRollupView.as_view(), name='finance-revenue'),
 ]
 
 
+from django.urls import path
+from .views import OutboundHTTPMetricsView
+
+urlpatterns += [
+    # Operations
+    path('ops/outbound-http/', OutboundHTTPMetricsView.as_view(), name='outbound-http-metrics'),
+]
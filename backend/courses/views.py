@@ -213,11 +213,11 @@ class EnrollCourseView(APIView):
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.utils import timezone as dj_tz
-from django.db.models import Sum
 import zoneinfo
 from accounts.permissions import IsTeacher
 from accounts.models import User
 from .models import TeacherCredential, TeacherAvailability, TeacherAvailabilityException, Session
+from .ledger_service import EarningsLedger
 from .serializers import (
     TeacherCredentialSerializer, TeacherAvailabilitySerializer,
     TeacherAvailabilityExceptionSerializer, TeacherProfileBuilderSerializer
@@ -297,9 +297,7 @@ class TeacherDashboardView(generics.GenericAPIView):
             teacher=teacher, status__in=['PENDING', 'CONFIRMED']
         ).order_by('scheduled_date', 'start_time')[:5]
 
-        total_earnings = Session.objects.filter(
-            teacher=teacher, status='COMPLETED', is_paid=True
-        ).aggregate(total=Sum('price'))['total'] or 0
+        total_earnings = EarningsLedger.balance_for(teacher).captured
 
         pending_credentials = TeacherCredential.objects.filter(teacher=teacher, verified=False).count()
 
@@ -397,3 +395,13 @@ class TeacherFreeSlotsView(generics.GenericAPIView):
                 resp.append({'date': str(date_key), 'slots': slots})
 
         return Response({'timezone': tz_name, 'free': resp})
+
+
+class OutboundHTTPMetricsView(APIView):
+    """Per-host latency, errors and circuit state of provider calls made by this process (Admin only)"""
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def get(self, request):
+        from .http_client import OutboundHTTP
+
+        return Response({'hosts': OutboundHTTP.metrics()})
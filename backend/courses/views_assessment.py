@@ -2,26 +2,29 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction
 from django.conf import settings
+from decimal import Decimal
+import uuid
 
 from accounts.permissions import IsStudent, IsTeacher
 from .models import (
     MockTest, MockTestQuestion, MockTestAttempt, MockTestAnswer,
-    Session, SessionSummary, StudentProgressAnalytics, RecommendedCourse
+    MockTestGenerationJob, Session, SessionSummary, StudentProgressAnalytics, RecommendedCourse
 )
 from .serializers import (
     MockTestSerializer, MockTestAttemptSerializer, MockTestAnswerSerializer,
+    MockTestGenerationJobSerializer,
     SessionSummarySerializer, StudentProgressAnalyticsSerializer,
     RecommendedCourseSerializer
 )
-from .assesment_services import AssessmentGenerator, SessionSummarizer
-from .pdf_service import ScorecardGenerator
+from .assesment_services import AssessmentGenerator, AnswerGrader, SessionSummarizer
 from .ml_service import RecommendationEngine
 
 
 class GenerateMockTestView(APIView):
-    """AI-generate mock test from session content"""
+    """Queue AI generation of a mock test from session content"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, session_id):
@@ -33,66 +36,110 @@ class GenerateMockTestView(APIView):
         except Session.DoesNotExist:
             return Response({'error': 'Session not found'}, status=404)
         
-        # Extract content from session
-        content = SessionSummarizer.extract_transcript_from_session(session_id)
-        
-        if not content:
+        difficulty = request.data.get('difficulty', 'MEDIUM')
+        if difficulty not in dict(MockTest.DIFFICULTY_CHOICES):
+            choices = ', '.join(value for value, _ in MockTest.DIFFICULTY_CHOICES)
+            return Response({'error': f'difficulty must be one of {choices}'}, status=400)
+        try:
+            num_questions = int(request.data.get('num_questions', 10))
+        except (TypeError, ValueError):
+            return Response({'error': 'num_questions must be an integer'}, status=400)
+        if not 1 <= num_questions <= settings.MOCK_TEST_MAX_QUESTIONS:
             return Response(
-                {'error': 'No content available to generate test from'},
+                {'error': f'num_questions must be between 1 and {settings.MOCK_TEST_MAX_QUESTIONS}'},
                 status=400
             )
         
-        difficulty = request.data.get('difficulty', 'MEDIUM')
-        num_questions = int(request.data.get('num_questions', 10))
+        # A retried request carrying the same Idempotency-Key returns its job
+        # instead of paying for another LLM call. Without a key, only a job
+        # that is still in flight for the same parameters is reused, so asking
+        # again once it has finished generates a new test.
+        idempotency_key = (request.headers.get('Idempotency-Key') or '')[:100]
         
-        try:
-            # Generate test
-            test_data = AssessmentGenerator.generate_test_from_content(
-                content=content,
-                subject=session.course.title if session.course else "General",
-                difficulty=difficulty,
-                num_questions=num_questions
-            )
-            
-            # Save to database
-            with transaction.atomic():
-                mock_test = MockTest.objects.create(
+        with transaction.atomic():
+            if idempotency_key:
+                job, created = MockTestGenerationJob.objects.select_for_update().get_or_create(
                     session=session,
-                    course=session.course,
-                    student=request.user,
-                    title=test_data.get('title', f"Test for {session.title}"),
-                    description=test_data.get('description', ''),
-                    subject=session.course.title if session.course else "General",
-                    difficulty=difficulty,
-                    total_questions=num_questions,
-                    generated_from_content=content[:500],
-                    ai_prompt="Generated from session content"
+                    idempotency_key=idempotency_key,
+                    defaults={
+                        'student': request.user,
+                        'difficulty': difficulty,
+                        'num_questions': num_questions,
+                    }
                 )
-                
-                # Create questions
-                for idx, q_data in enumerate(test_data.get('questions', [])):
-                    MockTestQuestion.objects.create(
-                        mock_test=mock_test,
-                        order=idx,
-                        question_type=q_data.get('question_type', 'MCQ'),
-                        question_text=q_data.get('question_text', ''),
-                        options=q_data.get('options', []),
-                        correct_answer=q_data.get('correct_answer', ''),
-                        explanation=q_data.get('explanation', ''),
-                        bloom_level=q_data.get('bloom_level', ''),
-                        points=q_data.get('points', 1.0)
+            else:
+                # Lock the session row so concurrent duplicates see each other's job
+                Session.objects.select_for_update().get(id=session.id)
+                job = MockTestGenerationJob.objects.filter(
+                    session=session,
+                    difficulty=difficulty,
+                    num_questions=num_questions,
+                    status__in=['QUEUED', 'RUNNING']
+                ).order_by('-created_at').first()
+                created = job is None
+                if created:
+                    job = MockTestGenerationJob.objects.create(
+                        session=session,
+                        student=request.user,
+                        difficulty=difficulty,
+                        num_questions=num_questions,
+                        idempotency_key=uuid.uuid4().hex
                     )
             
-            return Response(
-                MockTestSerializer(mock_test).data,
-                status=status.HTTP_201_CREATED
-            )
-            
-        except Exception as e:
-            return Response(
-                {'error': f'Test generation failed: {str(e)}'},
-                status=500
-            )
+            # A failed job is re-queued when the client retries it
+            if not created and job.status == 'FAILED':
+                job.status = 'QUEUED'
+                job.stage = None
+                job.progress = 0
+                job.attempts = 0
+                job.error_message = None
+                job.completed_at = None
+                job.save()
+        
+        return Response(
+            MockTestGenerationJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+        )
+
+
+class MockTestGenerationJobDetailView(generics.RetrieveAPIView):
+    """Poll progress of a mock test generation job"""
+    serializer_class = MockTestGenerationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return MockTestGenerationJob.objects.filter(
+            student=self.request.user
+        ).select_related('session')
+
+
+class MockTestGenerationJobListView(generics.ListAPIView):
+    """
+    Generation job notifications for the student
+    
+    Query params:
+        since: ISO timestamp, only jobs updated after it are returned
+        status: Filter by job status (e.g. COMPLETED)
+    """
+    serializer_class = MockTestGenerationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = MockTestGenerationJob.objects.filter(
+            student=self.request.user
+        ).select_related('session').order_by('-updated_at')
+        
+        since = self.request.query_params.get('since')
+        if since:
+            since_dt = parse_datetime(since)
+            if since_dt:
+                queryset = queryset.filter(updated_at__gt=since_dt)
+        
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status.upper())
+        
+        return queryset
 
 
 class MockTestListView(generics.ListAPIView):
@@ -143,7 +190,7 @@ class SubmitMockTestView(APIView):
     
     def post(self, request, attempt_id):
         try:
-            attempt = MockTestAttempt.objects.get(
+            attempt = MockTestAttempt.objects.select_related('mock_test').get(
                 id=attempt_id,
                 student=request.user,
                 status='IN_PROGRESS'
@@ -154,63 +201,43 @@ class SubmitMockTestView(APIView):
         answers_data = request.data.get('answers', [])
         # Expected format: [{"question_id": 1, "selected_answer": "A"}, ...]
         
-        total_score = 0.0
+        # Grade before opening the transaction so slow LLM calls never hold it
+        graded = AnswerGrader.grade_submission(attempt.mock_test, answers_data)
+        total_score = sum((g['points_earned'] for g in graded), Decimal('0'))
         
         with transaction.atomic():
-            for ans_data in answers_data:
-                question_id = ans_data.get('question_id')
-                selected = ans_data.get('selected_answer')
-                
-                try:
-                    question = MockTestQuestion.objects.get(
-                        id=question_id,
-                        mock_test=attempt.mock_test
-                    )
-                except MockTestQuestion.DoesNotExist:
-                    continue
-                
-                # Check correctness
-                is_correct = False
-                points_earned = 0.0
-                
-                if question.question_type == 'MCQ':
-                    is_correct = (selected.strip().upper() == question.correct_answer.strip().upper())
-                    points_earned = question.points if is_correct else 0.0
-                elif question.question_type == 'SHORT_ANSWER':
-                    # Use AI to evaluate
-                    eval_result = AssessmentGenerator.evaluate_short_answer(
-                        question=question.question_text,
-                        correct_answer=question.correct_answer,
-                        student_answer=selected
-                    )
-                    is_correct = eval_result.get('is_correct', False)
-                    points_earned = question.points * eval_result.get('score', 0.0)
-                
-                # Save answer
-                MockTestAnswer.objects.create(
+            # Re-check under lock so a double submit can't save answers twice
+            attempt = MockTestAttempt.objects.select_for_update().select_related('mock_test').get(id=attempt.id)
+            if attempt.status != 'IN_PROGRESS':
+                return Response({'error': 'Attempt already submitted'}, status=400)
+            
+            MockTestAnswer.objects.bulk_create([
+                MockTestAnswer(
                     attempt=attempt,
-                    question=question,
-                    selected_answer=selected,
-                    is_correct=is_correct,
-                    points_earned=points_earned
+                    question=g['question'],
+                    selected_answer=g['selected_answer'][:500],
+                    is_correct=g['is_correct'],
+                    points_earned=g['points_earned'],
+                    ai_feedback=g['ai_feedback']
                 )
-                
-                total_score += points_earned
+                for g in graded
+            ])
             
             # Update attempt
             attempt.total_score = total_score
-            attempt.percentage = (total_score / attempt.max_score * 100) if attempt.max_score > 0 else 0
+            attempt.percentage = (
+                (total_score / attempt.max_score * 100).quantize(Decimal('0.01'))
+                if attempt.max_score > 0 else Decimal('0')
+            )
             attempt.passed = attempt.percentage >= attempt.mock_test.passing_score
             attempt.submitted_at = timezone.now()
-            attempt.time_taken_minutes = int((timezone.now() - attempt.started_at).total_seconds() / 60)
+            attempt.time_taken_minutes = int((attempt.submitted_at - attempt.started_at).total_seconds() / 60)
             attempt.status = 'COMPLETED'
-            attempt.save()
             
-            # Generate PDF scorecard
-            try:
-                ScorecardGenerator.save_scorecard_to_attempt(attempt)
-            except Exception as e:
-                print(f"PDF generation failed: {e}")
+            # PDF scorecard is rendered by the scorecard worker
+            attempt.scorecard_status = 'PENDING'
+            attempt.scorecard_requested_at = attempt.submitted_at
+            attempt.save()
         
         return Response(
             MockTestAttemptSerializer(attempt).data,
@@ -3,9 +3,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
 from django.db import transaction
-from django.http import HttpResponse
-from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.conf import settings
+from datetime import timedelta
+from decimal import Decimal
 
 from accounts.permissions import IsStudent, IsTeacher
 from .models import (
@@ -15,8 +17,10 @@ from .serializers import (
     PaymentSerializer, PayoutSerializer, RefundSerializer,
     InvoiceSerializer, TeacherBankAccountSerializer
 )
-from .payment_service import RazorpayService, EscrowManager, PayoutProcessor
-from .invoice_service import InvoiceGenerator
+from .payment_service import RazorpayService, EscrowManager, PayoutProcessor, PaymentWebhookProcessor
+from .export_service import FinanceExporter
+from .ledger_service import EarningsLedger
+from .rollup_service import RevenueRollups, MAX_DAY_BUCKETS, MAX_MONTH_BUCKETS, months_between
 
 
 class CreatePaymentOrderView(APIView):
@@ -129,7 +133,9 @@ class VerifyPaymentView(APIView):
         payment.razorpay_signature = razorpay_signature
         payment.status = 'CAPTURED'
         payment.captured_at = timezone.now()
-        payment.save()
+        with transaction.atomic():
+            payment.save()
+            EarningsLedger.sync_payments([payment.id])
         
         # Update session/course status
         if payment.session:
@@ -144,7 +150,8 @@ class VerifyPaymentView(APIView):
                 defaults={'is_paid': True}
             )
         
-        # Generate invoice
+        # Generate invoice (ReportLab is only imported by workers that need it)
+        from .invoice_service import InvoiceGenerator
         InvoiceGenerator.generate_invoice(payment)
         
         return Response({
@@ -155,42 +162,26 @@ class VerifyPaymentView(APIView):
 
 
 class PaymentWebhookView(APIView):
-    """Handle Razorpay webhooks"""
+    """
+    Handle Razorpay webhooks
+    
+    Verified events are appended to the PaymentWebhookEvent inbox and
+    applied by `manage.py process_payment_webhooks`, so bursts cost one
+    INSERT per request. Redelivered events (same X-Razorpay-Event-Id)
+    are acknowledged and dropped.
+    """
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
     
     def post(self, request):
-        # Verify webhook signature
-        # signature = request.headers.get('X-Razorpay-Signature')
-        # Implement signature verification
-        
-        event = request.data.get('event')
-        payload = request.data.get('payload', {})
-        
-        if event == 'payment.captured':
-            payment_entity = payload.get('payment', {}).get('entity', {})
-            order_id = payment_entity.get('order_id')
-            
-            try:
-                payment = Payment.objects.get(razorpay_order_id=order_id)
-                payment.status = 'CAPTURED'
-                payment.captured_at = timezone.now()
-                payment.payment_method = payment_entity.get('method')
-                payment.save()
-            except Payment.DoesNotExist:
-                pass
+        signature = request.headers.get('X-Razorpay-Signature', '')
+        if not RazorpayService.verify_webhook_signature(request.body, signature):
+            return Response({'error': 'Invalid signature'}, status=400)
         
-        elif event == 'payment.failed':
-            payment_entity = payload.get('payment', {}).get('entity', {})
-            order_id = payment_entity.get('order_id')
-            
-            try:
-                payment = Payment.objects.get(razorpay_order_id=order_id)
-                payment.status = 'FAILED'
-                payment.error_code = payment_entity.get('error_code')
-                payment.error_description = payment_entity.get('error_description')
-                payment.save()
-            except Payment.DoesNotExist:
-                pass
+        try:
+            PaymentWebhookProcessor.enqueue(request.body, request.headers.get('X-Razorpay-Event-Id'))
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=400)
         
         return Response({'status': 'received'}, status=200)
 
@@ -239,7 +230,9 @@ class ProcessRefundView(APIView):
             return Response({'error': 'Refund not found'}, status=404)
         
         action = request.data.get('action')  # 'approve' or 'reject'
-        admin_notes = request.data.get('admin_notes', '')
+        refund.reviewed_by = request.user
+        refund.reviewed_at = timezone.now()
+        refund.admin_notes = request.data.get('admin_notes', '')
         
         if action == 'approve':
             # Process refund
@@ -261,7 +254,12 @@ class ProcessRefundView(APIView):
                     refund.payment.status = 'REFUNDED'
                 else:
                     refund.payment.status = 'PARTIALLY_REFUNDED'
-                refund.payment.save()
+                # Refund, payment, ledger and rollups change together or not at all
+                with transaction.atomic():
+                    refund.save()
+                    refund.payment.save()
+                    EarningsLedger.sync_payments([refund.payment.id])
+                    RevenueRollups.mark_dirty([refund.completed_at])
                 
             except Exception as e:
                 refund.status = 'FAILED'
@@ -269,13 +267,10 @@ class ProcessRefundView(APIView):
                 refund.save()
                 return Response({'error': str(e)}, status=500)
         
-        elif action == 'reject':
-            refund.status = 'REJECTED'
-        
-        refund.reviewed_by = request.user
-        refund.reviewed_at = timezone.now()
-        refund.admin_notes = admin_notes
-        refund.save()
+        else:
+            if action == 'reject':
+                refund.status = 'REJECTED'
+            refund.save()
         
         return Response(RefundSerializer(refund).data, status=200)
 
@@ -284,38 +279,15 @@ class TeacherEarningsView(APIView):
     """Teacher views earnings and payouts"""
     permission_classes = [permissions.IsAuthenticated, IsTeacher]
     def get(self, request):
-        # Total earnings
-        total_captured = Payment.objects.filter(
-            session__teacher=request.user,
-            status='CAPTURED'
-        ).aggregate(total=Sum('teacher_amount'))['total'] or 0
-        
-        # In escrow
-        in_escrow = Payment.objects.filter(
-            session__teacher=request.user,
-            status='CAPTURED',
-            is_held_in_escrow=True,
-            released_from_escrow=False
-        ).aggregate(total=Sum('teacher_amount'))['total'] or 0
-        
-        # Paid out
-        paid_out = Payout.objects.filter(
-            teacher=request.user,
-            status='COMPLETED'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Pending payouts
-        pending_payouts = Payout.objects.filter(
-            teacher=request.user,
-            status__in=['PENDING', 'PROCESSING']
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        # Running totals kept by the earnings ledger (single-row read)
+        balance = EarningsLedger.balance_for(request.user)
         
         return Response({
-            'total_earnings': float(total_captured),
-            'in_escrow': float(in_escrow),
-            'available_for_payout': float(total_captured - in_escrow - paid_out - pending_payouts),
-            'paid_out': float(paid_out),
-            'pending_payouts': float(pending_payouts)
+            'total_earnings': float(balance.captured),
+            'in_escrow': float(balance.in_escrow),
+            'available_for_payout': float(balance.available_for_payout),
+            'paid_out': float(balance.paid_out),
+            'pending_payouts': float(balance.pending_payouts)
         })
 
 
@@ -352,3 +324,105 @@ class DownloadInvoiceView(APIView):
             return response
         
         return Response({'error': 'PDF not generated'}, status=404)
+
+
+class FinanceExportView(APIView):
+    """
+    Stream payments, payouts, refunds or invoices for finance
+
+    Query params: since, until (YYYY-MM-DD), status, file_format (csv|parquet)
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'parquet': 'application/vnd.apache.parquet',
+    }
+
+    def get(self, request, dataset):
+        params = request.query_params
+        export_format = params.get('file_format', 'csv')
+
+        try:
+            since = parse_date(params['since']) if params.get('since') else None
+            until = parse_date(params['until']) if params.get('until') else None
+        except ValueError:
+            since = until = None
+        if (params.get('since') and not since) or (params.get('until') and not until):
+            return Response({'error': 'since/until must be YYYY-MM-DD'}, status=400)
+
+        try:
+            chunks = FinanceExporter.stream(
+                dataset, export_format,
+                since=since, until=until, status=params.get('status')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        except RuntimeError as e:
+            return Response({'error': str(e)}, status=501)
+
+        response = StreamingHttpResponse(chunks, content_type=self.CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+        return response
+
+
+def _rollup_response(request, teacher_id=None):
+    """Parse since/until/interval and return a rollup series response"""
+    params = request.query_params
+    interval = params.get('interval', 'day')
+    if interval not in ('day', 'month'):
+        return Response({'error': "interval must be 'day' or 'month'"}, status=400)
+    
+    until = timezone.localdate()
+    since = until - timedelta(days=29) if interval == 'day' else until.replace(day=1, year=until.year - 1)
+    try:
+        since = parse_date(params['since']) if params.get('since') else since
+        until = parse_date(params['until']) if params.get('until') else until
+    except ValueError:
+        since = until = None
+    if not since or not until or since > until:
+        return Response({'error': 'since/until must be YYYY-MM-DD with since <= until'}, status=400)
+    if interval == 'day' and (until - since).days >= MAX_DAY_BUCKETS:
+        return Response({'error': f'At most {MAX_DAY_BUCKETS} days per request; use interval=month'}, status=400)
+    if interval == 'month' and months_between(since, until) > MAX_MONTH_BUCKETS:
+        return Response({'error': f'At most {MAX_MONTH_BUCKETS} months per request'}, status=400)
+    
+    buckets = RevenueRollups.series(since, until, interval, teacher_id)
+    totals = {
+        measure: sum(bucket[measure] for bucket in buckets)
+        for measure in buckets[0] if measure != 'bucket'
+    }
+    
+    def jsonable(values):
+        return {key: float(value) if isinstance(value, Decimal) else value for key, value in values.items()}
+    
+    return Response({
+        'since': since,
+        'until': until,
+        'interval': interval,
+        'buckets': [jsonable(bucket) for bucket in buckets],
+        'totals': jsonable(totals),
+    })
+
+
+class TeacherEarningsHistoryView(APIView):
+    """Teacher earnings over time from the revenue rollups"""
+    permission_classes = [permissions.IsAuthenticated, IsTeacher]
+    
+    def get(self, request):
+        return _rollup_response(request, teacher_id=request.user.id)
+
+
+class RevenueRollupView(APIView):
+    """
+    Platform-wide (or one teacher's) revenue over time for admins
+    
+    Query params: since, until (YYYY-MM-DD), interval (day|month), teacher_id
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+    
+    def get(self, request):
+        teacher_id = request.query_params.get('teacher_id')
+        if teacher_id and not teacher_id.isdigit():
+            return Response({'error': 'teacher_id must be an integer'}, status=400)
+        return _rollup_response(request, teacher_id=int(teacher_id) if teacher_id else None)
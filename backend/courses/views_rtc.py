@@ -1,12 +1,15 @@
-from rest_framework import permissions, status
+from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
-from django.utils import timezone
 from django.conf import settings
 from accounts.permissions import IsStudent, IsTeacher
 from accounts.models import User
-from .models import Session
-from .rtc import videosdk_create_or_get_room, videosdk_generate_token
+from .models import Session, SessionMessage
+from .serializers import SessionMessageSerializer
+from .rtc import RoomManager, videosdk_generate_token
+from .recordings import RecordingIngestor
 import hmac
 import hashlib
 import json
@@ -25,13 +28,8 @@ class SessionJoinTokenView(APIView):
         if sess.status not in ['PENDING','CONFIRMED']:
             return Response({'error': 'Session not joinable'}, status=400)
 
-        # Create room if needed
-        if not sess.provider_room_id:
-            room_id = videosdk_create_or_get_room()
-            sess.provider_room_id = room_id
-            sess.save()
-        else:
-            room_id = sess.provider_room_id
+        # Normally assigned by `manage.py prewarm_rooms`; created here only as a fallback
+        room_id = RoomManager.ensure_room(sess)
 
         role = 'teacher' if user.id == sess.teacher_id else 'student'
         token = videosdk_generate_token(participant_id=str(user.id), room_id=room_id, role=role)
@@ -39,6 +37,13 @@ class SessionJoinTokenView(APIView):
 
 
 class SessionRecordingWebhookView(APIView):
+    """
+    VideoSDK recording webhooks
+    
+    Events are appended to the RecordingEvent inbox and attached to
+    sessions by `manage.py process_recording_events`, so a burst of
+    recordings costs one INSERT per request. Redeliveries are dropped.
+    """
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
@@ -49,16 +54,32 @@ class SessionRecordingWebhookView(APIView):
         # if not hmac.compare_digest(signature or '', expected):
         #     return Response(status=401)
 
-        data = request.data
         # Expected payload: { "event": "recording.completed", "roomId": "...", "assets": [url,...] , "sessionId": <your mapping if provided>}
-        event = data.get('event')
-        room_id = data.get('roomId')
-        assets = data.get('assets', [])
-
-        if event == 'recording.completed' and room_id:
-            sess = Session.objects.filter(provider_room_id=room_id).first()
-            if sess:
-                sess.recording_assets = list(set((sess.recording_assets or []) + assets))
-                sess.ended_at = timezone.now()
-                sess.save()
+        try:
+            RecordingIngestor.enqueue(request.body)
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=400)
         return Response(status=200)
+
+
+class SessionMessagePagination(CursorPagination):
+    # Newest first; follow `next` to scroll back in time
+    ordering = ('-sent_at', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+
+class SessionMessageListView(generics.ListAPIView):
+    """Chat history of a session for its student and teacher"""
+    serializer_class = SessionMessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SessionMessagePagination
+
+    def get_queryset(self):
+        sess = Session.objects.filter(id=self.kwargs['session_id']).values('student_id', 'teacher_id').first()
+        if not sess:
+            raise NotFound('Session not found')
+        if self.request.user.id not in [sess['student_id'], sess['teacher_id']]:
+            raise PermissionDenied('Not allowed')
+        return SessionMessage.objects.filter(session_id=self.kwargs['session_id']).select_related('sender')
@@ -0,0 +1,138 @@
+"""
+Pipelined voice tutoring
+
+AIVoiceChatView transcribes, generates and synthesizes strictly in turn
+and returns base64 audio, so nothing is heard until all three finish.
+VoiceTutorConsumer (ws/ai/voice/<conversation_id>/) overlaps the last
+two stages: the LLM reply is streamed, each sentence goes to TTS as soon
+as it is complete (VOICE_TTS_CONCURRENCY at a time), and the audio is
+sent back as raw MP3 binary frames in sentence order. Time to first
+audio becomes transcription plus the first sentence.
+
+Whisper only accepts whole files, so transcription is still one call per
+utterance.
+"""
+
+import io
+import re
+from typing import Iterator, List, Tuple
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .ai_service import LLMService, ConversationManager
+
+AUDIO_FORMATS = ('webm', 'ogg', 'mp3', 'mp4', 'm4a', 'wav')
+
+MODEL_NAMES = {'openai': 'gpt-4-turbo', 'gemini': 'gemini-pro'}
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by
+# whitespace, or a line break. "3.14" and "e.g.x" don't match.
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands out complete sentences"""
+
+    def __init__(self, min_chars: int = None):
+        # Shorter fragments ("Yes.", "Dr.") are joined with the next sentence
+        self.min_chars = settings.VOICE_MIN_SENTENCE_CHARS if min_chars is None else min_chars
+        self.text = ''
+
+    def feed(self, delta: str) -> List[str]:
+        """Add streamed text; returns the sentences it completed"""
+        self.text += delta
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.text):
+            sentence = self.text[start:match.end()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self.text = self.text[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Whatever is left once the stream has ended"""
+        rest, self.text = self.text.strip(), ''
+        return [rest] if rest else []
+
+
+class VoiceTutor:
+    """Blocking steps of a voice turn, run off the event loop by VoiceTutorConsumer"""
+
+    @staticmethod
+    def owns_conversation(user_id: int, conversation_id: int) -> bool:
+        from .models import AIConversation
+
+        return AIConversation.objects.filter(id=conversation_id, student_id=user_id, is_active=True).exists()
+
+    @staticmethod
+    def audio_file(audio: bytes, audio_format: str):
+        """In-memory upload for Whisper, which infers the format from the name"""
+        audio_file = io.BytesIO(audio)
+        audio_file.name = f"audio.{audio_format}"
+        return audio_file
+
+    @staticmethod
+    def context_for(conversation_id: int, text: str) -> List:
+        """LLM context: the conversation so far, ending with the new utterance"""
+        history = ConversationManager.get_context_messages(
+            conversation_id, limit=max(settings.AI_MAX_CONTEXT_MESSAGES - 1, 0)
+        )
+        return history + [{"role": "user", "content": text}]
+
+    @staticmethod
+    def reply_sentences(context: List) -> Iterator[str]:
+        """Stream the tutor's reply to `context`, one sentence at a time"""
+        sentences = SentenceBuffer()
+        for delta in LLMService.stream_response(
+            messages=context,
+            temperature=settings.AI_TEMPERATURE,
+            max_tokens=settings.AI_RESPONSE_MAX_TOKENS
+        ):
+            yield from sentences.feed(delta)
+        yield from sentences.flush()
+
+    @staticmethod
+    def save_turn(conversation_id: int, audio: bytes, audio_format: str, transcript: dict,
+                  reply_text: str, reply_audio: bytes, time_ms: int) -> Tuple[int, int]:
+        """
+        Store the utterance and the spoken reply, and bump the conversation's counters
+
+        Nothing is written until the reply has been spoken, so a turn that
+        fails halfway leaves no unanswered message behind.
+
+        Returns:
+            (user message id, assistant message id)
+        """
+        from django.db import transaction
+        from django.db.models import F
+        from .models import AIConversation, AIMessage
+
+        with transaction.atomic():
+            user_msg = AIMessage.objects.create(
+                conversation_id=conversation_id,
+                role='user',
+                content=transcript['text'],
+                has_audio=True,
+                audio_duration_seconds=transcript.get('duration', 0)
+            )
+            user_msg.audio_file.save(f"user_{user_msg.id}.{audio_format}", ContentFile(audio))
+
+            assistant_msg = AIMessage.objects.create(
+                conversation_id=conversation_id,
+                role='assistant',
+                content=reply_text,
+                model_used=MODEL_NAMES.get(settings.LLM_PROVIDER),
+                tokens_used=len(reply_text.split()),  # Approximate; streamed replies carry no usage
+                response_time_ms=time_ms,
+                has_audio=True
+            )
+            assistant_msg.audio_file.save(f"assistant_{assistant_msg.id}.mp3", ContentFile(reply_audio))
+
+            AIConversation.objects.filter(id=conversation_id).update(
+                message_count=F('message_count') + 2,
+                last_message_at=timezone.now()
+            )
+        return user_msg.id, assistant_msg.id
@@ -0,0 +1,250 @@
+"""
+Server-side whiteboard operation log
+
+Durable board messages ("draw_ops", "clear") are appended to WhiteboardOp
+and broadcast with their sequence number. Every
+WHITEBOARD_SNAPSHOT_INTERVAL ops the log is folded into the session's
+WhiteboardSnapshot (latest version of each element wins) and the folded
+ops are deleted, so a joining client needs at most one snapshot plus the
+ops written since it. A client that reconnects with ?since=<seq> that is
+still covered by the log gets only the ops it missed.
+
+Live strokes travel as binary frames instead (see pack_frame /
+encode_stroke below). They are relayed but not logged; the finished
+element arrives later as a durable draw_ops message.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.db import transaction
+
+
+class WhiteboardLog:
+    """Append, compact and replay a session's whiteboard ops"""
+
+    @staticmethod
+    def append(session_id: int, message: Dict) -> int:
+        """
+        Store one durable message
+
+        Returns:
+            Sequence number assigned to it
+        """
+        from .models import WhiteboardOp
+
+        return WhiteboardOp.objects.create(session_id=session_id, payload=message).id
+
+    @staticmethod
+    def fold(state: Dict[str, Dict], message: Dict) -> None:
+        """Apply one op to an {element id: element} map in place"""
+        if message.get('type') == 'clear':
+            state.clear()
+            return
+
+        for element in message.get('elements') or []:
+            element_id = element.get('id') if isinstance(element, dict) else None
+            # Client-supplied; anything but a string or number can't be a map key
+            if not isinstance(element_id, (str, int)):
+                continue
+            current = state.get(element_id)
+            # Excalidraw bumps version on every edit; deleted elements stay as isDeleted tombstones
+            if current is None or element.get('version', 0) >= current.get('version', 0):
+                state[element_id] = element
+
+    @staticmethod
+    def compact(session_id: int) -> Optional[int]:
+        """
+        Fold all logged ops into the snapshot and drop them from the log
+
+        The snapshot row is locked, so concurrent compactions of the same
+        board run one after the other.
+
+        Returns:
+            New snapshot sequence number, or None if there was nothing to fold
+        """
+        from .models import WhiteboardOp, WhiteboardSnapshot
+
+        with transaction.atomic():
+            snapshot, _ = WhiteboardSnapshot.objects.select_for_update().get_or_create(session_id=session_id)
+            ops = list(
+                WhiteboardOp.objects
+                .filter(session_id=session_id, id__gt=snapshot.last_seq)
+                .order_by('id')
+                .values_list('id', 'payload')
+            )
+            if not ops:
+                return None
+
+            state = {element['id']: element for element in snapshot.elements}
+            for _, payload in ops:
+                WhiteboardLog.fold(state, payload)
+
+            snapshot.elements = list(state.values())
+            snapshot.last_seq = ops[-1][0]
+            snapshot.save()
+            WhiteboardOp.objects.filter(session_id=session_id, id__lte=snapshot.last_seq).delete()
+
+        return snapshot.last_seq
+
+    @staticmethod
+    def catch_up(session_id: int, since: Optional[int] = None) -> Tuple[Optional[Dict], List[Dict]]:
+        """
+        What a connecting client needs to rebuild the board
+
+        Args:
+            session_id: Session whose board is joined
+            since: Last sequence number the client already applied (reconnects)
+
+        Returns:
+            (snapshot message or None, op messages after it in order).
+            The snapshot is omitted when the client's `since` is still
+            covered by the op log.
+        """
+        from .models import WhiteboardOp, WhiteboardSnapshot
+
+        snapshot = WhiteboardSnapshot.objects.filter(session_id=session_id).first()
+        snapshot_seq = snapshot.last_seq if snapshot else 0
+
+        ops = list(
+            WhiteboardOp.objects
+            .filter(session_id=session_id, id__gt=max(since or 0, snapshot_seq))
+            .order_by('id')
+            .values_list('id', 'payload')
+        )
+        # Writers compact every interval; a larger backlog means they stopped early
+        if len(ops) > 2 * settings.WHITEBOARD_SNAPSHOT_INTERVAL and since is None:
+            WhiteboardLog.compact(session_id)
+            return WhiteboardLog.catch_up(session_id)
+
+        messages = [{**payload, 'seq': seq} for seq, payload in ops]
+        if since is not None and since >= snapshot_seq:
+            return None, messages
+
+        sync = {
+            'type': 'sync',
+            'elements': snapshot.elements if snapshot else [],
+            'seq': snapshot_seq,
+        }
+        return sync, messages
+
+
+# Binary frames
+#
+#   frame := version:u8  op_count:varint  (op_length:varint  op)*
+#   op    := kind:u8  id_length:u8  element_id:utf8  payload
+#
+# OP_STROKE payload appends points to a freedraw element:
+#   point_count:varint  x0 y0  (dx dy)*
+# Coordinates are quantized to 1/POINT_SCALE scene units and, after the
+# first point, delta-encoded; every number is a zigzag varint, so a
+# typical pen movement costs two bytes per point instead of ~30 in JSON.
+
+FRAME_VERSION = 1
+OP_STROKE = 1
+OP_KINDS = (OP_STROKE,)
+POINT_SCALE = 10
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise ValueError('Truncated varint')
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode_stroke(element_id: str, points: Sequence[Sequence[float]]) -> bytes:
+    """Encode points appended to a freedraw element as one OP_STROKE op"""
+    element_key = element_id.encode()
+    if not 0 < len(element_key) < 256:
+        raise ValueError('Element id must be 1-255 bytes')
+
+    op = bytearray((OP_STROKE, len(element_key)))
+    op += element_key
+    _write_varint(op, len(points))
+    last_x = last_y = 0
+    for x, y in points:
+        qx, qy = round(x * POINT_SCALE), round(y * POINT_SCALE)
+        _write_varint(op, _zigzag(qx - last_x))
+        _write_varint(op, _zigzag(qy - last_y))
+        last_x, last_y = qx, qy
+    return bytes(op)
+
+
+def decode_op(op: bytes) -> Dict:
+    """
+    Decode one op
+
+    Returns:
+        {'kind', 'element_id', 'points': [(x, y), ...]}
+    """
+    if len(op) < 2 or op[0] not in OP_KINDS:
+        raise ValueError('Unknown op')
+    pos = 2 + op[1]
+    element_id = op[2:pos].decode()
+    count, pos = _read_varint(op, pos)
+
+    points = []
+    x = y = 0
+    for _ in range(count):
+        dx, pos = _read_varint(op, pos)
+        dy, pos = _read_varint(op, pos)
+        x += _unzigzag(dx)
+        y += _unzigzag(dy)
+        points.append((x / POINT_SCALE, y / POINT_SCALE))
+    return {'kind': op[0], 'element_id': element_id, 'points': points}
+
+
+def pack_frame(ops: Iterable[bytes]) -> bytes:
+    """Concatenate encoded ops into one frame"""
+    ops = list(ops)
+    frame = bytearray((FRAME_VERSION,))
+    _write_varint(frame, len(ops))
+    for op in ops:
+        _write_varint(frame, len(op))
+        frame += op
+    return bytes(frame)
+
+
+def unpack_frame(frame: bytes) -> List[bytes]:
+    """
+    Split a frame into its ops without decoding their payloads
+
+    Raises:
+        ValueError: Malformed frame or unknown op kind
+    """
+    if not frame or frame[0] != FRAME_VERSION:
+        raise ValueError('Unsupported frame version')
+    count, pos = _read_varint(frame, 1)
+
+    ops = []
+    for _ in range(count):
+        length, pos = _read_varint(frame, pos)
+        op = frame[pos:pos + length]
+        if len(op) != length or length < 2 or op[0] not in OP_KINDS or 2 + op[1] > length:
+            raise ValueError('Malformed op')
+        ops.append(op)
+        pos += length
+    if pos != len(frame):
+        raise ValueError('Trailing bytes after frame')
+    return ops
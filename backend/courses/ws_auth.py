@@ -0,0 +1,115 @@
+"""
+Websocket authentication, room access and rate limiting
+
+JWTAuthMiddleware sets scope['user'] from a SimpleJWT access token sent as
+?token=<access> (browsers can't set headers on websocket requests) or an
+"Authorization: Bearer" header. Validated tokens are cached until they
+expire, so reconnect storms don't re-verify the same signature.
+
+Session consumers then check once on connect that the user is the
+session's student or teacher, and meter each connection's inbound frames
+with a TokenBucket.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+TOKEN_CACHE_SIZE = 1024
+
+
+class TokenBucket:
+    """Allow `rate` frames per second on average with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def consume(self, amount: float = 1) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class TokenCache:
+    """Per-process LRU of validated access tokens"""
+
+    _lock = threading.Lock()
+    _tokens: 'OrderedDict[str, object]' = OrderedDict()
+
+    @staticmethod
+    def validate(raw_token: str):
+        """
+        SimpleJWT-validated token for a raw access token
+
+        Raises:
+            AuthenticationFailed: Invalid or expired token
+        """
+        with TokenCache._lock:
+            token = TokenCache._tokens.get(raw_token)
+            if token is not None and token['exp'] > time.time():
+                TokenCache._tokens.move_to_end(raw_token)
+                return token
+            TokenCache._tokens.pop(raw_token, None)
+
+        token = JWTAuthentication().get_validated_token(raw_token)
+
+        with TokenCache._lock:
+            TokenCache._tokens[raw_token] = token
+            while len(TokenCache._tokens) > TOKEN_CACHE_SIZE:
+                TokenCache._tokens.popitem(last=False)
+        return token
+
+
+def raw_token_from_scope(scope) -> Optional[str]:
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] == 'Bearer':
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def user_for_token(raw_token: Optional[str]):
+    if not raw_token:
+        return AnonymousUser()
+    try:
+        # get_user also rejects inactive and deleted users
+        return JWTAuthentication().get_user(TokenCache.validate(raw_token))
+    except AuthenticationFailed:
+        return AnonymousUser()
+
+
+@database_sync_to_async
+def session_participants(session_id: int) -> Optional[Tuple[int, int]]:
+    """(student id, teacher id) of a session, or None if it doesn't exist"""
+    from .models import Session
+
+    return Session.objects.filter(id=session_id).values_list('student_id', 'teacher_id').first()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate scope['user'] from a SimpleJWT access token"""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await user_for_token(raw_token_from_scope(scope))
+        return await super().__call__(scope, receive, send)
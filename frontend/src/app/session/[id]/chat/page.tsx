@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
+import { useAuthStore } from '@/store/authStore';
 import axiosInstance from '@/lib/axios';
 
 export default function ChatPage() {
@@ -11,7 +12,8 @@ export default function ChatPage() {
   const [msgs, setMsgs] = useState<{sender:string; text:string; at:string}[]>([]);
 
   useEffect(() => {
-    const sock = new WebSocket(`ws://127.0.0.1:8000/ws/chat/${params.id}/`);
+    const token = useAuthStore.getState().tokens?.access ?? '';
+    const sock = new WebSocket(`ws://127.0.0.1:8000/ws/chat/${params.id}/?token=${encodeURIComponent(token)}`);
     sock.onmessage = (evt) => {
       try {
         const m = JSON.parse(evt.data);
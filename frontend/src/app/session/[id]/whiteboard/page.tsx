@@ -3,6 +3,7 @@
 import dynamic from 'next/dynamic';
 import { useEffect, useRef, useState } from 'react';
 import { useParams } from 'next/navigation';
+import { useAuthStore } from '@/store/authStore';
 
 const Excalidraw = dynamic(() => import('@excalidraw/excalidraw').then(m => m.Excalidraw), { ssr: false });
 
@@ -14,7 +15,8 @@ export default function WhiteboardPage() {
   const [scrollToContent, setScrollToContent] = useState(true);
 
   useEffect(() => {
-    const sock = new WebSocket(`ws://127.0.0.1:8000/ws/whiteboard/${params.id}/`);
+    const token = useAuthStore.getState().tokens?.access ?? '';
+    const sock = new WebSocket(`ws://127.0.0.1:8000/ws/whiteboard/${params.id}/?token=${encodeURIComponent(token)}`);
     sock.onmessage = (evt) => {
       try {
         const payload = JSON.parse(evt.data);
@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useRef, useEffect } from 'react';
-import axiosInstance from '@/lib/axios';
+import { useAuthStore } from '@/store/authStore';
 import { Button } from '@/components/ui/Button';
 
 interface VoiceChatProps {
@@ -18,6 +18,56 @@ export default function VoiceChat({ conversationId, onTranscript, onResponse }:
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const audioChunksRef = useRef<Blob[]>([]);
   const audioRef = useRef<HTMLAudioElement>(null);
+  const wsRef = useRef<WebSocket | null>(null);
+  // Sentence MP3s waiting their turn, played back to back
+  const playQueueRef = useRef<string[]>([]);
+  const replyTextRef = useRef<string[]>([]);
+
+  // Replies stream in sentence by sentence: a JSON "sentence" frame, then its MP3 as a binary frame
+  useEffect(() => {
+    const token = useAuthStore.getState().tokens?.access ?? '';
+    const sock = new WebSocket(`ws://127.0.0.1:8000/ws/ai/voice/${conversationId}/?token=${encodeURIComponent(token)}`);
+    sock.binaryType = 'blob';
+    sock.onmessage = (evt) => {
+      if (evt.data instanceof Blob) {
+        enqueueAudio(URL.createObjectURL(new Blob([evt.data], { type: 'audio/mpeg' })));
+        return;
+      }
+      try {
+        const msg = JSON.parse(evt.data);
+        if (msg.type === 'transcript') {
+          replyTextRef.current = [];
+          onTranscript?.(msg.text);
+        } else if (msg.type === 'sentence') {
+          replyTextRef.current.push(msg.text);
+          onResponse?.(replyTextRef.current.join(' '));
+        } else if (msg.type === 'done') {
+          setIsProcessing(false);
+        } else if (msg.type === 'error') {
+          setIsProcessing(false);
+          alert(msg.error || 'Voice processing failed');
+        }
+      } catch {}
+    };
+    wsRef.current = sock;
+    return () => { sock.close(); };
+  }, [conversationId]);
+
+  const playNext = () => {
+    const next = playQueueRef.current.shift();
+    if (!next || !audioRef.current) return;
+    audioRef.current.src = next;
+    audioRef.current.play();
+  };
+
+  const enqueueAudio = (url: string) => {
+    setAudioUrl(url);
+    playQueueRef.current.push(url);
+    const player = audioRef.current;
+    if (player && (player.paused || player.ended)) {
+      playNext();
+    }
+  };
 
   const startRecording = async () => {
     try {
@@ -56,50 +106,16 @@ export default function VoiceChat({ conversationId, onTranscript, onResponse }:
   };
 
   const processVoiceInput = async (audioBlob: Blob) => {
+    const sock = wsRef.current;
+    if (!sock || sock.readyState !== WebSocket.OPEN) {
+      alert('Voice connection not ready');
+      return;
+    }
     setIsProcessing(true);
 
-    try {
-      // Convert blob to base64
-      const reader = new FileReader();
-      reader.readAsDataURL(audioBlob);
-      
-      reader.onloadend = async () => {
-        const base64Audio = (reader.result as string).split(',')[1];
-
-        const res = await axiosInstance.post(
-          `/courses/ai/conversations/${conversationId}/voice/`,
-          {
-            audio: base64Audio,
-            format: 'webm'
-          }
-        );
-
-        // Show transcript
-        if (onTranscript) {
-          onTranscript(res.data.transcript);
-        }
-
-        // Show response text
-        if (onResponse) {
-          onResponse(res.data.response_text);
-        }
-
-        // Play response audio
-        const responseAudio = `data:audio/mp3;base64,${res.data.response_audio}`;
-        setAudioUrl(responseAudio);
-        
-        // Auto-play
-        if (audioRef.current) {
-          audioRef.current.src = responseAudio;
-          audioRef.current.play();
-        }
-      };
-    } catch (err: any) {
-      console.error('Voice processing failed:', err);
-      alert(err.response?.data?.error || 'Voice processing failed');
-    } finally {
-      setIsProcessing(false);
-    }
+    // Raw audio bytes, no base64; the reply arrives through onmessage
+    sock.send(JSON.stringify({ format: 'webm' }));
+    sock.send(await audioBlob.arrayBuffer());
   };
 
   return (
@@ -127,11 +143,7 @@ export default function VoiceChat({ conversationId, onTranscript, onResponse }:
         <div className="text-sm text-gray-600">Processing voice...</div>
       )}
 
-      {audioUrl && (
-        <audio ref={audioRef} controls className="w-full">
-          <source src={audioUrl} type="audio/mp3" />
-        </audio>
-      )}
+      <audio ref={audioRef} controls onEnded={playNext} className={audioUrl ? 'w-full' : 'hidden'} />
     </div>
   );
 }